@@ -4,7 +4,8 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import jwt
 from jwt.exceptions import PyJWTError
 from app.config.settings import API_SECRET_KEY
-from app.config.database import supabase
+from app.services.auth_cache import token_verifier, profile_cache
+from app.services.data_loaders import RequestLoaders
 
 # Security scheme for JWT authentication
 security = HTTPBearer()
@@ -17,20 +18,18 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         # Get the token from the Authorization header
         token = credentials.credentials
         
-        # Verify the token with Supabase
-        response = supabase.auth.get_user(token)
+        # Verify the token locally (signature, expiry, audience)
+        claims = await token_verifier.verify(token)
         
-        # Get user profile with role information
-        profile_response = supabase.table("profiles").select("*").eq("id", response.user.id).single().execute()
+        # Get user profile with role information (cached per user)
+        profile = await profile_cache.get(claims["sub"])
         
-        if not profile_response.data:
+        if not profile:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User profile not found"
             )
         
-        profile = profile_response.data
-        
         # Check if user is active
         if not profile.get("is_active", True):
             raise HTTPException(
@@ -38,12 +37,12 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
                 detail="User account is inactive"
             )
         
-        # Convert User object to dictionary with profile data
+        # Convert token claims to dictionary with profile data
         user_dict = {
-            "id": response.user.id,
-            "email": response.user.email,
-            "app_metadata": response.user.app_metadata,
-            "user_metadata": response.user.user_metadata,
+            "id": claims["sub"],
+            "email": claims.get("email"),
+            "app_metadata": claims.get("app_metadata", {}),
+            "user_metadata": claims.get("user_metadata", {}),
             "role": profile.get("role", "user"),
             "is_active": profile.get("is_active", True),
             "full_name": profile.get("full_name"),
@@ -73,6 +72,12 @@ async def get_current_superadmin(current_user: Dict[str, Any] = Depends(get_curr
         )
     return current_user
 
+def get_loaders() -> RequestLoaders:
+    """
+    Batched loaders scoped to the current request.
+    """
+    return RequestLoaders()
+
 def require_role(required_role: str):
     """
     Factory function to create role-based dependencies.
@@ -3,8 +3,8 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from uuid import UUID
 import math
 
-from app.api.deps import get_current_superadmin
-from app.config.database import supabase
+from app.api.deps import get_current_superadmin, get_loaders
+from app.config.database import async_supabase, run_sync
 from app.schemas.admin import (
     UserProfileResponse,
     UserUpdateRequest,
@@ -13,8 +13,13 @@ from app.schemas.admin import (
     SimulationStatsResponse,
     SystemStatsResponse,
     AdminSimulationResponse,
-    AdminSimulationsListResponse
+    AdminSimulationsListResponse,
+    BudgetBacktestRequest
 )
+from app.services.analysis_executor import analysis_executor
+from app.services.result_repricing import JackpotRepricer
+from app.services.data_loaders import RequestLoaders
+from app.services.auth_cache import profile_cache
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -30,7 +35,7 @@ async def get_users(
     """Get paginated list of users with optional filtering"""
     
     # Build query
-    query = supabase.table("profiles").select("*", count="exact")
+    query = async_supabase.table("profiles").select("*", count="exact")
     
     # Apply filters
     if search:
@@ -46,7 +51,7 @@ async def get_users(
     offset = (page - 1) * page_size
     
     # Execute query with pagination
-    response = query.order("created_at", desc=True).range(offset, offset + page_size - 1).execute()
+    response = await query.order("created_at", desc=True).range(offset, offset + page_size - 1).execute()
     
     if not response.data:
         users = []
@@ -72,7 +77,7 @@ async def get_user(
 ):
     """Get a specific user by ID"""
     
-    response = supabase.table("profiles").select("*").eq("id", str(user_id)).single().execute()
+    response = await async_supabase.table("profiles").select("*").eq("id", str(user_id)).single().execute()
     
     if not response.data:
         raise HTTPException(status_code=404, detail="User not found")
@@ -110,11 +115,14 @@ async def update_user(
             )
     
     # Execute update
-    response = supabase.table("profiles").update(update_data).eq("id", str(user_id)).execute()
+    response = await async_supabase.table("profiles").update(update_data).eq("id", str(user_id)).execute()
     
     if not response.data:
         raise HTTPException(status_code=404, detail="User not found")
     
+    # Role and active status take effect on the user's next request
+    profile_cache.invalidate(str(user_id))
+    
     return UserProfileResponse(**response.data[0])
 
 @router.get("/stats", response_model=SystemStatsResponse)
@@ -124,14 +132,14 @@ async def get_system_stats(
     """Get system-wide statistics"""
     
     # Get user statistics
-    user_stats_response = supabase.table("admin_user_stats").select("*").execute()
+    user_stats_response = await async_supabase.table("admin_user_stats").select("*").execute()
     user_stats = UserStatsResponse(**user_stats_response.data[0]) if user_stats_response.data else UserStatsResponse(
         total_users=0, regular_users=0, superadmins=0, active_users=0, 
         inactive_users=0, active_last_30_days=0, new_users_30_days=0
     )
     
     # Get simulation statistics
-    sim_stats_response = supabase.table("admin_simulation_stats").select("*").execute()
+    sim_stats_response = await async_supabase.table("admin_simulation_stats").select("*").execute()
     sim_stats = SimulationStatsResponse(**sim_stats_response.data[0]) if sim_stats_response.data else SimulationStatsResponse(
         total_simulations=0, completed_simulations=0, pending_simulations=0,
         running_simulations=0, simulations_last_30_days=0, total_simulation_cost=0, avg_simulation_cost=0
@@ -153,7 +161,7 @@ async def get_all_simulations(
     """Get paginated list of all simulations across users"""
     
     # Build query with join to get user information
-    query = supabase.table("simulations").select(
+    query = async_supabase.table("simulations").select(
         "*, profiles!simulations_user_id_fkey(email, full_name)",
         count="exact"
     )
@@ -169,7 +177,7 @@ async def get_all_simulations(
     offset = (page - 1) * page_size
     
     # Execute query with pagination
-    response = query.order("created_at", desc=True).range(offset, offset + page_size - 1).execute()
+    response = await query.order("created_at", desc=True).range(offset, offset + page_size - 1).execute()
     
     if not response.data:
         simulations = []
@@ -211,13 +219,14 @@ async def get_all_simulations(
 @router.get("/simulations/{simulation_id}")
 async def get_simulation_details(
     simulation_id: UUID,
-    current_user: dict = Depends(get_current_superadmin)
+    current_user: dict = Depends(get_current_superadmin),
+    loaders: RequestLoaders = Depends(get_loaders)
 ):
     """Get detailed information about a specific simulation"""
     
     try:
         # Get simulation with user info
-        sim_response = supabase.table("simulations").select(
+        sim_response = await async_supabase.table("simulations").select(
             "*, profiles!simulations_user_id_fkey(email, full_name)"
         ).eq("id", str(simulation_id)).single().execute()
         
@@ -227,12 +236,9 @@ async def get_simulation_details(
         simulation = sim_response.data
         profile = simulation.get("profiles", {}) or {}
         
-        # Get simulation results if available (use maybeSingle since results are optional)
+        # Get simulation results if available (None when there are no results)
         try:
-            results_response = supabase.table("simulation_results").select("*").eq(
-                "simulation_id", str(simulation_id)
-            ).maybeSingle().execute()
-            detailed_results = results_response.data if results_response.data else None
+            detailed_results = await loaders.simulation_results().load(str(simulation_id))
         except Exception as e:
             # If results query fails, just set to None
             detailed_results = None
@@ -259,4 +265,51 @@ async def get_simulation_details(
         if "PGRST116" in str(e) or "0 rows" in str(e):
             raise HTTPException(status_code=404, detail="Simulation not found")
         else:
-            raise HTTPException(status_code=500, detail=f"Error fetching simulation: {str(e)}") 
\ No newline at end of file
+            raise HTTPException(status_code=500, detail=f"Error fetching simulation: {str(e)}")
+
+@router.post("/backtests/budget")
+async def queue_budget_backtest(
+    request: BudgetBacktestRequest,
+    current_user: dict = Depends(get_current_superadmin)
+):
+    """
+    Queue a Monte Carlo backtest of the no-odds budget strategy (the fallback used when
+    a jackpot has no odds) against every completed jackpot.
+    Poll /admin/analysis-jobs/{job_id} for the report.
+    """
+    try:
+        job_id = analysis_executor.submit_budget_backtest(
+            request.budgets, request.samples, request.seed, submitted_by=current_user["id"]
+        )
+        return {"job_id": job_id}
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to queue budget backtest: {str(e)}")
+
+@router.get("/analysis-jobs/{job_id}")
+async def get_analysis_job(
+    job_id: str,
+    current_user: dict = Depends(get_current_superadmin)
+):
+    """Get the status of any analysis job, including backtests and system-triggered analysis."""
+    job = analysis_executor.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Analysis job not found")
+    return job
+
+@router.post("/jackpots/{jackpot_id}/reprice")
+async def reprice_jackpot_results(
+    jackpot_id: UUID,
+    current_user: dict = Depends(get_current_superadmin)
+):
+    """
+    Recompute payouts of every analyzed simulation of a jackpot from the stored match
+    histograms, after the jackpot's prize amounts changed.
+    """
+    try:
+        return await run_sync(lambda: JackpotRepricer(str(jackpot_id)).reprice())
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to reprice jackpot results: {str(e)}")
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, HTTPException
-from app.config.database import supabase
+from app.config.database import async_supabase
 
 router = APIRouter()
 
@@ -10,7 +10,7 @@ async def health_check():
     """
     try:
         # Simple query to check if Supabase connection is working
-        response = supabase.table('profiles').select('count', count='exact').execute()
+        response = await async_supabase.table('profiles').select('count', count='exact').execute()
         
         return {
             "status": "ok",
@@ -1,41 +1,33 @@
-from fastapi import APIRouter, HTTPException
-from ...config.database import supabase
+from fastapi import APIRouter, HTTPException, Request, Response
+from ...services.frontier_cache import frontier_cache
+from ...services.jackpot_cache import jackpot_cache, JackpotPayload
 
 router = APIRouter()
 
+
+def _cached_response(payload: JackpotPayload, request: Request) -> Response:
+    """Serve a cached payload, or 304 Not Modified when the client already has it."""
+    headers = {"ETag": payload.etag, "Cache-Control": "no-cache"}
+    if payload.matches(request.headers.get("if-none-match")):
+        return Response(status_code=304, headers=headers)
+    return Response(content=payload.body, media_type="application/json", headers=headers)
+
+
 @router.get("/", summary="List all jackpots with their games")
-def list_jackpots_with_games():
+def list_jackpots_with_games(request: Request):
     try:
-        # Fetch all jackpots, ordered by completion date desc, limited to 5
-        jackpots_resp = supabase.table("jackpots").select("*").order("completed_at", desc=True).limit(5).execute()
-        if jackpots_resp is None or not jackpots_resp.data:
-            return []
-        return jackpots_resp.data or []
+        # Latest jackpots, ordered by completion date desc, limited to 5 (cached until the next scrape)
+        return _cached_response(jackpot_cache.list_jackpots(), request)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch jackpots: {str(e)}")
 
 
 @router.get("/latest", summary="Get the latest jackpot with games")
-def get_latest_jackpot():
+def get_latest_jackpot(request: Request):
     try:
-        # Fetch the latest jackpot
-        jp_resp = supabase.table("jackpots").select("*").order("completed_at", desc=True).limit(1).single().execute()
-        if jp_resp is None or jp_resp.data is None:
-            raise HTTPException(status_code=404, detail="No jackpots found")
-        
-        jackpot = jp_resp.data
-        # Fetch games for this jackpot
-        games_resp = (
-            supabase.table("games")
-            .select("*")
-            .eq("jackpot_id", jackpot["id"])
-            .order("game_order")
-            .execute()
-        )
-        jackpot["games"] = games_resp.data if games_resp and games_resp.data else []
-        return jackpot
-    except HTTPException:
-        raise
+        return _cached_response(jackpot_cache.latest_jackpot(), request)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch latest jackpot: {str(e)}")
 
@@ -46,22 +38,25 @@ def get_latest_jackpot():
 
 
 @router.get("/{jackpot_id}", summary="Get a single jackpot with its games")
-def get_jackpot(jackpot_id: str):
+def get_jackpot(jackpot_id: str, request: Request):
     try:
-        jp_resp = supabase.table("jackpots").select("*").eq("id", jackpot_id).single().execute()
-        if jp_resp is None or jp_resp.data is None:
-            raise HTTPException(status_code=404, detail="Jackpot not found")
-        jackpot = jp_resp.data
-        games_resp = (
-            supabase.table("games")
-            .select("*")
-            .eq("jackpot_id", jackpot["id"])
-            .order("game_order")
-            .execute()
-        )
-        jackpot["games"] = games_resp.data if games_resp and games_resp.data else []
-        return jackpot
-    except HTTPException:
-        raise
+        return _cached_response(jackpot_cache.jackpot(jackpot_id), request)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch jackpot: {str(e)}")
+
+
+@router.get("/{jackpot_id}/frontier", summary="Get the cost-versus-coverage frontier of a jackpot")
+def get_jackpot_frontier(jackpot_id: str):
+    """
+    Every non-dominated (doubles, triples) shape with its cost and odds-implied
+    probability of reaching each prize level, cheapest first. Cached until the
+    jackpot's odds change.
+    """
+    try:
+        return frontier_cache.get(jackpot_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to compute jackpot frontier: {str(e)}")
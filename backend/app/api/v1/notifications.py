@@ -1,13 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from typing import Dict, Any, Optional
 from uuid import UUID
+import logging
 
 from app.api.deps import get_current_user
 from app.schemas.notifications import (
     Notification,
     NotificationListResponse,
 )
-from app.config.database import supabase
+from app.config.database import supabase, async_supabase
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -24,14 +27,14 @@ async def get_notifications(
     """
     try:
         # Start building the query
-        query = supabase.table("notifications").select("*").eq("user_id", current_user["id"])
+        query = async_supabase.table("notifications").select("*").eq("user_id", current_user["id"])
         
         # Add unread filter if requested
         if unread_only:
             query = query.eq("read", False)
             
         # Execute query with ordering and limit
-        response = query.order("created_at", desc=True).limit(50).execute()
+        response = await query.order("created_at", desc=True).limit(50).execute()
         
         notifications = response.data or []
         
@@ -60,7 +63,7 @@ async def mark_notification_read(
     """Mark a notification as read."""
     try:
         # Update notification read status
-        response = supabase.table("notifications").update(
+        response = await async_supabase.table("notifications").update(
             {"read": True}
         ).eq("id", notification_id).eq("user_id", current_user["id"]).execute()
         
@@ -81,7 +84,7 @@ async def mark_all_notifications_read(
     """Mark all notifications as read for the current user."""
     try:
         # Update all unread notifications for the user
-        response = supabase.table("notifications").update(
+        response = await async_supabase.table("notifications").update(
             {"read": True}
         ).eq("user_id", current_user["id"]).eq("read", False).execute()
         
@@ -98,7 +101,12 @@ def create_notification(
     message: str,
     data: dict = None
 ) -> bool:
-    """Create a new notification for a user."""
+    """
+    Create a new notification for a user.
+
+    Uses the sync client, for the analysis services and workers; async routes
+    call it through run_sync so the insert does not block the event loop.
+    """
     try:
         notification_data = {
             "user_id": user_id,
@@ -112,7 +120,7 @@ def create_notification(
         response = supabase.table("notifications").insert(notification_data).execute()
         return bool(response.data)
     except Exception as e:
-        print(f"Failed to create notification: {e}")
+        logger.error(f"Failed to create notification: {e}")
         return False
 
 
@@ -151,7 +159,7 @@ def create_simulation_completion_notification(
             }
         )
     except Exception as e:
-        print(f"Failed to create simulation completion notification: {e}")
+        logger.error(f"Failed to create simulation completion notification: {e}")
         return False
 
 
@@ -178,5 +186,5 @@ def create_simulation_failure_notification(
             }
         )
     except Exception as e:
-        print(f"Failed to create simulation failure notification: {e}")
+        logger.error(f"Failed to create simulation failure notification: {e}")
         return False 
\ No newline at end of file
@@ -2,6 +2,9 @@ from fastapi import APIRouter, HTTPException
 import logging
 from ...services.scraper.sportpesa_scraper import SportPesaScraper
 from ...config.database import supabase # Import Supabase client
+from ...services.live_standings import LiveStandingsTracker
+from ...services.frontier_cache import frontier_cache
+from ...services.jackpot_cache import jackpot_cache
 from datetime import datetime, timezone # For timestamp updates
 
 # Configure logger for this module
@@ -130,6 +133,22 @@ def scrape_sportpesa_jackpot():
                             logger.info(f"Successfully upserted {len(games_upsert_response.data)} games")
                         # Optionally, check games_upsert_response for errors
 
+                        # Odds or prize moves invalidate the cached cost-versus-coverage frontier, and a
+                        # jackpot whose every game has a score is completed and needs no frontier
+                        if all(game["score_home"] is not None and game["score_away"] is not None for game in games_to_upsert):
+                            frontier_cache.invalidate(jackpot_db_id)
+                        else:
+                            frontier_cache.invalidate_if_changed(jackpot_db_id, games_to_upsert, (jackpot_payload["metadata"] or {}).get("prizes"))
+
+                        # Apply any new scores to the live standings of this jackpot's simulations
+                        try:
+                            LiveStandingsTracker(jackpot_db_id).refresh()
+                        except Exception as live_error:
+                            logger.warning(f"Failed to update live standings for jackpot {jackpot_db_id}: {str(live_error)}")
+
+                # Cached jackpot reads are stale once the scrape has written
+                jackpot_cache.invalidate(jackpot_db_id)
+
                 return {
                     "message": "SportPesa data scraped and saved successfully.",
                     "jackpot_name": jackpot_name,
@@ -139,6 +158,8 @@ def scrape_sportpesa_jackpot():
             except Exception as db_error:
                 # Log db_error details here
                 logger.error(f"Database operation failed: {str(db_error)}", exc_info=True)
+                # Some rows may have been written before the failure
+                jackpot_cache.invalidate()
                 raise HTTPException(status_code=500, detail=f"Database operation failed: {str(db_error)}")
         else:
             raise HTTPException(status_code=404, detail="Failed to scrape SportPesa data or no data found.")
@@ -1,26 +1,45 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, status, Query
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Request, status, Query
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+import asyncio
 import logging
 from app.schemas.simulation import (
     SimulationCreate,
+    PortfolioCreate,
+    PortfolioResponse,
     SimulationResponse,
     SimulationWithSpecification,
     BetSpecificationResponse,
     CombinationPreview,
+    CombinationRankRequest,
+    WinningCombinationsResponse,
+    RankedTicket,
     GameSelectionValidationRequest,
     GameSelectionValidationResponse,
     SportPesaRules,
     SimulationListResponse
 )
-from app.config.database import supabase
-from app.api.deps import get_current_user
+from app.config.database import async_supabase, run_sync
+from app.config.settings import ANALYSIS_WORKERS
+from app.api.deps import get_current_user, get_loaders
+from app.services.data_loaders import RequestLoaders
 from app.services.combination_specification_generator import CombinationSpecificationGenerator
 from app.services.specification_analyzer import SpecificationAnalyzer
+from app.services.analysis_executor import analysis_executor
+from app.services import live_standings
+from app.services.historical_replay import replay_simulation
+from app.services.combination_export import CombinationExporter, gzip_chunks
+from app.services.combination_math import build_game_options
+from app.services.ticket_ranking import TicketRanker, MAX_RANKED_TICKETS
 
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Rows per keyset page of the auto-analysis eligibility query, and simulations per queued batch
+ELIGIBILITY_PAGE_SIZE = 1000
+AUTO_ANALYSIS_BATCH_SIZE = 200
+
 @router.post("/", response_model=SimulationResponse, status_code=status.HTTP_201_CREATED)
 async def create_simulation(
     simulation: SimulationCreate,
@@ -29,28 +48,40 @@ async def create_simulation(
 ):
     """
     Create a new simulation using the specification-based approach.
-    Supports both budget-based and explicit game selection methods.
+    Supports both budget-based and explicit game selection methods, and reduced
+    systems that cover the game selections with fewer tickets.
     """
     try:
         # Create the specification generator
-        spec_generator = CombinationSpecificationGenerator(
+        spec_generator = await run_sync(
+            CombinationSpecificationGenerator,
             simulation_id="temp",  # Will be updated after simulation creation
             jackpot_id=simulation.jackpot_id
         )
         
         # Determine creation method and generate specification
-        if simulation.game_selections:
+        if simulation.reduced:
+            if not simulation.game_selections:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="A reduced system needs game_selections"
+                )
+            specification = await run_sync(spec_generator.create_reduced_specification, simulation.game_selections, simulation.reduced_guarantee)
+        elif simulation.game_selections:
             # Method 1: Explicit game selections
-            specification = spec_generator.create_specification_from_selections(simulation.game_selections)
+            specification = await run_sync(spec_generator.create_specification_from_selections, simulation.game_selections)
         elif simulation.budget_ksh:
             # Method 2: Budget-based automatic selection
-            specification = spec_generator.create_specification_from_budget(simulation.budget_ksh)
+            specification = await run_sync(spec_generator.create_specification_from_budget, simulation.budget_ksh)
         else:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Must provide either game_selections or budget_ksh"
             )
         
+        # Forecast the prize-level probabilities from the odds, stored with the specification
+        specification["forecast"] = await run_sync(spec_generator.forecast, specification)
+        
         # Prepare simulation data
         simulation_data = {
             "user_id": current_user["id"], 
@@ -65,7 +96,7 @@ async def create_simulation(
         }
         
         # Insert simulation into database
-        response = supabase.table("simulations").insert(simulation_data).execute()
+        response = await async_supabase.table("simulations").insert(simulation_data).execute()
         
         if not response.data or len(response.data) == 0:
             raise HTTPException(
@@ -81,6 +112,8 @@ async def create_simulation(
         
         return sim_obj
         
+    except HTTPException:
+        raise
     except ValueError as ve:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -92,9 +125,75 @@ async def create_simulation(
             detail=f"Failed to create simulation: {str(e)}"
         )
 
+@router.post("/portfolio", response_model=PortfolioResponse, status_code=status.HTTP_201_CREATED)
+async def create_portfolio_simulation(
+    portfolio: PortfolioCreate,
+    background_tasks: BackgroundTasks,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Create a portfolio simulation made of several, possibly overlapping, specifications.
+    Reports the raw and deduplicated number of combinations and cost.
+    """
+    try:
+        spec_generator = await run_sync(
+            CombinationSpecificationGenerator,
+            simulation_id="temp",  # Will be updated after simulation creation
+            jackpot_id=portfolio.jackpot_id
+        )
+        portfolio_spec = await run_sync(spec_generator.create_portfolio_specification, portfolio.specifications)
+        
+        simulation_data = {
+            "user_id": current_user["id"],
+            "name": portfolio.name,
+            "jackpot_id": portfolio.jackpot_id,
+            "combination_type": portfolio_spec["combination_type"],
+            "double_count": portfolio_spec["double_count"],
+            "triple_count": portfolio_spec["triple_count"],
+            "effective_combinations": portfolio_spec["total_combinations"],
+            "total_cost": float(portfolio_spec["total_cost"]),
+            "status": "pending"
+        }
+        
+        response = await async_supabase.table("simulations").insert(simulation_data).execute()
+        
+        if not response.data or len(response.data) == 0:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to create simulation"
+            )
+        
+        sim_obj = response.data[0]
+        
+        spec_generator.simulation_id = sim_obj["id"]
+        background_tasks.add_task(spec_generator.save_portfolio, portfolio_spec)
+        
+        return {
+            "simulation": sim_obj,
+            "specifications": len(portfolio_spec["specifications"]),
+            "raw_combinations": portfolio_spec["raw_combinations"],
+            "distinct_combinations": portfolio_spec["total_combinations"],
+            "raw_cost": portfolio_spec["total_cost"],
+            "deduplicated_cost": portfolio_spec["deduplicated_cost"]
+        }
+        
+    except HTTPException:
+        raise
+    except ValueError as ve:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(ve)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to create portfolio simulation: {str(e)}"
+        )
+
 @router.get("/", response_model=SimulationListResponse)
 async def get_simulations(
     current_user: dict = Depends(get_current_user),
+    loaders: RequestLoaders = Depends(get_loaders),
     limit: int = Query(50, ge=1, le=100),
     offset: int = Query(0, ge=0)
 ):
@@ -102,7 +201,7 @@ async def get_simulations(
     try:
         # Get simulations with jackpot information and results existence
         response = (
-            supabase.table("simulations")
+            await async_supabase.table("simulations")
             .select("*, jackpots!inner(status, name), simulation_results(id)", count="exact")
             .eq("user_id", current_user["id"])
             .order("created_at", desc=True)
@@ -113,6 +212,15 @@ async def get_simulations(
         simulations = response.data or []
         total_count = response.count or 0
         
+        # Prefetch basic results data for faster details page loading, one batched query for the page
+        basic_results_by_sim = {}
+        analyzed_ids = [sim["id"] for sim in simulations if sim.get("simulation_results")]
+        try:
+            basic_results = await loaders.simulation_results("total_payout, net_loss, best_match_count").load_many(analyzed_ids)
+            basic_results_by_sim = dict(zip(analyzed_ids, basic_results))
+        except Exception as e:
+            logger.warning(f"Failed to prefetch results for {len(simulations)} simulations: {e}")
+        
         # Enhance simulations with computed status and prefetched data
         enhanced_simulations = []
         for sim in simulations:
@@ -130,21 +238,7 @@ async def get_simulations(
                     enhanced_status = "analyzing"  # Will be analyzed automatically
                 # If jackpot_status is something else, keep "completed"
             
-            # Prefetch basic results data if available for faster details page loading
-            basic_results = None
-            if has_results:
-                try:
-                    results_response = (
-                        supabase.table("simulation_results")
-                        .select("total_payout, net_loss, best_match_count")
-                        .eq("simulation_id", sim["id"])
-                        .execute()
-                    )
-                    if results_response.data:
-                        basic_results = results_response.data[0]
-                        logger.debug(f"Prefetched basic results for simulation {sim['id']}")
-                except Exception as e:
-                    logger.warning(f"Failed to prefetch results for simulation {sim['id']}: {e}")
+            basic_results = basic_results_by_sim.get(sim["id"]) if has_results else None
             
             # Clean up the response and add enhanced information
             enhanced_sim = {
@@ -168,22 +262,16 @@ async def get_simulations(
             needs_analysis = [s for s in enhanced_simulations if s.get("enhanced_status") == "analyzing"]
             if needs_analysis:
                 logger.info(f"Found {len(needs_analysis)} simulations needing auto-analysis")
-                # Trigger analysis in background thread to avoid blocking the response
-                import threading
-                from app.services.specification_analyzer import SpecificationAnalyzer
                 
-                def trigger_auto_analysis():
-                    for sim in needs_analysis:
-                        try:
-                            analyzer = SpecificationAnalyzer(sim["id"], sim["jackpot_id"])
-                            analyzer.analyze()
-                            logger.info(f"Auto-analysis completed for simulation {sim['id']}")
-                        except Exception as e:
-                            logger.error(f"Auto-analysis failed for simulation {sim['id']}: {e}")
+                # One batch per jackpot so the jackpot context is loaded once
+                ids_by_jackpot = {}
+                for sim in needs_analysis:
+                    ids_by_jackpot.setdefault(sim["jackpot_id"], []).append(sim["id"])
                 
-                analysis_thread = threading.Thread(target=trigger_auto_analysis)
-                analysis_thread.daemon = True
-                analysis_thread.start()
+                # Queue analysis in the process pool to avoid blocking the response
+                for jackpot_id, simulation_ids in ids_by_jackpot.items():
+                    job_id = analysis_executor.submit_jackpot_batch(jackpot_id, simulation_ids, submitted_by=current_user["id"])
+                    logger.info(f"Queued auto-analysis job {job_id} for jackpot {jackpot_id}")
         except Exception as e:
             logger.warning(f"Failed to trigger auto-analysis: {e}")
         
@@ -202,13 +290,14 @@ async def get_simulations(
 @router.get("/{simulation_id}", response_model=SimulationWithSpecification)
 async def get_simulation(
     simulation_id: str,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    loaders: RequestLoaders = Depends(get_loaders)
 ):
     """Get a specific simulation with its bet specification and essential jackpot metadata."""
     try:
         # Get simulation
         sim_response = (
-            supabase.table("simulations")
+            await async_supabase.table("simulations")
             .select("*")
             .eq("id", simulation_id)
             .eq("user_id", current_user["id"])
@@ -224,16 +313,20 @@ async def get_simulation(
         
         simulation = sim_response.data
         
-        # Get essential jackpot metadata (name, status, prizes) - no games data
-        jackpot_response = (
-            supabase.table("jackpots")
-            .select("name, status, metadata")
-            .eq("id", simulation["jackpot_id"])
-            .single()
-            .execute()
+        # Get essential jackpot metadata (name, status, prizes) - no games data - together with
+        # the bet specification(s) and results, in one round trip
+        jackpot_data, specifications, results = await asyncio.gather(
+            loaders.jackpots("name, status, metadata").load(simulation["jackpot_id"]),
+            loaders.bet_specifications().load(simulation_id),
+            loaders.simulation_results().load(simulation_id),
+            return_exceptions=True
         )
+        if isinstance(jackpot_data, Exception):
+            raise jackpot_data
+        if isinstance(specifications, Exception):
+            raise specifications
         
-        jackpot_data = jackpot_response.data if jackpot_response.data else {}
+        jackpot_data = jackpot_data or {}
         logger.info(f"Jackpot data for simulation {simulation_id}: {jackpot_data}")
         
         # Debug: check if metadata exists and has prizes
@@ -242,31 +335,13 @@ async def get_simulation(
         else:
             logger.warning(f"No jackpot metadata or prizes found for jackpot {simulation['jackpot_id']}")
         
-        # Get bet specification if it exists
-        spec_response = (
-            supabase.table("bet_specifications")
-            .select("*")
-            .eq("simulation_id", simulation_id)
-            .execute()
-        )
-        
-        specification = spec_response.data[0] if spec_response.data else None
+        specification = specifications[0] if specifications else None
         
-        # Get simulation results if they exist
-        try:
-            logger.info(f"Fetching results for simulation {simulation_id}")
-            results_response = (
-                supabase.table("simulation_results")
-                .select("*")
-                .eq("simulation_id", simulation_id)
-                .execute()
-            )
-            # In Python client, we get a list - take the first result if it exists
-            results = results_response.data[0] if results_response.data else None
-            logger.info(f"Results response for {simulation_id}: data={results is not None}, count={len(results_response.data) if results_response.data else 0}")
-        except Exception as e:
-            logger.error(f"Failed to fetch results for simulation {simulation_id}: {e}")
+        # Results are optional: a failed lookup is reported as no results
+        if isinstance(results, Exception):
+            logger.error(f"Failed to fetch results for simulation {simulation_id}: {results}")
             results = None
+        logger.info(f"Results for {simulation_id}: data={results is not None}")
         
         # Enhance simulation with jackpot metadata
         enhanced_simulation = {
@@ -275,6 +350,7 @@ async def get_simulation(
             "jackpot_status": jackpot_data.get("status"),
             "jackpot_metadata": jackpot_data.get("metadata"),
             "specification": specification,
+            "specifications": specifications,
             "results": results
         }
         
@@ -297,7 +373,7 @@ async def delete_simulation(
     try:
         # Verify ownership
         sim_response = (
-            supabase.table("simulations")
+            await async_supabase.table("simulations")
             .select("id")
             .eq("id", simulation_id)
             .eq("user_id", current_user["id"])
@@ -312,7 +388,7 @@ async def delete_simulation(
             )
         
         # Delete simulation (cascading deletes will handle related data)
-        supabase.table("simulations").delete().eq("id", simulation_id).execute()
+        await async_supabase.table("simulations").delete().eq("id", simulation_id).execute()
         
         return {"message": "Simulation deleted successfully"}
         
@@ -328,88 +404,45 @@ async def delete_simulation(
 async def trigger_auto_analysis():
     """Manual endpoint to trigger automatic analysis for eligible simulations."""
     try:
-        # Find completed simulations where jackpot is completed but no results exist  
-        simulations_response = (
-            supabase.table("simulations")
-            .select("id, jackpot_id, user_id")
-            .eq("status", "completed")
-            .execute()
-        )
-        
+        # Completed simulations of completed jackpots without results, resolved by the database:
+        # an inner join on jackpots and an anti-join on simulation_results, paged by id
         eligible_count = 0
-        
-        if simulations_response.data:
-            import threading
-            from app.services.specification_analyzer import SpecificationAnalyzer
-            
-            def run_analysis_batch():
-                for sim in simulations_response.data:
-                    try:
-                        # Check if jackpot is completed
-                        jackpot_response = (
-                            supabase.table("jackpots")
-                            .select("status")
-                            .eq("id", sim["jackpot_id"])
-                            .single()
-                            .execute()
-                        )
-                        
-                        if not jackpot_response.data or jackpot_response.data["status"] != "completed":
-                            continue
-                        
-                        # Check if results already exist
-                        results_response = (
-                            supabase.table("simulation_results")
-                            .select("id")
-                            .eq("simulation_id", sim["id"])
-                            .execute()
-                        )
-                        
-                        if results_response.data:
-                            continue  # Results already exist
-                        
-                        # This simulation is eligible for auto-analysis
-                        logger.info(f"Manual auto-triggering analysis for simulation {sim['id']}")
-                        analyzer = SpecificationAnalyzer(sim["id"], sim["jackpot_id"])
-                        analyzer.analyze()
-                        
-                    except Exception as e:
-                        logger.error(f"Failed to analyze simulation {sim['id']}: {e}")
-                        continue
+        job_ids = []
+        pending_by_jackpot = {}
+        last_id = None
+        while True:
+            query = (
+                async_supabase.table("simulations")
+                .select("id, jackpot_id, jackpots!inner(status), simulation_results(id)")
+                .eq("status", "completed")
+                .eq("jackpots.status", "completed")
+                .is_("simulation_results", "null")
+            )
+            if last_id is not None:
+                query = query.gt("id", last_id)
+            response = await query.order("id").limit(ELIGIBILITY_PAGE_SIZE).execute()
+            rows = response.data or []
+            eligible_count += len(rows)
             
-            # Count eligible simulations first
-            for sim in simulations_response.data:
-                try:
-                    jackpot_response = (
-                        supabase.table("jackpots")
-                        .select("status")
-                        .eq("id", sim["jackpot_id"])
-                        .single()
-                        .execute()
-                    )
-                    
-                    if not jackpot_response.data or jackpot_response.data["status"] != "completed":
-                        continue
-                    
-                    results_response = (
-                        supabase.table("simulation_results")
-                        .select("id")
-                        .eq("simulation_id", sim["id"])
-                        .execute()
-                    )
-                    
-                    if not results_response.data:
-                        eligible_count += 1
-                except:
-                    continue
+            # Queue full batches in the analysis process pool while paging
+            for sim in rows:
+                simulation_ids = pending_by_jackpot.setdefault(sim["jackpot_id"], [])
+                simulation_ids.append(sim["id"])
+                if len(simulation_ids) == AUTO_ANALYSIS_BATCH_SIZE:
+                    job_ids.append(analysis_executor.submit_jackpot_batch(sim["jackpot_id"], simulation_ids))
+                    pending_by_jackpot[sim["jackpot_id"]] = []
             
-            if eligible_count > 0:
-                # Run analysis in background thread
-                analysis_thread = threading.Thread(target=run_analysis_batch)
-                analysis_thread.daemon = True
-                analysis_thread.start()
+            if len(rows) < ELIGIBILITY_PAGE_SIZE:
+                break
+            last_id = rows[-1]["id"]
         
-        return {"message": f"Triggered analysis for {eligible_count} simulations"}
+        job_ids.extend(
+            analysis_executor.submit_jackpot_batch(jackpot_id, simulation_ids)
+            for jackpot_id, simulation_ids in pending_by_jackpot.items()
+            if simulation_ids
+        )
+        
+        return {"message": f"Triggered analysis for {eligible_count} simulations", "job_ids": job_ids}
         
     except Exception as e:
         logger.error(f"Failed to trigger auto-analysis: {str(e)}")
@@ -418,17 +451,119 @@ async def trigger_auto_analysis():
             detail=f"Failed to trigger auto-analysis: {str(e)}"
         )
 
+@router.get("/analysis-jobs/{job_id}")
+async def get_analysis_job(
+    job_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """Get the status of an analysis job submitted by the current user."""
+    job = analysis_executor.get_job(job_id)
+    # Jobs of other users (and system jobs) are reported as missing; superadmins see every job
+    if not job or (job["submitted_by"] != current_user["id"] and current_user.get("role") != "superadmin"):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Analysis job not found"
+        )
+    return job
+
+@router.get("/jackpots/{jackpot_id}/top-tickets", response_model=List[RankedTicket])
+async def get_jackpot_top_tickets(
+    jackpot_id: str,
+    current_user: dict = Depends(get_current_user),
+    k: int = Query(100, ge=1, le=MAX_RANKED_TICKETS)
+):
+    """Get the K most likely tickets of a jackpot by odds-implied probability."""
+    try:
+        return await run_sync(lambda: TicketRanker(jackpot_id).top_tickets(k))
+    except ValueError as ve:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(ve)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to rank tickets: {str(e)}"
+        )
+
+@router.get("/{simulation_id}/top-tickets", response_model=List[RankedTicket])
+async def get_simulation_top_tickets(
+    simulation_id: str,
+    current_user: dict = Depends(get_current_user),
+    k: int = Query(100, ge=1, le=MAX_RANKED_TICKETS)
+):
+    """Get the K most likely tickets within a simulation's specification."""
+    try:
+        # Verify simulation exists and belongs to user
+        sim_response = (
+            await async_supabase.table("simulations")
+            .select("jackpot_id")
+            .eq("id", simulation_id)
+            .eq("user_id", current_user["id"])
+            .single()
+            .execute()
+        )
+        
+        if not sim_response.data:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Simulation not found"
+            )
+        
+        spec_response = (
+            await async_supabase.table("bet_specifications")
+            .select("game_selections, combination_type")
+            .eq("simulation_id", simulation_id)
+            .execute()
+        )
+        if not spec_response.data:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Bet specification not found"
+            )
+        
+        if len(spec_response.data) > 1:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Ticket ranking is not available for portfolio simulations"
+            )
+        if spec_response.data[0]["combination_type"] == "reduced":
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Ticket ranking is not available for reduced-system simulations"
+            )
+        
+        ranker = await run_sync(TicketRanker, sim_response.data["jackpot_id"])
+        game_options = build_game_options(spec_response.data[0]["game_selections"], ranker.num_games)
+        return await run_sync(ranker.top_tickets, k, game_options)
+        
+    except HTTPException:
+        raise
+    except ValueError as ve:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(ve)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to rank tickets: {str(e)}"
+        )
+
 @router.get("/{simulation_id}/preview", response_model=List[CombinationPreview])
 async def get_combination_preview(
     simulation_id: str,
     current_user: dict = Depends(get_current_user),
-    limit: int = Query(10, ge=1, le=50)
+    limit: int = Query(10, ge=1, le=50),
+    offset: int = Query(0, ge=0),
+    numbers: Optional[List[int]] = Query(None, description="Explicit 1-based combination numbers (overrides offset/limit)"),
+    order: str = Query("index", pattern="^(index|probability)$")
 ):
-    """Get a preview of the first few combinations for a simulation."""
+    """Get a page of combinations for a simulation, starting at any offset."""
     try:
         # Verify simulation exists and belongs to user
         sim_response = (
-            supabase.table("simulations")
+            await async_supabase.table("simulations")
             .select("jackpot_id")
             .eq("id", simulation_id)
             .eq("user_id", current_user["id"])
@@ -442,20 +577,294 @@ async def get_combination_preview(
                 detail="Simulation not found"
             )
         
+        if numbers is not None and len(numbers) > 50:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="At most 50 combination numbers can be requested at once"
+            )
+        
         # Get combination preview
-        analyzer = SpecificationAnalyzer(simulation_id, sim_response.data["jackpot_id"])
-        preview = analyzer.get_combination_preview(limit)
+        analyzer = await run_sync(SpecificationAnalyzer, simulation_id, sim_response.data["jackpot_id"])
+        preview = await run_sync(analyzer.get_combination_preview, limit, offset, numbers, order)
         
         return preview
         
     except HTTPException:
         raise
+    except ValueError as ve:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(ve)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to get combination preview: {str(e)}"
         )
 
+@router.get("/{simulation_id}/sensitivity")
+async def get_result_sensitivity(
+    simulation_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """Get the match histogram and payout if any single game had ended differently."""
+    try:
+        # Verify simulation exists and belongs to user
+        sim_response = (
+            await async_supabase.table("simulations")
+            .select("jackpot_id")
+            .eq("id", simulation_id)
+            .eq("user_id", current_user["id"])
+            .single()
+            .execute()
+        )
+        
+        if not sim_response.data:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Simulation not found"
+            )
+        
+        analyzer = await run_sync(SpecificationAnalyzer, simulation_id, sim_response.data["jackpot_id"])
+        return await run_sync(analyzer.get_result_sensitivity)
+        
+    except HTTPException:
+        raise
+    except ValueError as ve:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(ve)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to compute result sensitivity: {str(e)}"
+        )
+
+@router.get("/{simulation_id}/winners", response_model=WinningCombinationsResponse)
+async def get_winning_combinations(
+    simulation_id: str,
+    current_user: dict = Depends(get_current_user),
+    limit: int = Query(50, ge=1, le=100),
+    offset: int = Query(0, ge=0)
+):
+    """Get a page of the winning combinations of a simulation."""
+    try:
+        # Verify simulation exists and belongs to user
+        sim_response = (
+            await async_supabase.table("simulations")
+            .select("jackpot_id")
+            .eq("id", simulation_id)
+            .eq("user_id", current_user["id"])
+            .single()
+            .execute()
+        )
+        
+        if not sim_response.data:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Simulation not found"
+            )
+        
+        # Use the stored winner index when the analysis produced one
+        results_response = (
+            await async_supabase.table("simulation_results")
+            .select("winning_indices")
+            .eq("simulation_id", simulation_id)
+            .execute()
+        )
+        winning_indices = results_response.data[0].get("winning_indices") if results_response.data else None
+        
+        analyzer = await run_sync(SpecificationAnalyzer, simulation_id, sim_response.data["jackpot_id"])
+        return await run_sync(analyzer.get_winning_combinations, offset, limit, winning_indices)
+        
+    except HTTPException:
+        raise
+    except ValueError as ve:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(ve)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get winning combinations: {str(e)}"
+        )
+
+@router.get("/{simulation_id}/combinations/export")
+async def export_combinations(
+    simulation_id: str,
+    request: Request,
+    current_user: dict = Depends(get_current_user),
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    compress: bool = Query(True, description="Gzip the stream when the client accepts it")
+):
+    """Stream every combination of a simulation with its matches and payout as CSV or NDJSON."""
+    try:
+        # Verify simulation exists and belongs to user
+        sim_response = (
+            await async_supabase.table("simulations")
+            .select("jackpot_id")
+            .eq("id", simulation_id)
+            .eq("user_id", current_user["id"])
+            .single()
+            .execute()
+        )
+        
+        if not sim_response.data:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Simulation not found"
+            )
+        
+        analyzer = await run_sync(SpecificationAnalyzer, simulation_id, sim_response.data["jackpot_id"])
+        exporter = CombinationExporter(analyzer, format, workers=ANALYSIS_WORKERS)
+        
+    except HTTPException:
+        raise
+    except ValueError as ve:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(ve)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to export combinations: {str(e)}"
+        )
+    
+    # The generator is pulled one chunk at a time as the client reads, so the
+    # export is never held in memory
+    headers = {"Content-Disposition": f'attachment; filename="{exporter.filename}"'}
+    body = exporter.iter_chunks()
+    if compress:
+        # The encoding depends on Accept-Encoding, so shared caches must key on it
+        headers["Vary"] = "Accept-Encoding"
+    if compress and "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        body = gzip_chunks(body)
+    
+    return StreamingResponse(body, media_type=exporter.media_type, headers=headers)
+
+@router.post("/{simulation_id}/rank", response_model=CombinationPreview)
+async def get_combination_rank(
+    simulation_id: str,
+    request: CombinationRankRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """Find the combination number of a ticket so it can be linked to directly."""
+    try:
+        # Verify simulation exists and belongs to user
+        sim_response = (
+            await async_supabase.table("simulations")
+            .select("jackpot_id")
+            .eq("id", simulation_id)
+            .eq("user_id", current_user["id"])
+            .single()
+            .execute()
+        )
+        
+        if not sim_response.data:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Simulation not found"
+            )
+        
+        analyzer = await run_sync(SpecificationAnalyzer, simulation_id, sim_response.data["jackpot_id"])
+        return await run_sync(analyzer.get_combination_rank, request.predictions)
+        
+    except HTTPException:
+        raise
+    except ValueError as ve:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(ve)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to look up combination: {str(e)}"
+        )
+
+@router.get("/{simulation_id}/live")
+async def get_live_standing(
+    simulation_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """Get the live standing of a simulation while its jackpot is being played."""
+    try:
+        # Verify simulation exists and belongs to user
+        sim_response = (
+            await async_supabase.table("simulations")
+            .select("jackpot_id")
+            .eq("id", simulation_id)
+            .eq("user_id", current_user["id"])
+            .single()
+            .execute()
+        )
+
+        if not sim_response.data:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Simulation not found"
+            )
+
+        return await run_sync(live_standings.get_live_standing, simulation_id, sim_response.data["jackpot_id"])
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get live standing: {str(e)}"
+        )
+
+@router.get("/{simulation_id}/replay")
+async def get_historical_replay(
+    simulation_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Score a simulation's specification against every completed jackpot.
+    Returns the prize-level hit distribution and the hypothetical profit and loss across history.
+    """
+    try:
+        # Verify simulation exists and belongs to user
+        sim_response = (
+            await async_supabase.table("simulations")
+            .select("jackpot_id, total_cost")
+            .eq("id", simulation_id)
+            .eq("user_id", current_user["id"])
+            .single()
+            .execute()
+        )
+
+        if not sim_response.data:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Simulation not found"
+            )
+
+        return await run_sync(replay_simulation, simulation_id, sim_response.data["jackpot_id"], sim_response.data["total_cost"])
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to replay simulation: {str(e)}"
+        )
+
 @router.post("/validate-selections", response_model=GameSelectionValidationResponse)
 async def validate_game_selections(
     request: GameSelectionValidationRequest,
@@ -467,14 +876,15 @@ async def validate_game_selections(
         game_selections = request.game_selections
         
         # Create temporary specification generator for validation
-        temp_generator = CombinationSpecificationGenerator(
+        temp_generator = await run_sync(
+            CombinationSpecificationGenerator,
             simulation_id="temp_validation",
             jackpot_id=jackpot_id
         )
         
         try:
             # Attempt to create specification from selections
-            specification = temp_generator.create_specification_from_selections(game_selections)
+            specification = await run_sync(temp_generator.create_specification_from_selections, game_selections)
             
             return GameSelectionValidationResponse(
                 game_selections=game_selections,
@@ -515,12 +925,17 @@ async def delete_simulation_results(
     simulation_id: str,
     current_user: dict = Depends(get_current_user)
 ):
-    """Delete simulation results to allow re-analysis with updated jackpot metadata"""
+    """
+    Bring simulation results up to date with updated jackpot metadata.
+
+    Results with a stored match histogram are repriced with the current prizes
+    (nothing is enumerated); older results are deleted and re-analyzed.
+    """
     try:
         # Verify simulation ownership first
         sim_response = (
-            supabase.table("simulations")
-            .select("id, jackpot_id")
+            await async_supabase.table("simulations")
+            .select("id, jackpot_id, total_cost")
             .eq("id", simulation_id)
             .eq("user_id", current_user["id"])
             .single()
@@ -533,19 +948,51 @@ async def delete_simulation_results(
                 detail="Simulation not found"
             )
         
-        # Delete existing results
+        # Payouts only depend on the stored histogram, the prizes and the cost
+        results_response = (
+            await async_supabase.table("simulation_results")
+            .select("*")
+            .eq("simulation_id", simulation_id)
+            .execute()
+        )
+        stored_result = results_response.data[0] if results_response.data else None
+        if stored_result and (stored_result.get("analysis") or {}).get("match_histogram"):
+            jackpot_response = (
+                await async_supabase.table("jackpots")
+                .select("metadata")
+                .eq("id", sim_response.data["jackpot_id"])
+                .single()
+                .execute()
+            )
+            jackpot_metadata = jackpot_response.data.get("metadata") if jackpot_response.data else None
+            if jackpot_metadata:
+                analyzer = SpecificationAnalyzer.for_repricing(sim_response.data, jackpot_metadata)
+                await (
+                    async_supabase.table("simulation_results")
+                    .upsert(analyzer.reprice_result(stored_result), on_conflict="simulation_id")
+                    .execute()
+                )
+                logger.info(f"Repriced results of simulation {simulation_id} from the stored match histogram")
+                
+                return {
+                    "message": "Results repriced with the current jackpot prizes",
+                    "simulation_id": simulation_id
+                }
+        
+        # No stored histogram: delete existing results and re-analyze
         delete_response = (
-            supabase.table("simulation_results")
+            await async_supabase.table("simulation_results")
             .delete()
             .eq("simulation_id", simulation_id)
             .execute()
         )
         
-        # Trigger re-analysis immediately
+        # Trigger re-analysis immediately, awaiting the pool job without blocking the event loop
         try:
-            from app.services.specification_analyzer import SpecificationAnalyzer
-            analyzer = SpecificationAnalyzer(simulation_id, sim_response.data["jackpot_id"])
-            analyzer.analyze()
+            job_id = analysis_executor.submit_simulation(
+                simulation_id, sim_response.data["jackpot_id"], submitted_by=current_user["id"]
+            )
+            await asyncio.wrap_future(analysis_executor.get_future(job_id))
             logger.info(f"Re-analysis completed for simulation {simulation_id}")
             
             return {
@@ -577,7 +1024,7 @@ async def debug_simulation_results(
     try:
         # Verify simulation ownership first
         sim_response = (
-            supabase.table("simulations")
+            await async_supabase.table("simulations")
             .select("id")
             .eq("id", simulation_id)
             .eq("user_id", current_user["id"])
@@ -596,7 +1043,7 @@ async def debug_simulation_results(
         
         # Query 1: single result (what we use in production)
         try:
-            single_response = supabase.table("simulation_results").select("*").eq("simulation_id", simulation_id).execute()
+            single_response = await async_supabase.table("simulation_results").select("*").eq("simulation_id", simulation_id).execute()
             results_info["single_result"] = len(single_response.data) > 0 if single_response.data else False
             results_info["single_data"] = single_response.data[0] if single_response.data else None
         except Exception as e:
@@ -604,7 +1051,7 @@ async def debug_simulation_results(
         
         # Query 2: regular select (to see all rows)
         try:
-            all_response = supabase.table("simulation_results").select("*").eq("simulation_id", simulation_id).execute()
+            all_response = await async_supabase.table("simulation_results").select("*").eq("simulation_id", simulation_id).execute()
             results_info["all_results_count"] = len(all_response.data) if all_response.data else 0
             results_info["all_results_data"] = all_response.data
         except Exception as e:
@@ -612,7 +1059,7 @@ async def debug_simulation_results(
         
         # Query 3: count all simulation results
         try:
-            count_response = supabase.table("simulation_results").select("simulation_id", count="exact").execute()
+            count_response = await async_supabase.table("simulation_results").select("simulation_id", count="exact").execute()
             results_info["total_results_in_table"] = count_response.count
         except Exception as e:
             results_info["count_error"] = str(e)
@@ -1,6 +1,10 @@
-from supabase import create_client, Client
+from typing import Any, Callable, TypeVar
+from starlette.concurrency import run_in_threadpool
+from supabase import create_client, Client, AsyncClient
 from .settings import SUPABASE_URL, SUPABASE_SERVICE_KEY
 
+T = TypeVar("T")
+
 def get_supabase_client() -> Client:
     """
     Create and return a Supabase client instance.
@@ -10,5 +14,33 @@ def get_supabase_client() -> Client:
 
     return create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
 
+def get_async_supabase_client() -> AsyncClient:
+    """
+    Create and return an async Supabase client instance for the API routes.
+
+    Its PostgREST client keeps one httpx connection pool that every awaited
+    query shares, so a worker serves other requests while a query is in flight.
+    """
+    if not SUPABASE_URL or not SUPABASE_SERVICE_KEY:
+        raise ValueError("Missing Supabase environment variables")
+
+    return AsyncClient(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+
+async def close_async_supabase() -> None:
+    """Close the async client's connection pool (called on application shutdown)."""
+    await async_supabase.postgrest.aclose()
+
+async def run_sync(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run blocking code (the sync client, analysis services) in the thread pool.
+
+    Async routes use this for code paths that are shared with workers and
+    scripts and therefore stay synchronous.
+    """
+    return await run_in_threadpool(func, *args, **kwargs)
+
 # Create a global instance of the Supabase client
 supabase: Client = get_supabase_client()
+
+# Create a global instance of the async Supabase client
+async_supabase: AsyncClient = get_async_supabase_client()
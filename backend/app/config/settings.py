@@ -28,3 +28,20 @@ CORS_ORIGINS = [
 RESEND_API_KEY = os.getenv("RESEND_API_KEY")
 EMAIL_FROM = os.getenv("EMAIL_FROM", "notifications@resend.dev")
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:3000")
+
+# Analysis executor settings
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", os.cpu_count() or 1))
+ANALYSIS_MAX_PENDING_JOBS = int(os.getenv("ANALYSIS_MAX_PENDING_JOBS", "1000"))
+
+# Historical replay settings
+HISTORICAL_CACHE_TTL = int(os.getenv("HISTORICAL_CACHE_TTL", "600"))  # Seconds before completed jackpots are reloaded
+
+# Auth settings
+SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET")  # HS256 secret of the project; asymmetric keys come from the JWKS
+SUPABASE_JWKS_URL = os.getenv("SUPABASE_JWKS_URL", f"{SUPABASE_URL}/auth/v1/.well-known/jwks.json" if SUPABASE_URL else None)
+JWKS_CACHE_TTL = int(os.getenv("JWKS_CACHE_TTL", "600"))  # Seconds before the signing keys are refetched
+PROFILE_CACHE_TTL = int(os.getenv("PROFILE_CACHE_TTL", "60"))  # Seconds a cached profile (role, is_active) is trusted
+PROFILE_CACHE_SIZE = int(os.getenv("PROFILE_CACHE_SIZE", "10000"))
+
+# Jackpot read cache settings
+JACKPOT_CACHE_TTL = int(os.getenv("JACKPOT_CACHE_TTL", "60"))  # Seconds before cached jackpots are reloaded without a scrape
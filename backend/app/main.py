@@ -1,7 +1,10 @@
 from .config.logging import setup_logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
 from .api.v1.router import api_router
+from .services.analysis_executor import analysis_executor
+from .config.database import close_async_supabase
 import os
 from typing import List
 
@@ -17,11 +20,19 @@ def get_allowed_origins() -> List[str]:
         raise ValueError(error_msg)
     return [origin.strip() for origin in origins_str.split(",")]
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Let queued analysis jobs finish instead of dropping them with the process
+    analysis_executor.shutdown(wait=True)
+    await close_async_supabase()
+
 try:
     app = FastAPI(
         title="Gambling Awareness API",
         description="API for the Gambling Awareness web application",
-        version="0.1.0"
+        version="0.1.0",
+        lifespan=lifespan
     )
 
     app.add_middleware(
@@ -1,5 +1,5 @@
 from typing import Optional, List, Dict, Any
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from datetime import datetime
 from decimal import Decimal
 from uuid import UUID
@@ -87,4 +87,11 @@ class AdminSimulationsListResponse(BaseModel):
     total_count: int
     page: int
     page_size: int
-    total_pages: int 
\ No newline at end of file
+    total_pages: int
+
+# Backtest schemas
+class BudgetBacktestRequest(BaseModel):
+    """Schema for queueing a Monte Carlo backtest of the no-odds budget strategy"""
+    budgets: List[float] = Field(..., min_length=1, max_length=50)
+    samples: int = Field(1000, ge=1, le=100000)  # Seeded specifications per budget
+    seed: int = 0
@@ -16,6 +16,14 @@ class SimulationCreate(SimulationBase):
     
     # Method 2: Explicit game selections
     game_selections: Optional[Dict[str, List[str]]] = None
+    
+    # Reduced system over the game selections instead of every combination
+    reduced: bool = False
+    reduced_guarantee: Optional[int] = None  # Defaults to the lowest prize level
+
+class PortfolioCreate(SimulationBase):
+    """Schema for creating a portfolio simulation from several game selections"""
+    specifications: List[Dict[str, List[str]]]
 
 class SimulationUpdate(BaseModel):
     """Schema for updating an existing simulation"""
@@ -58,12 +66,16 @@ class BetSpecificationResponse(BaseModel):
     """Schema for bet specification response"""
     id: UUID
     simulation_id: UUID
+    portfolio_position: int = 0
     game_selections: Dict[str, List[str]]
     combination_type: str
     double_games: List[int]
     triple_games: List[int]
     total_combinations: int
     total_cost: Decimal
+    forecast: Optional[Dict[str, Any]] = None
+    reduced_guarantee: Optional[int] = None
+    reduced_tickets: Optional[List[List[str]]] = None  # Tickets of a reduced system
     created_at: datetime
 
     class Config:
@@ -72,6 +84,16 @@ class BetSpecificationResponse(BaseModel):
 class SimulationWithSpecification(SimulationResponse):
     """Schema for simulation with its bet specification"""
     specification: Optional[BetSpecificationResponse] = None
+    specifications: Optional[List[BetSpecificationResponse]] = None  # Every specification of a portfolio
+
+class PortfolioResponse(BaseModel):
+    """Schema for a created portfolio simulation with raw and deduplicated size"""
+    simulation: SimulationResponse
+    specifications: int
+    raw_combinations: int
+    distinct_combinations: int
+    raw_cost: Decimal
+    deduplicated_cost: Decimal
 
 class GameSelectionValidationRequest(BaseModel):
     """Schema for validating game selections"""
@@ -108,6 +130,24 @@ class CombinationPreview(BaseModel):
     is_winner: bool
     prize_level: Optional[str] = None
     payout: Decimal = 0.0
+    probability: Optional[float] = None  # Odds-implied, when ordered by probability
+
+class RankedTicket(BaseModel):
+    """Schema for a ticket ranked by odds-implied probability"""
+    rank: int
+    predictions: List[str]
+    probability: float
+    combination_number: Optional[int] = None
+
+class CombinationRankRequest(BaseModel):
+    """Schema for looking up a ticket's combination number"""
+    predictions: List[str]  # One 1/X/2 prediction per game, in game order
+
+class WinningCombinationsResponse(BaseModel):
+    """Schema for a page of winning combinations"""
+    total_winners: int
+    offset: int
+    combinations: List[CombinationPreview]
 
 class SimulationAnalysisResponse(BaseModel):
     """Schema for analysis response with prize level tracking"""
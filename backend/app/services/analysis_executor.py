@@ -0,0 +1,265 @@
+from typing import Dict, Any, Optional, List, Callable, Tuple
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, Future
+from datetime import datetime, timezone
+import multiprocessing
+import threading
+import logging
+import uuid
+from app.config.settings import ANALYSIS_WORKERS, ANALYSIS_MAX_PENDING_JOBS
+
+logger = logging.getLogger(__name__)
+
+# Finished jobs kept around for status lookups
+MAX_FINISHED_JOBS = 1000
+
+
+def _analyze_simulation(simulation_id: str, jackpot_id: str, method: str) -> Dict[str, Any]:
+    """Worker entry point: analyze a single simulation."""
+    from app.services.specification_analyzer import SpecificationAnalyzer
+
+    summary = SpecificationAnalyzer(simulation_id, jackpot_id).analyze(method)
+    return {
+        "simulation_id": simulation_id,
+        "analyzed": bool(summary),
+        "best_match_count": summary.get("best_match_count"),
+    }
+
+
+def _analyze_jackpot(jackpot_id: str, simulation_ids: Optional[List[str]], exclude_ids: List[str]) -> Dict[str, Any]:
+    """Worker entry point: analyze a jackpot's pending simulations in one batch."""
+    from app.services.jackpot_batch_analyzer import JackpotBatchAnalyzer
+
+    return JackpotBatchAnalyzer(jackpot_id).analyze_pending(simulation_ids, exclude_ids)
+
+
+def _backtest_budgets(budgets: List[float], samples: int, seed: int) -> Dict[str, Any]:
+    """Worker entry point: Monte Carlo backtest of the no-odds budget strategy over the completed jackpots."""
+    from app.services.budget_backtest import BudgetBacktest
+    from app.services.historical_replay import historical_outcomes
+
+    # Already in a pool worker: score the tasks in-process rather than nesting another pool
+    return BudgetBacktest(budgets, samples, seed).run(historical_outcomes.get(), workers=1)
+
+
+class AnalysisExecutor:
+    """
+    Bounded process pool for CPU-bound analysis work.
+
+    Jobs are submitted with a key and the id of the submitting user (None for
+    system jobs); submitting a key that is already queued or
+    running returns the existing job instead of starting a duplicate. Analysis
+    jobs also claim their simulations: a simulation is in at most one queued or
+    running job, whichever endpoint submitted it, because worker processes do
+    not share the analyzer's in-process running set. Each job keeps its future
+    and a status record that can be looked up by id. On shutdown the pool stops
+    accepting work and waits for queued jobs to finish.
+    """
+
+    def __init__(self, max_workers: int, max_pending_jobs: int):
+        self.max_workers = max(1, max_workers)
+        self.max_pending_jobs = max_pending_jobs
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._futures: Dict[str, Future] = {}
+        self._active_keys: Dict[str, str] = {}
+        self._claimed_simulations: Dict[str, Tuple[str, str]] = {}  # simulation id -> (job id, jackpot id)
+        self._claimed_jackpots: Dict[str, str] = {}  # jackpot id -> job id analyzing all its pending simulations
+        self._lock = threading.Lock()
+        self._shutting_down = False
+
+    def submit(self, kind: str, key: str, fn: Callable, *args: Any, submitted_by: Optional[str] = None) -> str:
+        """Queue fn(*args) in the pool and return the job id."""
+        with self._lock:
+            job_id, future = self._submit_locked(kind, key, fn, *args, submitted_by=submitted_by)
+        return self._watch(job_id, future)
+
+    def submit_simulation(
+        self,
+        simulation_id: str,
+        jackpot_id: str,
+        method: str = "closed_form",
+        submitted_by: Optional[str] = None
+    ) -> str:
+        """Queue analysis of one simulation (or return the job that already covers it)."""
+        with self._lock:
+            existing = self._claiming_job(simulation_id, jackpot_id)
+            if existing is not None:
+                return existing
+
+            job_id, future = self._submit_locked(
+                "simulation", f"simulation:{simulation_id}", _analyze_simulation, simulation_id, jackpot_id, method,
+                submitted_by=submitted_by
+            )
+            if future is not None:
+                self._claimed_simulations[simulation_id] = (job_id, jackpot_id)
+        return self._watch(job_id, future)
+
+    def submit_jackpot_batch(
+        self,
+        jackpot_id: str,
+        simulation_ids: Optional[List[str]] = None,
+        submitted_by: Optional[str] = None
+    ) -> str:
+        """
+        Queue batch analysis of a jackpot's pending simulations (optionally restricted to some ids).
+
+        Simulations already claimed by another job are left to it; if every one
+        is, that job's id is returned.
+        """
+        with self._lock:
+            # Simulations of this jackpot that queued or running jobs already cover
+            claimed = sorted(
+                simulation_id for simulation_id, (_, claimed_jackpot) in self._claimed_simulations.items()
+                if claimed_jackpot == jackpot_id
+            )
+
+            if simulation_ids and set(simulation_ids) <= set(claimed):
+                return self._claimed_simulations[simulation_ids[0]][0]
+            if jackpot_id in self._claimed_jackpots:
+                return self._claimed_jackpots[jackpot_id]
+
+            if simulation_ids is None:
+                job_id, future = self._submit_locked(
+                    "jackpot_batch", f"jackpot:{jackpot_id}", _analyze_jackpot, jackpot_id, None, claimed,
+                    submitted_by=submitted_by
+                )
+                if future is not None:
+                    self._claimed_jackpots[jackpot_id] = job_id
+            else:
+                unclaimed = sorted(set(simulation_ids) - set(claimed))
+                job_id, future = self._submit_locked(
+                    "jackpot_batch", f"jackpot:{jackpot_id}:{','.join(unclaimed)}", _analyze_jackpot, jackpot_id, unclaimed, [],
+                    submitted_by=submitted_by
+                )
+                if future is not None:
+                    for simulation_id in unclaimed:
+                        self._claimed_simulations[simulation_id] = (job_id, jackpot_id)
+        return self._watch(job_id, future)
+
+    def submit_budget_backtest(
+        self,
+        budgets: List[float],
+        samples: int,
+        seed: int = 0,
+        submitted_by: Optional[str] = None
+    ) -> str:
+        """Queue a Monte Carlo backtest of the given budgets (no-odds strategy)."""
+        budgets = sorted(set(float(budget) for budget in budgets))
+        key = f"budget_backtest:{','.join(str(budget) for budget in budgets)}:{samples}:{seed}"
+        return self.submit("budget_backtest", key, _backtest_budgets, budgets, samples, seed, submitted_by=submitted_by)
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Current status record of a job, or None if unknown."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            future = self._futures.get(job_id)
+            if job["status"] == "queued" and future is not None and future.running():
+                job["status"] = "running"
+            return dict(job)
+
+    def _submit_locked(
+        self,
+        kind: str,
+        key: str,
+        fn: Callable,
+        *args: Any,
+        submitted_by: Optional[str] = None
+    ) -> Tuple[str, Optional[Future]]:
+        """Start a job (caller holds the lock); returns its id and future, or the existing job's id and None."""
+        if self._shutting_down:
+            raise RuntimeError("Analysis executor is shutting down")
+
+        if key in self._active_keys:
+            return self._active_keys[key], None
+
+        if len(self._active_keys) >= self.max_pending_jobs:
+            raise RuntimeError(f"Analysis queue is full ({self.max_pending_jobs} jobs pending)")
+
+        if self._pool is None:
+            # spawn keeps workers independent of the server's threads and open connections
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            logger.info(f"[AnalysisExecutor] Started process pool with {self.max_workers} workers")
+
+        job_id = str(uuid.uuid4())
+        self._jobs[job_id] = {
+            "id": job_id,
+            "kind": kind,
+            "key": key,
+            "submitted_by": submitted_by,
+            "status": "queued",
+            "submitted_at": datetime.now(timezone.utc).isoformat(),
+            "finished_at": None,
+            "result": None,
+            "error": None,
+        }
+        self._active_keys[key] = job_id
+        future = self._pool.submit(fn, *args)
+        self._futures[job_id] = future
+        return job_id, future
+
+    def _watch(self, job_id: str, future: Optional[Future]) -> str:
+        # Outside the lock: the callback runs at once if the job already finished
+        if future is not None:
+            future.add_done_callback(lambda f: self._on_done(job_id, f))
+        return job_id
+
+    def _claiming_job(self, simulation_id: str, jackpot_id: str) -> Optional[str]:
+        """Queued or running job that covers a simulation, if any (caller holds the lock)."""
+        if simulation_id in self._claimed_simulations:
+            return self._claimed_simulations[simulation_id][0]
+        return self._claimed_jackpots.get(jackpot_id)
+
+    def get_future(self, job_id: str) -> Optional[Future]:
+        """Future of a job, while its status record is retained."""
+        with self._lock:
+            return self._futures.get(job_id)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting jobs and, by default, wait for queued and running jobs to finish."""
+        with self._lock:
+            self._shutting_down = True
+            pool = self._pool
+            pending = len(self._active_keys)
+
+        if pool is None:
+            return
+
+        logger.info(f"[AnalysisExecutor] Shutting down with {pending} unfinished jobs (wait={wait})")
+        pool.shutdown(wait=wait, cancel_futures=not wait)
+
+    def _on_done(self, job_id: str, future: Future) -> None:
+        with self._lock:
+            job = self._jobs[job_id]
+            job["finished_at"] = datetime.now(timezone.utc).isoformat()
+            if future.cancelled():
+                job["status"] = "cancelled"
+                logger.warning(f"[AnalysisExecutor] Job {job_id} ({job['key']}) was cancelled")
+            elif future.exception() is not None:
+                job["status"] = "failed"
+                job["error"] = str(future.exception())
+                logger.error(f"[AnalysisExecutor] Job {job_id} ({job['key']}) failed: {job['error']}")
+            else:
+                job["status"] = "completed"
+                job["result"] = future.result()
+
+            self._active_keys.pop(job["key"], None)
+            for simulation_id in [sid for sid, (claiming_job, _) in self._claimed_simulations.items() if claiming_job == job_id]:
+                del self._claimed_simulations[simulation_id]
+            for jackpot_id in [jid for jid, claiming_job in self._claimed_jackpots.items() if claiming_job == job_id]:
+                del self._claimed_jackpots[jackpot_id]
+
+            # Drop the oldest finished jobs beyond the retention limit
+            finished = [jid for jid, j in self._jobs.items() if j["finished_at"] is not None]
+            for old_job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+                del self._jobs[old_job_id]
+                self._futures.pop(old_job_id, None)
+
+
+# Create a global instance of the analysis executor
+analysis_executor = AnalysisExecutor(ANALYSIS_WORKERS, ANALYSIS_MAX_PENDING_JOBS)
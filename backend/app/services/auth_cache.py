@@ -0,0 +1,176 @@
+from typing import Dict, Any, Optional, Tuple
+from collections import OrderedDict
+import asyncio
+import threading
+import time
+import logging
+import httpx
+import jwt
+from jwt.algorithms import has_crypto
+from app.config.database import async_supabase
+from app.config.settings import (
+    SUPABASE_JWT_SECRET,
+    SUPABASE_JWKS_URL,
+    JWKS_CACHE_TTL,
+    PROFILE_CACHE_TTL,
+    PROFILE_CACHE_SIZE,
+)
+
+logger = logging.getLogger(__name__)
+
+# Audience of Supabase access tokens issued to signed-in users
+TOKEN_AUDIENCE = "authenticated"
+
+# Seconds between JWKS fetches triggered by tokens naming an unknown key
+JWKS_MIN_REFRESH_INTERVAL = 30
+
+
+class TokenVerifier:
+    """
+    Verify Supabase access tokens locally instead of asking the auth server.
+
+    HS256 tokens are checked with the project's JWT secret. Asymmetric tokens
+    (ES256/RS256) are checked with the project's JWKS; the key set is cached,
+    refetched after a TTL, and refetched early when a token names an unknown key
+    (at most once per JWKS_MIN_REFRESH_INTERVAL; unknown keys in between are
+    rejected without a fetch). The accepted algorithm is pinned by the key, never
+    taken from the token header.
+    Asymmetric keys need the optional cryptography package. A token that cannot
+    be verified locally (no secret configured, no usable key) is validated by
+    the auth server as before.
+    """
+
+    def __init__(
+        self,
+        jwt_secret: Optional[str] = SUPABASE_JWT_SECRET,
+        jwks_url: Optional[str] = SUPABASE_JWKS_URL,
+        ttl_seconds: int = JWKS_CACHE_TTL
+    ):
+        self.jwt_secret = jwt_secret
+        self.jwks_url = jwks_url if has_crypto else None
+        self.ttl_seconds = ttl_seconds
+        self._keys: Dict[str, jwt.PyJWK] = {}
+        self._loaded_at = 0.0
+        self._fetched_at = float("-inf")
+        self._lock = asyncio.Lock()
+
+        if jwks_url and not has_crypto:
+            logger.warning("[TokenVerifier] cryptography is not installed, asymmetric tokens are validated by the auth server")
+
+    async def verify(self, token: str) -> Dict[str, Any]:
+        """
+        Claims of a valid access token (sub, email, app_metadata, user_metadata, ...).
+
+        Raises jwt.PyJWTError (or an auth error from the fallback) for an invalid token.
+        """
+        header = jwt.get_unverified_header(token)
+        algorithm = header.get("alg")
+
+        if algorithm == "HS256" and self.jwt_secret:
+            return self._decode(token, self.jwt_secret, "HS256")
+
+        if algorithm != "HS256" and self.jwks_url:
+            key = await self._signing_key(header.get("kid"))
+            if key is not None:
+                return self._decode(token, key.key, key.algorithm_name)
+            if self._keys:
+                raise jwt.InvalidKeyError("Token is signed with an unknown key")
+
+        return await self._verify_remotely(token)
+
+    @staticmethod
+    def _decode(token: str, key: Any, algorithm: str) -> Dict[str, Any]:
+        return jwt.decode(
+            token,
+            key,
+            algorithms=[algorithm],
+            audience=TOKEN_AUDIENCE,
+            options={"require": ["exp", "sub"]},
+        )
+
+    async def _signing_key(self, kid: Optional[str]) -> Optional[jwt.PyJWK]:
+        """Cached JWKS key of a token, refreshing the key set on expiry or an unknown kid (rate limited)."""
+        if not self._needs_refresh(kid):
+            return self._keys.get(kid)
+
+        async with self._lock:
+            if self._needs_refresh(kid):
+                self._fetched_at = time.monotonic()
+                try:
+                    await self._refresh_keys()
+                except Exception as e:
+                    # Keep the previous keys; retried after the minimum interval
+                    logger.error(f"[TokenVerifier] Error fetching JWKS from {self.jwks_url}: {str(e)}")
+            return self._keys.get(kid)
+
+    def _needs_refresh(self, kid: Optional[str]) -> bool:
+        now = time.monotonic()
+        if now - self._fetched_at < JWKS_MIN_REFRESH_INTERVAL:
+            return False
+        return kid not in self._keys or now - self._loaded_at >= self.ttl_seconds
+
+    async def _refresh_keys(self) -> None:
+        async with httpx.AsyncClient(timeout=10) as client:
+            response = await client.get(self.jwks_url)
+            response.raise_for_status()
+            key_set = jwt.PyJWKSet.from_dict(response.json())
+
+        self._keys = {key.key_id: key for key in key_set.keys if key.key_id}
+        self._loaded_at = time.monotonic()
+        logger.info(f"[TokenVerifier] Loaded {len(self._keys)} signing keys")
+
+    @staticmethod
+    async def _verify_remotely(token: str) -> Dict[str, Any]:
+        response = await async_supabase.auth.get_user(token)
+        user = response.user
+        return {
+            "sub": user.id,
+            "email": user.email,
+            "app_metadata": user.app_metadata,
+            "user_metadata": user.user_metadata,
+        }
+
+
+class ProfileCache:
+    """
+    In-process LRU cache of user profiles (role, is_active, ...) keyed by user id.
+
+    Entries expire after a TTL so changes made outside this process are picked
+    up; profile updates made through the admin API invalidate the entry at once.
+    """
+
+    def __init__(self, ttl_seconds: int = PROFILE_CACHE_TTL, max_size: int = PROFILE_CACHE_SIZE):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Profile of a user, from the cache or the database; None if there is no profile."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl_seconds:
+                self._entries.move_to_end(user_id)
+                return entry[1]
+
+        response = await async_supabase.table("profiles").select("*").eq("id", user_id).limit(1).execute()
+        profile = response.data[0] if response.data else None
+        if profile is not None:
+            self.put(user_id, profile)
+        return profile
+
+    def put(self, user_id: str, profile: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[user_id] = (time.monotonic(), profile)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+
+# Create global instances of the token verifier and profile cache
+token_verifier = TokenVerifier()
+profile_cache = ProfileCache()
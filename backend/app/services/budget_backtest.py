@@ -0,0 +1,175 @@
+from typing import List, Dict, Any, Optional, Tuple
+from concurrent.futures import Executor, ProcessPoolExecutor
+import multiprocessing
+import random
+import time
+import logging
+import numpy as np
+from app.services.combination_specification_generator import CombinationSpecificationGenerator
+from app.services.historical_replay import HistoricalOutcomes
+from app.services.vectorized_enumeration import OUTCOME_CODES
+
+logger = logging.getLogger(__name__)
+
+# Specifications scored per worker task
+SAMPLES_PER_TASK = 500
+
+# ROI quantile reported as the tail (and the tail mean below it)
+TAIL_QUANTILE = 0.05
+
+# Budget strategy the backtest replays (the generator's fallback when a jackpot has no odds)
+BACKTEST_STRATEGY = "no_odds_fallback"
+
+
+def sample_best_matches(
+    num_games: int,
+    doubles: int,
+    triples: int,
+    seeds: List[str],
+    outcomes: np.ndarray
+) -> np.ndarray:
+    """
+    Best match count of seeded random specifications against every outcome vector.
+
+    A full system always holds the ticket that picks the result on every game where
+    it was selected, so its best match is the number of games whose result falls
+    inside the selections (the closed form of the analysis). Row s of the result
+    holds specification s's best match for every jackpot.
+    """
+    selected = np.zeros((len(seeds), num_games, 3), dtype=np.int8)
+    for sample, seed in enumerate(seeds):
+        selections = CombinationSpecificationGenerator.random_game_selections(num_games, doubles, triples, random.Random(seed))
+        for game_num, options in selections.items():
+            for outcome in options:
+                selected[sample, int(game_num) - 1, OUTCOME_CODES[outcome]] = 1
+
+    # hits[s, j, g] = 1 when specification s selected the result of jackpot j's game g
+    hits = selected[:, np.arange(num_games)[None, :], outcomes]
+    return hits.sum(axis=2, dtype=np.int64)
+
+
+def backtest_task(
+    num_games: int,
+    doubles: int,
+    triples: int,
+    seeds: List[str],
+    outcomes: np.ndarray,
+    prizes: np.ndarray,
+    cost: float
+) -> np.ndarray:
+    """ROI of every seeded specification over the whole history (runs inside a worker)."""
+    best_matches = sample_best_matches(num_games, doubles, triples, seeds, outcomes)
+    payouts = prizes[np.arange(outcomes.shape[0])[None, :], best_matches].sum(axis=1)
+    stake = cost * outcomes.shape[0]
+    return (payouts - stake) / stake
+
+
+class BudgetBacktest:
+    """
+    Monte Carlo backtest of the budget strategy without odds.
+
+    Only the generator's no-odds fallback is backtested: completed jackpots keep
+    no odds history, so the BudgetOptimizer used when odds exist cannot be
+    replayed. For each budget, the doubles/triples shape is the one the fallback
+    picks, and thousands of seeded specifications with random game assignments
+    are drawn. Each is scored against every completed jackpot. The value of a budget
+    is a distribution; the report gives the mean, variance and tail of the ROI.
+    Samples are split into tasks for a process pool.
+    """
+
+    def __init__(self, budgets: List[float], samples: int = 1000, seed: int = 0):
+        if not budgets:
+            raise ValueError("At least one budget is required")
+        if samples < 1:
+            raise ValueError("samples must be positive")
+
+        self.budgets = sorted(set(float(budget) for budget in budgets))
+        self.samples = samples
+        self.seed = seed
+
+    def run(
+        self,
+        history: HistoricalOutcomes,
+        num_games: int = 17,
+        workers: int = 1,
+        executor: Optional[Executor] = None
+    ) -> Dict[str, Any]:
+        """
+        Backtest every budget against the completed jackpots with num_games games.
+
+        Pass an executor to reuse an existing pool; otherwise a short-lived process
+        pool is created when workers > 1, and tasks run in-process with one worker.
+        """
+        outcomes = history.outcomes.get(num_games)
+        if outcomes is None or not len(outcomes):
+            raise ValueError(f"No completed jackpots with {num_games} games to backtest against")
+        prizes = history.prizes[num_games]
+
+        cost_per_bet = CombinationSpecificationGenerator.SPORTPESA_RULES["costPerBet"]
+        started = time.monotonic()
+
+        tasks: List[Tuple[float, Dict[str, int], List[str]]] = []
+        for budget in self.budgets:
+            max_combinations = int(budget // cost_per_bet)
+            if max_combinations < 1:
+                raise ValueError(f"Budget too low. Minimum required: {cost_per_bet} KSh")
+            shape = CombinationSpecificationGenerator.budget_shape(max_combinations, num_games)
+            seeds = [f"{self.seed}:{budget}:{sample}" for sample in range(self.samples)]
+            for start in range(0, self.samples, SAMPLES_PER_TASK):
+                tasks.append((budget, shape, seeds[start:start + SAMPLES_PER_TASK]))
+
+        arguments = [
+            (num_games, shape["doubles"], shape["triples"], seeds, outcomes, prizes, shape["total_combinations"] * cost_per_bet)
+            for _, shape, seeds in tasks
+        ]
+        if executor is not None:
+            results = list(executor.map(backtest_task, *zip(*arguments)))
+        elif workers > 1 and len(arguments) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(arguments)), mp_context=multiprocessing.get_context("spawn")) as pool:
+                results = list(pool.map(backtest_task, *zip(*arguments)))
+        else:
+            results = [backtest_task(*task_arguments) for task_arguments in arguments]
+
+        roi_by_budget: Dict[float, List[np.ndarray]] = {}
+        for (budget, _, _), roi in zip(tasks, results):
+            roi_by_budget.setdefault(budget, []).append(roi)
+
+        report = []
+        for budget in self.budgets:
+            shape = next(task_shape for task_budget, task_shape, _ in tasks if task_budget == budget)
+            report.append(self._summarize(budget, shape, np.concatenate(roi_by_budget[budget]), cost_per_bet))
+
+        logger.info(
+            f"[BudgetBacktest] Scored {len(self.budgets) * self.samples} specifications against {len(outcomes)} jackpots "
+            f"in {time.monotonic() - started:.2f}s"
+        )
+
+        return {
+            "strategy": BACKTEST_STRATEGY,
+            "jackpots": int(len(outcomes)),
+            "num_games": num_games,
+            "samples_per_budget": self.samples,
+            "seed": self.seed,
+            "budgets": report,
+        }
+
+    @staticmethod
+    def _summarize(budget: float, shape: Dict[str, int], roi: np.ndarray, cost_per_bet: float) -> Dict[str, Any]:
+        """Mean, variance and tail of the ROI of one budget's samples."""
+        tail_cutoff = float(np.quantile(roi, TAIL_QUANTILE))
+        return {
+            "budget_ksh": budget,
+            "doubles": shape["doubles"],
+            "triples": shape["triples"],
+            "total_combinations": shape["total_combinations"],
+            "cost_per_jackpot": shape["total_combinations"] * cost_per_bet,
+            "mean_roi": float(roi.mean()),
+            "roi_variance": float(roi.var()),
+            "roi_std": float(roi.std()),
+            "median_roi": float(np.median(roi)),
+            "roi_p05": tail_cutoff,
+            "roi_p95": float(np.quantile(roi, 1 - TAIL_QUANTILE)),
+            "tail_mean_roi": float(roi[roi <= tail_cutoff].mean()),
+            "best_roi": float(roi.max()),
+            "probability_of_profit": float(np.count_nonzero(roi > 0) / len(roi)),
+        }
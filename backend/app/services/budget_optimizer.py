@@ -0,0 +1,166 @@
+from typing import List, Dict, Any, Optional, Callable, Tuple
+from math import log
+import logging
+from app.services.odds_forecast import implied_probabilities, match_count_distribution
+
+logger = logging.getLogger(__name__)
+
+OUTCOMES = ["1", "X", "2"]
+
+
+class BudgetOptimizer:
+    """
+    Choose which games get doubles/triples, and which outcomes to cover, for a budget.
+
+    Every game has a best single, double and triple: its one or two most likely
+    outcomes by implied odds, or all three. One DP over the games finds, for every
+    (doubles, triples) shape at once, the assignment that maximizes the product of
+    per-game coverage probabilities (the chance of covering every result). Each
+    shape that fits the budget and the rules is then scored exactly with the
+    Poisson-binomial tail at the prize levels, and the best shape wins.
+    """
+
+    def __init__(
+        self,
+        games: List[Dict[str, Any]],
+        is_allowed: Callable[[int, int], bool],
+        max_doubles: int,
+        max_triples: int,
+        prize_levels: Optional[List[int]] = None
+    ):
+        self.num_games = len(games)
+        self.is_allowed = is_allowed
+        self.max_doubles = min(max_doubles, self.num_games)
+        self.max_triples = min(max_triples, self.num_games)
+        self.prize_levels = sorted(prize_levels) if prize_levels else [self.num_games]
+
+        # Outcomes of each game ranked by implied probability (ties keep 1/X/2 order)
+        self.ranked_outcomes = []
+        self.coverage = []  # coverage[g][k] = P(result in the top k+1 outcomes)
+        self.games_with_odds = 0
+        for game in games:
+            probabilities = implied_probabilities(game)
+            if probabilities is None:
+                probabilities = {outcome: 1.0 / 3.0 for outcome in OUTCOMES}
+            else:
+                self.games_with_odds += 1
+            ranked = sorted(OUTCOMES, key=lambda outcome: -probabilities[outcome])
+            top = [probabilities[ranked[0]], probabilities[ranked[0]] + probabilities[ranked[1]], 1.0]
+            self.ranked_outcomes.append(ranked)
+            self.coverage.append(top)
+
+    def optimize(self, max_combinations: int) -> Dict[str, Any]:
+        """
+        Best game selections with at most max_combinations tickets.
+
+        Returns the game selections, the chosen shape and the probability of
+        reaching each prize level.
+        """
+        best_assignments = self._best_assignments()
+
+        best: Optional[Tuple[Tuple[float, ...], int, int, int]] = None
+        for (doubles, triples), (_, sizes) in best_assignments.items():
+            combinations = (2 ** doubles) * (3 ** triples)
+            if combinations > max_combinations or not self.is_allowed(doubles, triples):
+                continue
+
+            score = self._tail_probabilities(sizes)
+            # Higher tail probabilities first (lowest prize level first), then fewer tickets
+            candidate = (score, -combinations, doubles, triples)
+            if best is None or candidate > best:
+                best = candidate
+
+        if best is None:
+            doubles, triples = 0, 0
+        else:
+            _, _, doubles, triples = best
+
+        sizes = best_assignments[(doubles, triples)][1]
+        game_selections = {
+            str(game_num): self.ranked_outcomes[game_num - 1][:size]
+            for game_num, size in enumerate(sizes, start=1)
+        }
+        tail = self._tail_probabilities(sizes)
+
+        logger.info(
+            f"[BudgetOptimizer] Chose {doubles} doubles and {triples} triples for {max_combinations} affordable combinations "
+            f"(P(>= {self.prize_levels[0]}) = {tail[0]:.4f})"
+        )
+
+        return {
+            "game_selections": game_selections,
+            "doubles": doubles,
+            "triples": triples,
+            "prize_level_probabilities": {str(level): p for level, p in zip(self.prize_levels, tail)},
+        }
+
+    def frontier(self, cost_per_bet: float) -> List[Dict[str, Any]]:
+        """
+        Pareto frontier of cost against P(>= each prize level), cheapest first.
+
+        Every allowed (doubles, triples) shape is evaluated with its best
+        assignment; a shape is dropped when another one costs no more and is at
+        least as likely to reach every prize level.
+        """
+        points = []
+        for (doubles, triples), (_, sizes) in self._best_assignments().items():
+            if not self.is_allowed(doubles, triples):
+                continue
+            combinations = (2 ** doubles) * (3 ** triples)
+            points.append({
+                "doubles": doubles,
+                "triples": triples,
+                "total_combinations": combinations,
+                "total_cost": combinations * cost_per_bet,
+                "tail": self._tail_probabilities(sizes),
+                "sizes": sizes,
+            })
+
+        points.sort(key=lambda point: (point["total_cost"], tuple(-p for p in point["tail"])))
+
+        frontier = []
+        for point in points:
+            dominated = any(
+                kept["total_cost"] <= point["total_cost"]
+                and all(kept_p >= p for kept_p, p in zip(kept["tail"], point["tail"]))
+                for kept in frontier
+            )
+            if not dominated:
+                frontier.append(point)
+
+        return [
+            {
+                "doubles": point["doubles"],
+                "triples": point["triples"],
+                "total_combinations": point["total_combinations"],
+                "total_cost": point["total_cost"],
+                "prize_level_probabilities": {str(level): p for level, p in zip(self.prize_levels, point["tail"])},
+                "game_selections": {
+                    str(game_num): self.ranked_outcomes[game_num - 1][:size]
+                    for game_num, size in enumerate(point["sizes"], start=1)
+                },
+            }
+            for point in frontier
+        ]
+
+    def _best_assignments(self) -> Dict[Tuple[int, int], Tuple[float, List[int]]]:
+        """Max sum of log coverage and the selection size per game, for every (doubles, triples) shape."""
+        # states[(d, t)] = (log coverage, selection sizes so far)
+        states: Dict[Tuple[int, int], Tuple[float, List[int]]] = {(0, 0): (0.0, [])}
+        for coverage in self.coverage:
+            next_states: Dict[Tuple[int, int], Tuple[float, List[int]]] = {}
+            for (doubles, triples), (value, sizes) in states.items():
+                for size, d, t in ((1, doubles, triples), (2, doubles + 1, triples), (3, doubles, triples + 1)):
+                    if d > self.max_doubles or t > self.max_triples:
+                        continue
+                    new_value = value + log(max(coverage[size - 1], 1e-12))
+                    current = next_states.get((d, t))
+                    if current is None or new_value > current[0]:
+                        next_states[(d, t)] = (new_value, sizes + [size])
+            states = next_states
+        return states
+
+    def _tail_probabilities(self, sizes: List[int]) -> Tuple[float, ...]:
+        """P(best match >= level) for each prize level, given the selection size per game."""
+        distribution = match_count_distribution([coverage[size - 1] for coverage, size in zip(self.coverage, sizes)])
+        return tuple(sum(distribution[level:]) for level in self.prize_levels)
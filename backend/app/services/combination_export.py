@@ -0,0 +1,192 @@
+from typing import List, Dict, Any, Iterator, Iterable, Optional, Tuple
+from collections import deque
+from itertools import islice
+from concurrent.futures import Executor, ProcessPoolExecutor
+import multiprocessing
+import csv
+import io
+import json
+import zlib
+import logging
+from app.services.combination_math import (
+    iter_packed_tickets,
+    pack_predictions,
+    unpack_predictions,
+    count_packed_matches,
+    total_combinations,
+)
+from app.services.specification_analyzer import SpecificationAnalyzer
+from app.services.sharded_enumeration import shard_ranges
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ("csv", "ndjson")
+
+# Rows encoded per chunk handed to the response
+EXPORT_BATCH_SIZE = 2000
+
+# Tickets encoded per worker task when an export is sharded
+EXPORT_SHARD_SIZE = 50000
+
+# Shards encoded ahead of the one being streamed, per worker (bounds memory)
+SHARDS_AHEAD_PER_WORKER = 2
+
+
+def iter_encoded_range(
+    game_options: List[List[str]],
+    actual_results: List[str],
+    match_labels: List[Tuple[Optional[str], float]],
+    export_format: str,
+    start: int,
+    stop: int,
+    batch_size: int
+) -> Iterator[bytes]:
+    """Encoded rows of the tickets with index in [start, stop), one chunk per batch of rows."""
+    num_games = len(game_options)
+    packed_results = pack_predictions(actual_results)
+
+    batch = []
+    for index, packed_ticket in enumerate(iter_packed_tickets(game_options, start, stop), start=start + 1):
+        matches = count_packed_matches(packed_ticket, packed_results)
+        prize_level, payout = match_labels[matches]
+        batch.append((index, unpack_predictions(packed_ticket, num_games), matches, prize_level, payout))
+        if len(batch) >= batch_size:
+            yield encode_rows(batch, export_format)
+            batch = []
+    if batch:
+        yield encode_rows(batch, export_format)
+
+
+def encode_range(*args: Any) -> List[bytes]:
+    """iter_encoded_range collected into a list (runs inside a worker)."""
+    return list(iter_encoded_range(*args))
+
+
+def encode_rows(batch: List[tuple], export_format: str) -> bytes:
+    """Encode (combination number, predictions, matches, prize level, payout) rows."""
+    if export_format == "csv":
+        return encode_csv([
+            [index, *predictions, matches, prize_level or "", payout]
+            for index, predictions, matches, prize_level, payout in batch
+        ])
+    return "".join(
+        json.dumps({
+            "combination_number": index,
+            "predictions": predictions,
+            "matches": matches,
+            "is_winner": prize_level is not None,
+            "prize_level": prize_level,
+            "payout": payout,
+        }) + "\n"
+        for index, predictions, matches, prize_level, payout in batch
+    ).encode("utf-8")
+
+
+def encode_csv(rows: List[List[Any]]) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+class CombinationExporter:
+    """
+    Stream every ticket of a simulation with its matches and payout.
+
+    Tickets are generated lazily from the specification and encoded a batch at a
+    time, so memory use does not depend on the number of combinations and the
+    first chunk is ready as soon as the first batch is encoded. With several
+    workers, large exports are split into contiguous index ranges that are
+    encoded in parallel and streamed in index order; only a few shards per
+    worker are encoded ahead of the client. Pass an executor to reuse an
+    existing pool; otherwise a short-lived process pool is created.
+    """
+
+    def __init__(
+        self,
+        analyzer: SpecificationAnalyzer,
+        export_format: str = "csv",
+        batch_size: int = EXPORT_BATCH_SIZE,
+        workers: int = 1,
+        executor: Optional[Executor] = None,
+        shard_size: int = EXPORT_SHARD_SIZE
+    ):
+        if analyzer.is_portfolio:
+            raise ValueError("Exports are not available for portfolio simulations")
+        if analyzer.reduced_tickets is not None:
+            raise ValueError("Exports are not available for reduced-system simulations")
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format '{export_format}'. Expected one of {EXPORT_FORMATS}")
+
+        self.analyzer = analyzer
+        self.export_format = export_format
+        self.batch_size = max(1, batch_size)
+        self.workers = max(1, workers)
+        self.executor = executor
+        self.shard_size = max(1, shard_size)
+
+    @property
+    def media_type(self) -> str:
+        return "text/csv" if self.export_format == "csv" else "application/x-ndjson"
+
+    @property
+    def filename(self) -> str:
+        return f"simulation-{self.analyzer.simulation_id}-combinations.{self.export_format}"
+
+    def iter_chunks(self) -> Iterator[bytes]:
+        """Yield the encoded export, one batch of rows per chunk."""
+        game_options = self.analyzer._game_options()
+        num_games = self.analyzer.num_games
+        total = total_combinations(game_options)
+
+        # Prize level and payout only depend on the match count
+        match_labels = [
+            (f"{matches}/{num_games}", self.analyzer._calculate_payout(matches))
+            if matches in self.analyzer.prize_levels else (None, 0.0)
+            for matches in range(num_games + 1)
+        ]
+
+        if self.export_format == "csv":
+            yield encode_csv([["combination_number", *[f"game_{game}" for game in range(1, num_games + 1)], "matches", "prize_level", "payout"]])
+
+        arguments = (game_options, self.analyzer.actual_results, match_labels, self.export_format)
+        if total < 2 * self.shard_size or (self.executor is None and self.workers == 1):
+            # Too small to benefit from sharding
+            yield from iter_encoded_range(*arguments, 0, total, self.batch_size)
+        elif self.executor is not None:
+            yield from self._iter_shards(self.executor, arguments, total)
+        else:
+            pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+            try:
+                yield from self._iter_shards(pool, arguments, total)
+            finally:
+                # Also reached when the client disconnects: drop the shards not started yet
+                pool.shutdown(wait=False, cancel_futures=True)
+
+        logger.info(
+            f"[CombinationExporter] Exported {total} combinations "
+            f"for simulation {self.analyzer.simulation_id} as {self.export_format}"
+        )
+
+    def _iter_shards(self, pool: Executor, arguments: tuple, total: int) -> Iterator[bytes]:
+        """Encode index ranges in the pool and yield their chunks in index order."""
+        ranges = iter(shard_ranges(total, -(-total // self.shard_size)))
+        in_flight = deque(
+            pool.submit(encode_range, *arguments, start, stop, self.batch_size)
+            for start, stop in islice(ranges, self.workers * SHARDS_AHEAD_PER_WORKER)
+        )
+        while in_flight:
+            chunks = in_flight.popleft().result()
+            next_range = next(ranges, None)
+            if next_range is not None:
+                in_flight.append(pool.submit(encode_range, *arguments, *next_range, self.batch_size))
+            yield from chunks
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Compress a byte stream into a gzip stream chunk by chunk."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # 16+ writes a gzip header
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
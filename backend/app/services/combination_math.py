@@ -0,0 +1,322 @@
+from typing import List, Dict, Iterator, Optional, Tuple
+from math import prod
+
+# One-hot outcome codes: a ticket packs 3 bits per game into a single integer,
+# so matching a ticket against the packed results is an AND plus a popcount.
+OUTCOME_BITS = {"1": 0b001, "X": 0b010, "2": 0b100}
+BITS_PER_GAME = 3
+_OUTCOMES_BY_BITS = {bits: outcome for outcome, bits in OUTCOME_BITS.items()}
+
+
+def build_game_options(game_selections: Dict[str, List[str]], num_games: int) -> List[List[str]]:
+    """
+    Build the ordered list of selections for each game of a specification.
+
+    Games missing from the specification fall back to a single "1" prediction,
+    matching how combinations have always been generated.
+    """
+    game_options = []
+    for game_num in range(1, num_games + 1):
+        game_key = str(game_num)
+        if game_key in game_selections:
+            game_options.append(game_selections[game_key])
+        else:
+            game_options.append(["1"])  # Fallback
+    return game_options
+
+
+def match_histogram(game_options: List[List[str]], actual_results: List[str]) -> List[int]:
+    """
+    Count the combinations at every match count 0..N without enumerating them.
+
+    Each game contributes the polynomial (misses + hits * x), where hits is 1 when
+    the actual result is one of the game's selections. The coefficient of x^k in
+    the product over all games is the number of combinations with k matches.
+    """
+    histogram = [1]
+    for options, actual in zip(game_options, actual_results):
+        hits = 1 if actual in options else 0
+        misses = len(options) - hits
+        next_histogram = [0] * (len(histogram) + 1)
+        for matches, count in enumerate(histogram):
+            if count:
+                next_histogram[matches] += count * misses
+                next_histogram[matches + 1] += count * hits
+        histogram = next_histogram
+    return histogram
+
+
+def apply_game_result(histogram: List[int], options: List[str], result: str) -> List[int]:
+    """
+    Update a live match histogram when one more game gets its result.
+
+    The histogram counts every ticket of the specification by matches among the
+    games decided so far (it starts as [total, 0, ..., 0]). When the result is one
+    of the game's selections, 1/len(options) of the tickets in each bucket move up
+    one match; the division is exact because every bucket still carries the
+    game's selection count as a factor.
+    """
+    if result not in options:
+        return list(histogram)
+    
+    size = len(options)
+    updated = [0] * len(histogram)
+    for matches, count in enumerate(histogram):
+        if count:
+            moved = count // size
+            updated[matches] += count - moved
+            updated[matches + 1] += moved
+    return updated
+
+
+def _multiply_polynomials(left: List[int], right: List[int]) -> List[int]:
+    product = [0] * (len(left) + len(right) - 1)
+    for i, a in enumerate(left):
+        if a:
+            for j, b in enumerate(right):
+                product[i + j] += a * b
+    return product
+
+
+def single_result_histograms(game_options: List[List[str]], actual_results: List[str]) -> List[Tuple[int, str, List[int]]]:
+    """
+    Match histogram under every single-game change of the actual results.
+
+    Returns (game_index, alternative_result, histogram) for each game and each
+    result other than the actual one, in game order. The per-game factors of the
+    closed form are multiplied once into prefix and suffix products, so the
+    histogram without game k is prefix[k] * suffix[k + 1] and each what-if is
+    that product times game k's factor under the alternative result.
+    """
+    factors = [
+        [len(options) - (1 if actual in options else 0), 1 if actual in options else 0]
+        for options, actual in zip(game_options, actual_results)
+    ]
+    num_games = len(factors)
+    
+    prefix = [[1]]
+    for factor in factors:
+        prefix.append(_multiply_polynomials(prefix[-1], factor))
+    suffix = [[1]] * (num_games + 1)
+    for game_index in range(num_games - 1, -1, -1):
+        suffix[game_index] = _multiply_polynomials(factors[game_index], suffix[game_index + 1])
+    
+    what_ifs = []
+    for game_index, (options, actual) in enumerate(zip(game_options, actual_results)):
+        without_game = _multiply_polynomials(prefix[game_index], suffix[game_index + 1])
+        for alternative in OUTCOME_BITS:
+            if alternative == actual:
+                continue
+            hits = 1 if alternative in options else 0
+            what_ifs.append((game_index, alternative, _multiply_polynomials(without_game, [len(options) - hits, hits])))
+    return what_ifs
+
+
+def pack_predictions(predictions: List[str]) -> int:
+    """Pack a list of 1/X/2 predictions (or actual results) into one integer."""
+    packed = 0
+    for game_index, outcome in enumerate(predictions):
+        packed |= OUTCOME_BITS[outcome] << (game_index * BITS_PER_GAME)
+    return packed
+
+
+def unpack_predictions(packed: int, num_games: int) -> List[str]:
+    """Decode a packed ticket back into its 1/X/2 predictions."""
+    return [
+        _OUTCOMES_BY_BITS[(packed >> (game_index * BITS_PER_GAME)) & 0b111]
+        for game_index in range(num_games)
+    ]
+
+
+def count_packed_matches(packed_ticket: int, packed_results: int) -> int:
+    """Number of games where a packed ticket agrees with the packed results."""
+    return (packed_ticket & packed_results).bit_count()
+
+
+def packed_game_masks(game_options: List[List[str]]) -> List[List[int]]:
+    """Per-game selections as one-hot masks already shifted into their game slot."""
+    return [
+        [OUTCOME_BITS[outcome] << (game_index * BITS_PER_GAME) for outcome in options]
+        for game_index, options in enumerate(game_options)
+    ]
+
+
+def total_combinations(game_options: List[List[str]]) -> int:
+    """Number of tickets in the specification (product of selection counts)."""
+    return prod(len(options) for options in game_options)
+
+
+def unrank_digits(index: int, radices: List[int]) -> List[int]:
+    """
+    Selection digit of every game for the ticket at a given index.
+
+    Ticket indices follow itertools.product order, i.e. a mixed-radix number with
+    one digit per game and the last game varying fastest.
+    """
+    digits = [0] * len(radices)
+    for game_index in range(len(radices) - 1, -1, -1):
+        index, digits[game_index] = divmod(index, radices[game_index])
+    return digits
+
+
+def rank_digits(digits: List[int], radices: List[int]) -> int:
+    """Ticket index of a list of selection digits (inverse of unrank_digits)."""
+    index = 0
+    for digit, radix in zip(digits, radices):
+        index = index * radix + digit
+    return index
+
+
+def unrank_ticket(index: int, game_options: List[List[str]]) -> List[str]:
+    """Predictions of the ticket at a given index, without enumerating the ones before it."""
+    total = total_combinations(game_options)
+    if not 0 <= index < total:
+        raise ValueError(f"Combination index {index} is out of range (0-{total - 1})")
+
+    digits = unrank_digits(index, [len(options) for options in game_options])
+    return [options[digit] for options, digit in zip(game_options, digits)]
+
+
+def rank_ticket(predictions: List[str], game_options: List[List[str]]) -> int:
+    """Index of a ticket within the specification; raises ValueError if it is not part of it."""
+    if len(predictions) != len(game_options):
+        raise ValueError(f"Expected {len(game_options)} predictions, got {len(predictions)}")
+
+    digits = []
+    for game_num, (prediction, options) in enumerate(zip(predictions, game_options), start=1):
+        if prediction not in options:
+            raise ValueError(f"Prediction '{prediction}' for game {game_num} is not among the selections {options}")
+        digits.append(options.index(prediction))
+    return rank_digits(digits, [len(options) for options in game_options])
+
+
+def iter_packed_tickets(
+    game_options: List[List[str]],
+    start: int = 0,
+    stop: Optional[int] = None,
+    block_size: int = 4096
+) -> Iterator[int]:
+    """
+    Yield the tickets with index in [start, stop) as packed integers.
+
+    Tickets come out in the same order as itertools.product over the selections.
+    The trailing games are pre-expanded into a block of at most block_size packed
+    suffixes, so each ticket costs a single OR instead of a per-game loop; only the
+    leading games are unranked, once per block.
+    """
+    masks = packed_game_masks(game_options)
+    
+    # Take as many trailing games as fit in one block
+    split = len(masks)
+    block_combinations = 1
+    while split > 0 and block_combinations * len(masks[split - 1]) <= block_size:
+        split -= 1
+        block_combinations *= len(masks[split])
+    
+    suffixes = [0]
+    for game_masks in masks[split:]:
+        suffixes = [suffix | mask for suffix in suffixes for mask in game_masks]
+    
+    prefix_masks = masks[:split]
+    prefix_radices = [len(game_masks) for game_masks in prefix_masks]
+    block = len(suffixes)
+    stop = total_combinations(game_options) if stop is None else min(stop, total_combinations(game_options))
+    if start >= stop:
+        return
+    
+    first_block, last_block = start // block, (stop - 1) // block
+    for block_index in range(first_block, last_block + 1):
+        digits = unrank_digits(block_index, prefix_radices)
+        prefix = sum(game_masks[digit] for game_masks, digit in zip(prefix_masks, digits))
+        lo = start - block_index * block if block_index == first_block else 0
+        hi = stop - block_index * block if block_index == last_block else block
+        for suffix in suffixes[lo:hi]:
+            yield prefix | suffix
+
+
+def iter_winning_tickets(
+    game_options: List[List[str]],
+    actual_results: List[Optional[str]],
+    min_matches: int
+) -> Iterator[Tuple[int, int]]:
+    """
+    Yield (index, matches) for every ticket with at least min_matches, in index order.
+
+    Depth-first over the games with branch-and-bound: a partial ticket is dropped as
+    soon as its matches plus the games still able to match cannot reach min_matches,
+    so losing subtrees are never expanded.
+    """
+    num_games = len(game_options)
+    
+    # reachable[g] = most matches still possible from game g onwards
+    reachable = [0] * (num_games + 1)
+    for game_index in range(num_games - 1, -1, -1):
+        result = actual_results[game_index]
+        reachable[game_index] = reachable[game_index + 1] + (result is not None and result in game_options[game_index])
+    
+    if reachable[0] < min_matches:
+        return
+    
+    stack = [(0, 0, 0)]
+    while stack:
+        game_index, index, matches = stack.pop()
+        if game_index == num_games:
+            yield index, matches
+            continue
+        
+        options = game_options[game_index]
+        result = actual_results[game_index]
+        radix = len(options)
+        # Push in reverse so tickets come out in ascending index order
+        for digit in range(radix - 1, -1, -1):
+            hit = matches + (options[digit] == result)
+            if hit + reachable[game_index + 1] >= min_matches:
+                stack.append((game_index + 1, index * radix + digit, hit))
+
+
+def portfolio_match_histogram(
+    portfolio_options: List[List[List[str]]],
+    actual_results: List[Optional[str]]
+) -> List[int]:
+    """
+    Match histogram of the distinct tickets covered by several specifications.
+
+    Walks the games once, tracking for each partial ticket the set of
+    specifications that still contain it (a bitmask). Partial tickets with the
+    same alive set share one histogram polynomial, so overlaps are counted
+    exactly once without materializing tickets; a ticket is covered when its
+    alive set is non-empty after the last game.
+    """
+    num_specs = len(portfolio_options)
+    num_games = len(actual_results)
+    if num_specs == 0:
+        return [0] * (num_games + 1)
+    
+    states: Dict[int, List[int]] = {(1 << num_specs) - 1: [1]}
+    for game_index, result in enumerate(actual_results):
+        # Specifications that include each outcome of this game
+        outcome_masks = {outcome: 0 for outcome in OUTCOME_BITS}
+        for spec_index, game_options in enumerate(portfolio_options):
+            for outcome in game_options[game_index]:
+                outcome_masks[outcome] |= 1 << spec_index
+        
+        next_states: Dict[int, List[int]] = {}
+        for alive, histogram in states.items():
+            for outcome, outcome_mask in outcome_masks.items():
+                next_alive = alive & outcome_mask
+                if not next_alive:
+                    continue
+                shift = 1 if outcome == result else 0
+                target = next_states.get(next_alive)
+                if target is None:
+                    target = next_states[next_alive] = [0] * (game_index + 2)
+                for matches, count in enumerate(histogram):
+                    if count:
+                        target[matches + shift] += count
+        states = next_states
+    
+    union = [0] * (num_games + 1)
+    for histogram in states.values():
+        for matches, count in enumerate(histogram):
+            union[matches] += count
+    return union
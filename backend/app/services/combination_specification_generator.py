@@ -1,6 +1,11 @@
 from typing import List, Dict, Any, Optional, Tuple
+import random
 import logging
 from app.config.database import supabase
+from app.services.odds_forecast import forecast_specification
+from app.services.budget_optimizer import BudgetOptimizer
+from app.services.combination_math import build_game_options, portfolio_match_histogram
+from app.services.reduced_system import build_reduced_system
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -20,11 +25,15 @@ class CombinationSpecificationGenerator:
         "costPerBet": 99  # KSh per individual bet
     }
     
+    # Most specifications accepted in one portfolio simulation
+    MAX_PORTFOLIO_SPECIFICATIONS = 50
+    
     def __init__(self, simulation_id: str, jackpot_id: str):
         self.simulation_id = simulation_id
         self.jackpot_id = jackpot_id
         self.games = self._fetch_jackpot_games()
         self.num_games = len(self.games)
+        self._prizes: Optional[Dict[str, Any]] = None
         
         if not self.games:
             raise ValueError(f"No games found for jackpot_id {jackpot_id}")
@@ -44,6 +53,19 @@ class CombinationSpecificationGenerator:
         if max_combinations < 1:
             raise ValueError(f"Budget too low. Minimum required: {self.SPORTPESA_RULES['costPerBet']} KSh")
         
+        # With odds available, pick games and outcomes to maximize the chance of a prize
+        optimizer = self.budget_optimizer(self.games, self._fetch_prize_levels())
+        if optimizer.games_with_odds:
+            optimized = optimizer.optimize(max_combinations)
+            return self.create_specification_from_selections(optimized["game_selections"])
+        
+        best_spec = self.budget_shape(max_combinations, self.num_games)
+        
+        return self._create_specification(best_spec["doubles"], best_spec["triples"])
+    
+    @classmethod
+    def budget_shape(cls, max_combinations: int, num_games: int) -> Dict[str, int]:
+        """Doubles/triples shape with the most combinations that fits max_combinations (used without odds)."""
         # Strategy: Distribute doubles/triples to get close to max_combinations
         # while respecting SportPesa rules
         
@@ -51,11 +73,11 @@ class CombinationSpecificationGenerator:
         best_difference = float('inf')
         
         # Try different combinations of doubles and triples
-        for doubles in range(0, min(self.SPORTPESA_RULES["maxOnlyDoubles"] + 1, self.num_games)):
-            for triples in range(0, min(self.SPORTPESA_RULES["maxOnlyTriples"] + 1, self.num_games - doubles)):
+        for doubles in range(0, min(cls.SPORTPESA_RULES["maxOnlyDoubles"] + 1, num_games)):
+            for triples in range(0, min(cls.SPORTPESA_RULES["maxOnlyTriples"] + 1, num_games - doubles)):
                 
                 # Check if combination is valid under SportPesa rules
-                if not self._validate_combination_rules(doubles, triples):
+                if not cls._validate_combination_rules(doubles, triples):
                     continue
                 
                 # Calculate total combinations for this distribution
@@ -79,7 +101,7 @@ class CombinationSpecificationGenerator:
                 "total_combinations": 1
             }
         
-        return self._create_specification(best_spec["doubles"], best_spec["triples"])
+        return best_spec
     
     def create_specification_from_selections(self, game_selections: Dict[str, List[str]]) -> Dict[str, Any]:
         """
@@ -122,28 +144,43 @@ class CombinationSpecificationGenerator:
             "total_cost": total_cost
         }
     
-    def _create_specification(self, doubles_count: int, triples_count: int) -> Dict[str, Any]:
-        """Create a specification with random game assignments for doubles/triples."""
-        import random
+    def create_reduced_specification(self, game_selections: Dict[str, List[str]], guarantee: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Create a reduced system over explicit game selections.
+        
+        Instead of every combination, the specification holds the smallest set of
+        single tickets found that still has at least `guarantee` correct whenever
+        every result falls inside the selections. The guarantee defaults to the
+        lowest prize level of the jackpot.
+        """
+        full_specification = self.create_specification_from_selections(game_selections)
         
-        # Randomly assign games to have doubles/triples
-        available_games = list(range(1, self.num_games + 1))
-        random.shuffle(available_games)
+        if guarantee is None:
+            prize_levels = self._fetch_prize_levels()
+            guarantee = prize_levels[0] if prize_levels else self.num_games
         
-        double_games = available_games[:doubles_count]
-        triple_games = available_games[doubles_count:doubles_count + triples_count]
+        reduced = build_reduced_system(build_game_options(game_selections, self.num_games), guarantee)
+        total_combinations = len(reduced["tickets"])
         
-        # Create game selections
-        game_selections = {}
-        predictions = ["1", "X", "2"]
+        logger.info(
+            f"[CombinationSpecificationGenerator] Reduced system for jackpot {self.jackpot_id}: {total_combinations} tickets "
+            f"instead of {full_specification['total_combinations']}, guaranteeing {guarantee} correct"
+        )
         
-        for game_num in range(1, self.num_games + 1):
-            if game_num in triple_games:
-                game_selections[str(game_num)] = predictions.copy()  # All three
-            elif game_num in double_games:
-                game_selections[str(game_num)] = random.sample(predictions, 2)  # Two random
-            else:
-                game_selections[str(game_num)] = [random.choice(predictions)]  # One random
+        return {
+            **full_specification,
+            "combination_type": "reduced",
+            "reduced_guarantee": guarantee,
+            "reduced_tickets": reduced["tickets"],
+            "total_combinations": total_combinations,
+            "total_cost": total_combinations * self.SPORTPESA_RULES["costPerBet"]
+        }
+    
+    def _create_specification(self, doubles_count: int, triples_count: int) -> Dict[str, Any]:
+        """Create a specification with random game assignments for doubles/triples."""
+        game_selections = self.random_game_selections(self.num_games, doubles_count, triples_count)
+        double_games = [int(game_num) for game_num, selections in game_selections.items() if len(selections) == 2]
+        triple_games = [int(game_num) for game_num, selections in game_selections.items() if len(selections) == 3]
         
         combination_type = self._determine_combination_type(double_games, triple_games)
         total_combinations = (2 ** doubles_count) * (3 ** triples_count)
@@ -158,14 +195,55 @@ class CombinationSpecificationGenerator:
             "total_cost": total_cost
         }
     
-    def _validate_combination_rules(self, doubles: int, triples: int) -> bool:
+    @staticmethod
+    def random_game_selections(
+        num_games: int,
+        doubles_count: int,
+        triples_count: int,
+        rng: Optional[random.Random] = None
+    ) -> Dict[str, List[str]]:
+        """Randomly assign games to have doubles/triples, and random outcomes to every game."""
+        rng = rng or random
+        
+        available_games = list(range(1, num_games + 1))
+        rng.shuffle(available_games)
+        
+        double_games = available_games[:doubles_count]
+        triple_games = available_games[doubles_count:doubles_count + triples_count]
+        
+        game_selections = {}
+        predictions = ["1", "X", "2"]
+        
+        for game_num in range(1, num_games + 1):
+            if game_num in triple_games:
+                game_selections[str(game_num)] = predictions.copy()  # All three
+            elif game_num in double_games:
+                game_selections[str(game_num)] = rng.sample(predictions, 2)  # Two random
+            else:
+                game_selections[str(game_num)] = [rng.choice(predictions)]  # One random
+        
+        return game_selections
+    
+    @classmethod
+    def budget_optimizer(cls, games: List[Dict[str, Any]], prize_levels: List[int]) -> BudgetOptimizer:
+        """Odds-aware optimizer over the shapes allowed by the SportPesa rules."""
+        return BudgetOptimizer(
+            games,
+            cls._validate_combination_rules,
+            max(cls.SPORTPESA_RULES["maxOnlyDoubles"], cls.SPORTPESA_RULES["maxCombiningDoubles"]),
+            max(cls.SPORTPESA_RULES["maxOnlyTriples"], cls.SPORTPESA_RULES["maxCombiningTriples"]),
+            prize_levels
+        )
+    
+    @classmethod
+    def _validate_combination_rules(cls, doubles: int, triples: int) -> bool:
         """Validate combination against SportPesa rules."""
-        if triples == 0 and doubles > self.SPORTPESA_RULES["maxOnlyDoubles"]:
+        if triples == 0 and doubles > cls.SPORTPESA_RULES["maxOnlyDoubles"]:
             return False
-        if doubles == 0 and triples > self.SPORTPESA_RULES["maxOnlyTriples"]:
+        if doubles == 0 and triples > cls.SPORTPESA_RULES["maxOnlyTriples"]:
             return False
         if doubles > 0 and triples > 0:
-            if doubles > self.SPORTPESA_RULES["maxCombiningDoubles"] or triples > self.SPORTPESA_RULES["maxCombiningTriples"]:
+            if doubles > cls.SPORTPESA_RULES["maxCombiningDoubles"] or triples > cls.SPORTPESA_RULES["maxCombiningTriples"]:
                 return False
         return True
     
@@ -210,19 +288,69 @@ class CombinationSpecificationGenerator:
         else:
             return "single"
     
+    def _fetch_prizes(self) -> Dict[str, Any]:
+        """Prizes from the jackpot metadata, keyed "13/13", "14/14", ... (fetched once)."""
+        if self._prizes is None:
+            response = supabase.table("jackpots").select("metadata").eq("id", self.jackpot_id).single().execute()
+            self._prizes = ((response.data or {}).get("metadata") or {}).get("prizes", {})
+        return self._prizes
+    
+    def _fetch_prize_levels(self) -> List[int]:
+        """Prize levels as match counts, e.g. [13, 14, 15, 16, 17]."""
+        try:
+            return sorted(int(prize_key.split("/")[0]) for prize_key in self._fetch_prizes())
+        except Exception as e:
+            logger.warning(f"[CombinationSpecificationGenerator] Could not read prize levels for jackpot {self.jackpot_id}: {str(e)}")
+            return []
+    
+    def forecast(self, specification: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Odds-implied forecast of the specification's best match count and expected payout."""
+        if specification.get("reduced_tickets") is not None:
+            return None  # The forecast assumes a full system, whose best ticket matches every covered result
+        try:
+            return forecast_specification(
+                specification["game_selections"],
+                self.games,
+                self._fetch_prizes(),
+                specification["total_cost"]
+            )
+        except Exception as e:
+            logger.warning(f"[CombinationSpecificationGenerator] Could not forecast specification for jackpot {self.jackpot_id}: {str(e)}")
+            return None
+    
+    def create_portfolio_specification(self, portfolio_selections: List[Dict[str, List[str]]]) -> Dict[str, Any]:
+        """
+        Create a portfolio of several, possibly overlapping, specifications.
+        
+        Each entry is validated like explicit game selections. The raw size and cost
+        count every ticket of every specification; the deduplicated size counts the
+        distinct tickets, computed without materializing them.
+        """
+        if not 1 <= len(portfolio_selections) <= self.MAX_PORTFOLIO_SPECIFICATIONS:
+            raise ValueError(f"A portfolio must have between 1 and {self.MAX_PORTFOLIO_SPECIFICATIONS} specifications")
+        
+        specifications = [self.create_specification_from_selections(selections) for selections in portfolio_selections]
+        portfolio_options = [build_game_options(spec["game_selections"], self.num_games) for spec in specifications]
+        
+        raw_combinations = sum(spec["total_combinations"] for spec in specifications)
+        distinct_combinations = sum(portfolio_match_histogram(portfolio_options, [None] * self.num_games))
+        
+        return {
+            "specifications": specifications,
+            "combination_type": "portfolio",
+            "double_count": sum(len(spec["double_games"]) for spec in specifications),
+            "triple_count": sum(len(spec["triple_games"]) for spec in specifications),
+            "raw_combinations": raw_combinations,
+            "total_combinations": distinct_combinations,
+            "total_cost": raw_combinations * self.SPORTPESA_RULES["costPerBet"],
+            "deduplicated_cost": distinct_combinations * self.SPORTPESA_RULES["costPerBet"]
+        }
+    
     def save_specification(self, specification: Dict[str, Any]) -> str:
         """Save the specification to the database and update simulation."""
         try:
             # Insert bet specification
-            spec_data = {
-                "simulation_id": self.simulation_id,
-                "game_selections": specification["game_selections"],
-                "combination_type": specification["combination_type"],
-                "double_games": specification["double_games"],
-                "triple_games": specification["triple_games"],
-                "total_combinations": specification["total_combinations"],
-                "total_cost": specification["total_cost"]
-            }
+            spec_data = self._specification_row(specification)
             
             response = supabase.table("bet_specifications").insert(spec_data).execute()
             if not response.data:
@@ -251,4 +379,59 @@ class CombinationSpecificationGenerator:
                 "status": "failed",
                 "error_message": str(e)
             }).eq("id", self.simulation_id).execute()
-            raise 
\ No newline at end of file
+            raise 
+    
+    def save_portfolio(self, portfolio: Dict[str, Any]) -> List[str]:
+        """Save every specification of a portfolio and update the simulation."""
+        try:
+            spec_rows = [
+                self._specification_row(specification, position)
+                for position, specification in enumerate(portfolio["specifications"])
+            ]
+            
+            response = supabase.table("bet_specifications").insert(spec_rows).execute()
+            if not response.data or len(response.data) != len(spec_rows):
+                raise Exception("Failed to insert portfolio bet specifications")
+            
+            sim_update = {
+                "combination_type": portfolio["combination_type"],
+                "double_count": portfolio["double_count"],
+                "triple_count": portfolio["triple_count"],
+                "effective_combinations": portfolio["total_combinations"],
+                "total_cost": portfolio["total_cost"],
+                "status": "completed",
+                "completed_at": datetime.now().isoformat()
+            }
+            
+            supabase.table("simulations").update(sim_update).eq("id", self.simulation_id).execute()
+            
+            logger.info(
+                f"[CombinationSpecificationGenerator] Created portfolio for simulation {self.simulation_id}: "
+                f"{len(spec_rows)} specifications, {portfolio['raw_combinations']} raw / {portfolio['total_combinations']} distinct combinations"
+            )
+            
+            return [row["id"] for row in response.data]
+            
+        except Exception as e:
+            # Mark simulation as failed
+            supabase.table("simulations").update({
+                "status": "failed",
+                "error_message": str(e)
+            }).eq("id", self.simulation_id).execute()
+            raise
+    
+    def _specification_row(self, specification: Dict[str, Any], portfolio_position: int = 0) -> Dict[str, Any]:
+        """bet_specifications row for a specification."""
+        return {
+            "simulation_id": self.simulation_id,
+            "portfolio_position": portfolio_position,
+            "game_selections": specification["game_selections"],
+            "combination_type": specification["combination_type"],
+            "double_games": specification["double_games"],
+            "triple_games": specification["triple_games"],
+            "total_combinations": specification["total_combinations"],
+            "total_cost": specification["total_cost"],
+            "forecast": specification.get("forecast"),
+            "reduced_guarantee": specification.get("reduced_guarantee"),
+            "reduced_tickets": specification.get("reduced_tickets")
+        }
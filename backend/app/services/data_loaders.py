@@ -0,0 +1,116 @@
+from typing import List, Dict, Any, Optional, Tuple
+import asyncio
+import logging
+from app.services.query_paging import fetch_grouped_async
+
+logger = logging.getLogger(__name__)
+
+
+class BatchLoader:
+    """
+    DataLoader-style batched lookup of rows of one table by one column.
+
+    Keys requested with load() in the same event loop turn (for example from
+    asyncio.gather) are collected and resolved with one in_() query, and each
+    key is fetched at most once per loader. With many=True a key resolves to
+    the list of its rows, otherwise to its first row or None.
+    """
+
+    def __init__(
+        self,
+        table: str,
+        key_column: str,
+        columns: str = "*",
+        many: bool = False,
+        order: Optional[str] = None
+    ):
+        self.table = table
+        self.key_column = key_column
+        self.columns = columns
+        self.many = many
+        self.order = order
+        self._futures: Dict[Any, asyncio.Future] = {}
+        self._pending: List[Any] = []
+        self._dispatches: List[asyncio.Task] = []
+
+    async def load(self, key: Any) -> Any:
+        """Row(s) of one key, batched with every other key requested in the same turn."""
+        future = self._futures.get(key)
+        if future is None or future.cancelled():
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._futures[key] = future
+            self._pending.append(key)
+            if len(self._pending) == 1:
+                loop.call_soon(self._schedule_dispatch)
+        return await future
+
+    async def load_many(self, keys: List[Any]) -> List[Any]:
+        """Row(s) of every key, in the order of the keys."""
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def _schedule_dispatch(self) -> None:
+        # Runs after the tasks started in the same turn have queued their keys
+        self._dispatches = [task for task in self._dispatches if not task.done()]
+        self._dispatches.append(asyncio.ensure_future(self._dispatch()))
+
+    async def _dispatch(self) -> None:
+        keys, self._pending = self._pending, []
+        try:
+            rows_by_key = await self._fetch(keys)
+        except Exception as e:
+            logger.error(f"[BatchLoader] Error loading {len(keys)} {self.table} rows: {str(e)}")
+            for key in keys:
+                future = self._futures.pop(key)
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for key in keys:
+            future = self._futures[key]
+            if future.done():
+                continue  # Cancelled by a disconnected client
+            rows = rows_by_key.get(key, [])
+            future.set_result(rows if self.many else (rows[0] if rows else None))
+
+    async def _fetch(self, keys: List[Any]) -> Dict[Any, List[Dict[str, Any]]]:
+        """Rows of many keys grouped by key, one paged in_() query per chunk of keys."""
+        return await fetch_grouped_async(self.table, self.key_column, keys, self.columns, [self.order] if self.order else [])
+
+
+class RequestLoaders:
+    """
+    Batched loaders of one request (see get_loaders in app.api.deps).
+
+    Loaders are created on first use and keyed by table, key column, columns
+    and shape, so every lookup of the same rows within the request shares one
+    batch and one cache.
+    """
+
+    def __init__(self):
+        self._loaders: Dict[Tuple[str, str, str, bool, Optional[str]], BatchLoader] = {}
+
+    def loader(
+        self,
+        table: str,
+        key_column: str = "id",
+        columns: str = "*",
+        many: bool = False,
+        order: Optional[str] = None
+    ) -> BatchLoader:
+        key = (table, key_column, columns, many, order)
+        if key not in self._loaders:
+            self._loaders[key] = BatchLoader(table, key_column, columns, many, order)
+        return self._loaders[key]
+
+    def simulation_results(self, columns: str = "*") -> BatchLoader:
+        """Stored result of each simulation id, or None."""
+        return self.loader("simulation_results", "simulation_id", columns)
+
+    def bet_specifications(self) -> BatchLoader:
+        """Bet specification rows of each simulation id, in portfolio order."""
+        return self.loader("bet_specifications", "simulation_id", many=True, order="portfolio_position")
+
+    def jackpots(self, columns: str = "*") -> BatchLoader:
+        """Jackpot of each id, or None."""
+        return self.loader("jackpots", "id", columns)
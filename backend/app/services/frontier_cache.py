@@ -0,0 +1,163 @@
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import datetime, timezone
+import threading
+import logging
+from app.config.database import supabase
+from app.services.combination_specification_generator import CombinationSpecificationGenerator
+
+logger = logging.getLogger(__name__)
+
+OddsFingerprint = Tuple[Tuple[Any, Optional[float], Optional[float], Optional[float]], ...]
+FrontierFingerprint = Tuple[Tuple[int, ...], OddsFingerprint]
+
+# Jackpots whose frontier is kept; the least recently computed is evicted first
+MAX_CACHED_FRONTIERS = 64
+
+
+def _as_float(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def odds_fingerprint(games: List[Dict[str, Any]]) -> OddsFingerprint:
+    """Order and 1/X/2 odds of every game."""
+    return tuple(sorted(
+        (
+            game.get("game_order") or 0,
+            _as_float(game.get("odds_home")),
+            _as_float(game.get("odds_draw")),
+            _as_float(game.get("odds_away")),
+        )
+        for game in games
+    ))
+
+
+def prize_levels_of(prizes: Dict[str, Any]) -> List[int]:
+    """Match counts of the prize keys ("13/17" -> 13), ascending."""
+    return sorted(int(prize_key.split("/")[0]) for prize_key in prizes)
+
+
+def frontier_fingerprint(games: List[Dict[str, Any]], prize_levels: List[int]) -> FrontierFingerprint:
+    """Prize levels and odds; equal fingerprints mean an unchanged frontier."""
+    return tuple(prize_levels), odds_fingerprint(games)
+
+
+class FrontierCache:
+    """
+    In-process cache of each jackpot's cost-versus-coverage Pareto frontier.
+
+    The frontier depends only on the games' odds and the prize levels, so an
+    entry is kept until the scraper reports different odds or prizes for its
+    jackpot. Frontiers of completed jackpots are not kept, and at most
+    MAX_CACHED_FRONTIERS jackpots are cached. Concurrent misses for the same
+    jackpot compute the frontier once.
+    """
+
+    def __init__(self, max_entries: int = MAX_CACHED_FRONTIERS):
+        self.max_entries = max_entries
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._fingerprints: Dict[str, FrontierFingerprint] = {}
+        self._locks: Dict[str, Tuple[threading.Lock, int]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, jackpot_id: str) -> Dict[str, Any]:
+        """Cached frontier of a jackpot, computing it on a miss."""
+        entry = self._entries.get(jackpot_id)
+        if entry is not None:
+            return entry
+
+        with self._lock:
+            jackpot_lock, waiters = self._locks.get(jackpot_id, (threading.Lock(), 0))
+            self._locks[jackpot_id] = (jackpot_lock, waiters + 1)
+
+        try:
+            with jackpot_lock:
+                entry = self._entries.get(jackpot_id)
+                if entry is None:
+                    games, prizes, status = self._fetch_jackpot(jackpot_id)
+                    entry = self._compute(jackpot_id, games, prizes)
+                    if status != "completed":
+                        self._store(jackpot_id, entry, frontier_fingerprint(games, prize_levels_of(prizes)))
+                return entry
+        finally:
+            # Keep a jackpot's lock only while requests hold or wait on it
+            with self._lock:
+                jackpot_lock, waiters = self._locks[jackpot_id]
+                if waiters == 1:
+                    del self._locks[jackpot_id]
+                else:
+                    self._locks[jackpot_id] = (jackpot_lock, waiters - 1)
+
+    def invalidate_if_changed(self, jackpot_id: str, games: List[Dict[str, Any]], prizes: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Drop the cached frontier when the given games carry different odds, or the
+        given prizes different levels; returns True if dropped.
+        """
+        with self._lock:
+            cached = self._fingerprints.get(jackpot_id)
+            if cached is None:
+                return False
+            prize_levels = list(cached[0]) if prizes is None else prize_levels_of(prizes)
+            if cached == frontier_fingerprint(games, prize_levels):
+                return False
+            self._evict(jackpot_id)
+
+        logger.info(f"[FrontierCache] Odds or prizes changed for jackpot {jackpot_id}, frontier invalidated")
+        return True
+
+    def invalidate(self, jackpot_id: str) -> None:
+        """Drop a jackpot's frontier (for example once the jackpot is completed)."""
+        with self._lock:
+            self._evict(jackpot_id)
+
+    def _store(self, jackpot_id: str, entry: Dict[str, Any], fingerprint: FrontierFingerprint) -> None:
+        with self._lock:
+            self._entries[jackpot_id] = entry
+            self._fingerprints[jackpot_id] = fingerprint
+            while len(self._entries) > self.max_entries:
+                self._evict(next(iter(self._entries)))
+
+    def _evict(self, jackpot_id: str) -> None:
+        # Caller holds self._lock
+        self._entries.pop(jackpot_id, None)
+        self._fingerprints.pop(jackpot_id, None)
+
+    def _fetch_jackpot(self, jackpot_id: str) -> Tuple[List[Dict[str, Any]], Dict[str, Any], Optional[str]]:
+        jackpot_response = supabase.table("jackpots").select("status, metadata").eq("id", jackpot_id).single().execute()
+        if not jackpot_response.data:
+            raise ValueError(f"Jackpot {jackpot_id} not found")
+
+        games_response = (
+            supabase.table("games")
+            .select("game_order, odds_home, odds_draw, odds_away")
+            .eq("jackpot_id", jackpot_id)
+            .order("game_order")
+            .execute()
+        )
+        if not games_response.data:
+            raise ValueError(f"No games found for jackpot_id {jackpot_id}")
+
+        prizes = (jackpot_response.data.get("metadata") or {}).get("prizes", {})
+        return games_response.data, prizes, jackpot_response.data.get("status")
+
+    def _compute(self, jackpot_id: str, games: List[Dict[str, Any]], prizes: Dict[str, Any]) -> Dict[str, Any]:
+        prize_levels = prize_levels_of(prizes)
+        optimizer = CombinationSpecificationGenerator.budget_optimizer(games, prize_levels)
+        points = optimizer.frontier(CombinationSpecificationGenerator.SPORTPESA_RULES["costPerBet"])
+
+        logger.info(f"[FrontierCache] Computed frontier for jackpot {jackpot_id}: {len(points)} points")
+
+        return {
+            "jackpot_id": jackpot_id,
+            "prize_levels": optimizer.prize_levels,
+            "games_with_odds": optimizer.games_with_odds,
+            "num_games": len(games),
+            "points": points,
+            "computed_at": datetime.now(timezone.utc).isoformat(),
+        }
+
+
+# Create a global instance of the frontier cache
+frontier_cache = FrontierCache()
@@ -0,0 +1,247 @@
+from typing import List, Dict, Any, Optional
+import threading
+import time
+import logging
+import numpy as np
+from app.config.database import supabase
+from app.config.settings import HISTORICAL_CACHE_TTL
+from app.services.combination_math import build_game_options, portfolio_match_histogram
+from app.services.specification_analyzer import SpecificationAnalyzer
+from app.services.vectorized_enumeration import OUTCOME_CODES
+from app.services.query_paging import PAGE_SIZE, fetch_grouped
+
+logger = logging.getLogger(__name__)
+
+
+class HistoricalOutcomes:
+    """
+    Outcome vectors of every completed jackpot, grouped by number of games.
+
+    For each game count, `outcomes` is an int8 matrix (jackpots x games) of 1/X/2
+    codes and `prizes` a float matrix (jackpots x match counts) with the prize of
+    each level, 0 where a level pays nothing.
+    """
+
+    def __init__(self, jackpots: List[Dict[str, Any]], games_by_jackpot: Dict[str, List[Dict[str, Any]]]):
+        rows_by_size: Dict[int, List[Dict[str, Any]]] = {}
+        results_by_size: Dict[int, List[List[int]]] = {}
+        for jackpot in jackpots:
+            games = games_by_jackpot.get(jackpot["id"]) or []
+            if not games or any(game.get("score_home") is None or game.get("score_away") is None for game in games):
+                continue  # Only jackpots whose every game has a result
+            rows_by_size.setdefault(len(games), []).append(jackpot)
+            results_by_size.setdefault(len(games), []).append(
+                [OUTCOME_CODES[SpecificationAnalyzer._determine_result(game)] for game in games]
+            )
+
+        self.jackpots = rows_by_size
+        self.outcomes = {size: np.array(results, dtype=np.int8) for size, results in results_by_size.items()}
+        self.prizes = {size: self._prize_matrix(rows, size) for size, rows in rows_by_size.items()}
+
+    @staticmethod
+    def _prize_matrix(jackpots: List[Dict[str, Any]], num_games: int) -> np.ndarray:
+        prizes = np.zeros((len(jackpots), num_games + 1), dtype=np.float64)
+        for row, jackpot in enumerate(jackpots):
+            for prize_key, amount in ((jackpot.get("metadata") or {}).get("prizes") or {}).items():
+                try:
+                    level = int(prize_key.split("/")[0])
+                    if level <= num_games:
+                        prizes[row, level] = float(amount)
+                except (TypeError, ValueError):
+                    continue
+        return prizes
+
+    def jackpot_count(self) -> int:
+        return sum(len(rows) for rows in self.jackpots.values())
+
+
+class HistoricalOutcomesCache:
+    """
+    In-process cache of the historical outcome matrices, refreshed after a TTL.
+
+    Completed jackpots never change, so the only staleness is newly scraped
+    history. Concurrent misses load the history once.
+    """
+
+    def __init__(self, ttl_seconds: int = HISTORICAL_CACHE_TTL):
+        self.ttl_seconds = ttl_seconds
+        self._entry: Optional[HistoricalOutcomes] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> HistoricalOutcomes:
+        """Cached outcome matrices, loading them on a miss or after the TTL."""
+        if self._entry is not None and time.monotonic() - self._loaded_at < self.ttl_seconds:
+            return self._entry
+
+        with self._lock:
+            if self._entry is None or time.monotonic() - self._loaded_at >= self.ttl_seconds:
+                jackpots = self._fetch_completed_jackpots()
+                self._entry = HistoricalOutcomes(jackpots, self._fetch_games([jackpot["id"] for jackpot in jackpots]))
+                self._loaded_at = time.monotonic()
+                logger.info(f"[HistoricalOutcomesCache] Loaded {self._entry.jackpot_count()} completed jackpots")
+            return self._entry
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entry = None
+
+    def _fetch_completed_jackpots(self) -> List[Dict[str, Any]]:
+        """Completed jackpots, oldest first, paging through all rows."""
+        jackpots = []
+        offset = 0
+        while True:
+            response = (
+                supabase.table("jackpots")
+                .select("id, name, completed_at, metadata")
+                .eq("status", "completed")
+                .order("completed_at")
+                .order("id")
+                .range(offset, offset + PAGE_SIZE - 1)
+                .execute()
+            )
+            rows = response.data or []
+            jackpots.extend(rows)
+            if len(rows) < PAGE_SIZE:
+                return jackpots
+            offset += PAGE_SIZE
+
+    def _fetch_games(self, jackpot_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Scores of the games of many jackpots, keyed by jackpot id in game order."""
+        return fetch_grouped("games", "jackpot_id", jackpot_ids, "jackpot_id, game_order, score_home, score_away", order=["game_order"])
+
+
+def replay_match_histograms(game_options: List[List[str]], outcomes: np.ndarray) -> np.ndarray:
+    """
+    Match histogram of a full system against every outcome vector at once.
+
+    The closed-form polynomial product of the analysis, run for all jackpots in
+    parallel: row j of the result counts the tickets at every match count 0..N
+    for outcome vector j.
+    """
+    num_jackpots, num_games = outcomes.shape
+    selected = np.zeros((num_games, 3), dtype=np.int64)
+    for game, options in enumerate(game_options):
+        for outcome in options:
+            selected[game, OUTCOME_CODES[outcome]] = 1
+    sizes = selected.sum(axis=1)
+
+    hits = selected[np.arange(num_games), outcomes]  # jackpots x games, 1 if the result was selected
+    histograms = np.zeros((num_jackpots, num_games + 1), dtype=np.int64)
+    histograms[:, 0] = 1
+    for game in range(num_games):
+        hit = hits[:, game][:, None]
+        shifted = np.zeros_like(histograms)
+        shifted[:, 1:] = histograms[:, :-1] * hit
+        histograms = histograms * (sizes[game] - hit) + shifted
+    return histograms
+
+
+def replay_ticket_histograms(tickets: List[List[str]], outcomes: np.ndarray) -> np.ndarray:
+    """Match histogram of an explicit list of tickets against every outcome vector."""
+    num_games = outcomes.shape[1]
+    codes = np.array([[OUTCOME_CODES[prediction] for prediction in ticket] for ticket in tickets], dtype=np.int8)
+    histograms = np.zeros((outcomes.shape[0], num_games + 1), dtype=np.int64)
+    for row, outcome in enumerate(outcomes):
+        histograms[row] = np.bincount(np.count_nonzero(codes == outcome, axis=1), minlength=num_games + 1)
+    return histograms
+
+
+def replay_specifications(
+    specifications: List[Dict[str, Any]],
+    total_cost: float,
+    history: HistoricalOutcomes,
+    num_games: int
+) -> Dict[str, Any]:
+    """
+    Score a simulation's bet specification rows against every completed jackpot with the same number of games.
+
+    As in the analysis, only the best match of each jackpot is paid. Returns the
+    prize-level hit distribution over history, the hypothetical profit and loss,
+    and the outcome per jackpot.
+    """
+    outcomes = history.outcomes.get(num_games)
+    jackpots = history.jackpots.get(num_games, [])
+    if outcomes is None or not jackpots:
+        raise ValueError(f"No completed jackpots with {num_games} games to replay against")
+
+    reduced_tickets = specifications[0].get("reduced_tickets")
+    if len(specifications) > 1:
+        portfolio_options = [build_game_options(spec["game_selections"], num_games) for spec in specifications]
+        codes_to_outcomes = {code: outcome for outcome, code in OUTCOME_CODES.items()}
+        histograms = np.array([
+            portfolio_match_histogram(portfolio_options, [codes_to_outcomes[int(code)] for code in outcome])
+            for outcome in outcomes
+        ], dtype=np.int64)
+    elif reduced_tickets is not None:
+        histograms = replay_ticket_histograms(reduced_tickets, outcomes)
+    else:
+        histograms = replay_match_histograms(build_game_options(specifications[0]["game_selections"], num_games), outcomes)
+
+    prizes = history.prizes[num_games]
+    match_counts = np.arange(num_games + 1)
+    best_match = np.where(histograms > 0, match_counts, 0).max(axis=1)
+    payouts = prizes[np.arange(len(jackpots)), best_match]
+    net = payouts - float(total_cost)
+
+    prize_levels = sorted({level for level in range(num_games + 1) if prizes[:, level].any()})
+    total_stake = float(total_cost) * len(jackpots)
+
+    return {
+        "jackpots_replayed": len(jackpots),
+        "num_games": num_games,
+        "prize_levels": {
+            str(level): {
+                "jackpots_reached": int(np.count_nonzero(best_match >= level)),
+                "jackpots_best_match": int(np.count_nonzero(best_match == level)),
+                "winning_combinations": int(histograms[:, level].sum()),
+            }
+            for level in prize_levels
+        },
+        "best_match_distribution": np.bincount(best_match, minlength=num_games + 1).tolist(),
+        "total_cost": total_stake,
+        "total_payout": float(payouts.sum()),
+        "net_result": float(net.sum()),
+        "roi": float(net.sum() / total_stake) if total_stake else 0.0,
+        "profitable_jackpots": int(np.count_nonzero(net > 0)),
+        "jackpots": [
+            {
+                "jackpot_id": jackpot["id"],
+                "name": jackpot.get("name"),
+                "completed_at": jackpot.get("completed_at"),
+                "best_match": int(best),
+                "payout": float(payout),
+                "net": float(jackpot_net),
+            }
+            for jackpot, best, payout, jackpot_net in zip(jackpots, best_match, payouts, net)
+        ],
+    }
+
+
+def replay_simulation(simulation_id: str, jackpot_id: str, total_cost: float) -> Dict[str, Any]:
+    """Historical replay of a simulation's specification, for the replay endpoint."""
+    spec_response = (
+        supabase.table("bet_specifications")
+        .select("game_selections, reduced_tickets")
+        .eq("simulation_id", simulation_id)
+        .order("portfolio_position")
+        .execute()
+    )
+    if not spec_response.data:
+        raise ValueError(f"No bet specification found for simulation {simulation_id}")
+
+    games_response = supabase.table("games").select("id").eq("jackpot_id", jackpot_id).execute()
+    if not games_response.data:
+        raise ValueError(f"No games found for jackpot_id {jackpot_id}")
+
+    started = time.monotonic()
+    replay = replay_specifications(spec_response.data, total_cost, historical_outcomes.get(), len(games_response.data))
+    logger.info(
+        f"[HistoricalReplay] Replayed simulation {simulation_id} against {replay['jackpots_replayed']} jackpots "
+        f"in {time.monotonic() - started:.3f}s"
+    )
+    return {"simulation_id": simulation_id, **replay}
+
+
+# Create a global instance of the historical outcomes cache
+historical_outcomes = HistoricalOutcomesCache()
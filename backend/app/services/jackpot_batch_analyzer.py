@@ -0,0 +1,163 @@
+from typing import List, Dict, Any, Optional
+import logging
+from app.config.database import supabase
+from app.services import specification_analyzer
+from app.services.specification_analyzer import SpecificationAnalyzer
+from app.services.query_paging import PAGE_SIZE, IN_FILTER_CHUNK, chunked, fetch_grouped
+
+logger = logging.getLogger(__name__)
+
+# Result rows per bulk upsert
+UPSERT_CHUNK = 500
+
+
+class JackpotBatchAnalyzer:
+    """
+    Analyze every pending simulation of a completed jackpot in one pass.
+
+    The jackpot metadata and games are loaded once and shared by all simulations.
+    Bet specifications are fetched in bulk, every simulation is scored with the
+    closed-form match histogram, and results and failed statuses are written with
+    bulk upserts/updates instead of per-simulation round trips.
+    """
+
+    def __init__(self, jackpot_id: str):
+        self.jackpot_id = jackpot_id
+
+        jackpot_response = supabase.table("jackpots").select("status, metadata").eq("id", jackpot_id).single().execute()
+        if not jackpot_response.data or not jackpot_response.data.get("metadata"):
+            raise ValueError(f"No metadata found for jackpot {jackpot_id}")
+
+        self.jackpot_status = jackpot_response.data.get("status")
+        self.jackpot_metadata = jackpot_response.data["metadata"]
+        self.games = SpecificationAnalyzer.fetch_games_with_results(jackpot_id)
+
+    def analyze_pending(self, simulation_ids: Optional[List[str]] = None, exclude_ids: Optional[List[str]] = None) -> Dict[str, int]:
+        """
+        Analyze the jackpot's completed simulations that have no results yet.
+
+        Args:
+            simulation_ids: Restrict the batch to these simulations (default: all pending)
+            exclude_ids: Simulations another job is analyzing
+
+        Returns:
+            Counts of analyzed, failed and skipped simulations
+        """
+        counts = {"analyzed": 0, "failed": 0, "skipped": 0}
+
+        if self.jackpot_status != "completed":
+            logger.info(f"[JackpotBatchAnalyzer] Jackpot {self.jackpot_id} is not completed, skipping batch analysis")
+            return counts
+        if not self.games:
+            raise ValueError(f"No games with results found for jackpot_id {self.jackpot_id}")
+
+        pending = self._fetch_pending_simulations(simulation_ids)
+        if exclude_ids:
+            excluded = set(exclude_ids)
+            pending = [sim for sim in pending if sim["id"] not in excluded]
+        claimed = self._claim(pending)
+        counts["skipped"] = len(pending) - len(claimed)
+        if not claimed:
+            return counts
+
+        try:
+            specifications = self._fetch_specifications([sim["id"] for sim in claimed])
+
+            summaries = []
+            analyzers = {}
+            failed_ids = []
+            for sim in claimed:
+                simulation_specifications = specifications.get(sim["id"])
+                if not simulation_specifications:
+                    logger.error(f"[JackpotBatchAnalyzer] No bet specification found for simulation {sim['id']}")
+                    failed_ids.append(sim["id"])
+                    continue
+                try:
+                    analyzer = SpecificationAnalyzer.from_rows(sim, simulation_specifications, self.jackpot_metadata, self.games)
+                    summaries.append(analyzer._build_summary(analyzer._match_histogram()))
+                    analyzers[sim["id"]] = analyzer
+                except Exception as e:
+                    logger.error(f"[JackpotBatchAnalyzer] Analysis failed for simulation {sim['id']}: {e}")
+                    failed_ids.append(sim["id"])
+
+            stored_ids = self._store_results(summaries)
+            failed_ids.extend(summary["simulation_id"] for summary in summaries if summary["simulation_id"] not in stored_ids)
+            self._mark_failed(failed_ids)
+
+            logger.info(
+                f"[JackpotBatchAnalyzer] Jackpot {self.jackpot_id}: analyzed {len(stored_ids)} simulations, "
+                f"{len(failed_ids)} failed"
+            )
+
+            # Notifications go out per user, after all results are stored
+            simulations_by_id = {sim["id"]: sim for sim in claimed}
+            for summary in summaries:
+                simulation_id = summary["simulation_id"]
+                if simulation_id in stored_ids:
+                    sim = simulations_by_id[simulation_id]
+                    analyzers[simulation_id]._send_completion_notifications(summary, sim["user_id"], sim["name"])
+
+            counts["analyzed"] = len(stored_ids)
+            counts["failed"] = len(failed_ids)
+            return counts
+        finally:
+            with specification_analyzer._analysis_lock:
+                for sim in claimed:
+                    specification_analyzer._running_analyses.discard(sim["id"])
+
+    def _fetch_pending_simulations(self, simulation_ids: Optional[List[str]]) -> List[Dict[str, Any]]:
+        """Fetch completed simulations of the jackpot that have no results (an anti-join), paging by id."""
+        pending = []
+        last_id = None
+        while True:
+            query = (
+                supabase.table("simulations")
+                .select("id, jackpot_id, user_id, name, total_cost, effective_combinations, simulation_results(id)")
+                .eq("jackpot_id", self.jackpot_id)
+                .eq("status", "completed")
+                .is_("simulation_results", "null")
+            )
+            if simulation_ids is not None:
+                query = query.in_("id", simulation_ids)
+            if last_id is not None:
+                query = query.gt("id", last_id)
+            response = query.order("id").limit(PAGE_SIZE).execute()
+            rows = response.data or []
+            pending.extend(rows)
+            if len(rows) < PAGE_SIZE:
+                return pending
+            last_id = rows[-1]["id"]
+
+    def _fetch_specifications(self, simulation_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Fetch bet specifications for many simulations, keyed by simulation id (in portfolio order)."""
+        # Paged: a chunk of portfolios can hold more rows than one PostgREST response
+        return fetch_grouped("bet_specifications", "simulation_id", simulation_ids, order=["portfolio_position"])
+
+    def _claim(self, simulations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Reserve simulations in the shared running-analysis set, skipping ones already in progress."""
+        claimed = []
+        with specification_analyzer._analysis_lock:
+            for sim in simulations:
+                if sim["id"] not in specification_analyzer._running_analyses:
+                    specification_analyzer._running_analyses.add(sim["id"])
+                    claimed.append(sim)
+        return claimed
+
+    def _store_results(self, summaries: List[Dict[str, Any]]) -> set:
+        """Upsert analysis results in bulk; returns the ids that were stored."""
+        stored_ids = set()
+        for chunk in chunked(summaries, UPSERT_CHUNK):
+            try:
+                response = supabase.table("simulation_results").upsert(chunk, on_conflict="simulation_id").execute()
+                stored_ids.update(row["simulation_id"] for row in response.data or [])
+            except Exception as e:
+                logger.error(f"[JackpotBatchAnalyzer] Error storing results batch: {str(e)}")
+        return stored_ids
+
+    def _mark_failed(self, simulation_ids: List[str]) -> None:
+        """Mark simulations as failed with one update per chunk."""
+        for chunk in chunked(simulation_ids, IN_FILTER_CHUNK):
+            try:
+                supabase.table("simulations").update({"status": "failed"}).in_("id", chunk).execute()
+            except Exception as e:
+                logger.error(f"[JackpotBatchAnalyzer] Error updating simulation statuses: {str(e)}")
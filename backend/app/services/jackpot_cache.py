@@ -0,0 +1,149 @@
+from typing import List, Dict, Any, Optional, Callable, Tuple
+import hashlib
+import json
+import threading
+import time
+import logging
+from fastapi.encoders import jsonable_encoder
+from app.config.database import supabase
+from app.config.settings import JACKPOT_CACHE_TTL
+
+logger = logging.getLogger(__name__)
+
+# Keys of the cached payloads that are not a single jackpot
+LIST_KEY = "list"
+LATEST_KEY = "latest"
+
+# Number of jackpots returned by the list endpoint
+LIST_LIMIT = 5
+
+
+class JackpotPayload:
+    """Serialized JSON body of a jackpot endpoint and its strong ETag."""
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        self.loaded_at = time.monotonic()
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """True when an If-None-Match header names this payload (the client's copy is current)."""
+        if not if_none_match:
+            return False
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or any(tag.removeprefix("W/") == self.etag for tag in tags)
+
+
+class JackpotCache:
+    """
+    In-process cache of the serialized jackpot list, latest jackpot and single jackpots with their games.
+
+    Jackpots and games change only when the scraper writes, which invalidates the
+    cache; a TTL bounds staleness for writes made by other processes. Concurrent
+    misses for the same key fetch once: the first request loads the payload while
+    the others wait on its lock, which is dropped once no request holds it. A load
+    that overlaps an invalidation is returned but not stored.
+    """
+
+    def __init__(self, ttl_seconds: int = JACKPOT_CACHE_TTL):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[str, JackpotPayload] = {}
+        self._locks: Dict[str, Tuple[threading.Lock, int]] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def list_jackpots(self) -> JackpotPayload:
+        return self._get(LIST_KEY, self._fetch_list)
+
+    def latest_jackpot(self) -> JackpotPayload:
+        return self._get(LATEST_KEY, self._fetch_latest)
+
+    def jackpot(self, jackpot_id: str) -> JackpotPayload:
+        return self._get(jackpot_id, lambda: self._fetch_jackpot(jackpot_id))
+
+    def invalidate(self, jackpot_id: Optional[str] = None) -> None:
+        """Drop a jackpot's payload and the list and latest payloads that may contain it (everything if no id)."""
+        with self._lock:
+            self._generation += 1
+            if jackpot_id is None:
+                self._entries.clear()
+            else:
+                for key in (LIST_KEY, LATEST_KEY, jackpot_id):
+                    self._entries.pop(key, None)
+
+        logger.info(f"[JackpotCache] Invalidated {'all jackpots' if jackpot_id is None else f'jackpot {jackpot_id}'}")
+
+    def _get(self, key: str, fetch: Callable[[], Any]) -> JackpotPayload:
+        entry = self._fresh(key)
+        if entry is not None:
+            return entry
+
+        with self._lock:
+            key_lock, waiters = self._locks.get(key, (threading.Lock(), 0))
+            self._locks[key] = (key_lock, waiters + 1)
+
+        try:
+            with key_lock:
+                entry = self._fresh(key)
+                if entry is not None:
+                    return entry
+
+                with self._lock:
+                    generation = self._generation
+                entry = JackpotPayload(self._serialize(fetch()))
+                with self._lock:
+                    if generation == self._generation:
+                        self._entries[key] = entry
+                return entry
+        finally:
+            # Keep a key's lock only while requests hold or wait on it (ids that 404 leave nothing behind)
+            with self._lock:
+                key_lock, waiters = self._locks[key]
+                if waiters == 1:
+                    del self._locks[key]
+                else:
+                    self._locks[key] = (key_lock, waiters - 1)
+
+    def _fresh(self, key: str) -> Optional[JackpotPayload]:
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry.loaded_at < self.ttl_seconds:
+            return entry
+        return None
+
+    @staticmethod
+    def _serialize(payload: Any) -> bytes:
+        # Same encoding as FastAPI's JSONResponse
+        return json.dumps(jsonable_encoder(payload), ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+    @staticmethod
+    def _fetch_list() -> List[Dict[str, Any]]:
+        response = supabase.table("jackpots").select("*").order("completed_at", desc=True).limit(LIST_LIMIT).execute()
+        return response.data or []
+
+    def _fetch_latest(self) -> Dict[str, Any]:
+        response = supabase.table("jackpots").select("*").order("completed_at", desc=True).limit(1).execute()
+        if not response.data:
+            raise ValueError("No jackpots found")
+        return self._with_games(response.data[0])
+
+    def _fetch_jackpot(self, jackpot_id: str) -> Dict[str, Any]:
+        response = supabase.table("jackpots").select("*").eq("id", jackpot_id).limit(1).execute()
+        if not response.data:
+            raise ValueError("Jackpot not found")
+        return self._with_games(response.data[0])
+
+    @staticmethod
+    def _with_games(jackpot: Dict[str, Any]) -> Dict[str, Any]:
+        games_response = (
+            supabase.table("games")
+            .select("*")
+            .eq("jackpot_id", jackpot["id"])
+            .order("game_order")
+            .execute()
+        )
+        jackpot["games"] = games_response.data or []
+        return jackpot
+
+
+# Create a global instance of the jackpot cache
+jackpot_cache = JackpotCache()
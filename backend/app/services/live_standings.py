@@ -0,0 +1,217 @@
+from typing import List, Dict, Any, Optional, Tuple, Callable
+from datetime import datetime, timezone
+import logging
+from app.config.database import supabase
+from app.services.combination_math import (
+    build_game_options,
+    match_histogram,
+    apply_game_result,
+    portfolio_match_histogram,
+)
+from app.services.reduced_system import ticket_match_histogram
+from app.services.specification_analyzer import SpecificationAnalyzer
+from app.services.query_paging import PAGE_SIZE, chunked, fetch_grouped
+
+logger = logging.getLogger(__name__)
+
+# Rows per bulk upsert
+UPSERT_CHUNK = 500
+
+
+def build_live_state(
+    game_options: List[List[str]],
+    decided_results: Dict[str, str],
+    previous: Optional[Dict[str, Any]] = None,
+    rebuild: Optional[Callable[[List[Optional[str]]], List[int]]] = None
+) -> Dict[str, Any]:
+    """
+    Live standing of one specification given the results decided so far.
+
+    When a previous state is passed, only newly decided games are applied to its
+    histogram (one small polynomial update per game). If a result already applied
+    has changed (e.g. a score correction) the histogram is rebuilt from scratch.
+    Portfolios and reduced systems are not a single product of selections, so
+    their histogram is always rebuilt with the given function.
+
+    Args:
+        game_options: Selections for each game in order
+        decided_results: 1/X/2 result keyed by game number ("1".."N")
+        previous: Earlier state from this function, if any
+        rebuild: Histogram of the results so far, for portfolios and reduced systems
+    """
+    num_games = len(game_options)
+    previous_results = (previous or {}).get("decided_results") or {}
+    results = [decided_results.get(str(game)) for game in range(1, num_games + 1)]
+
+    if rebuild is not None:
+        histogram = rebuild(results)
+    elif previous and all(decided_results.get(game) == result for game, result in previous_results.items()):
+        histogram = previous["histogram"]
+        for game, result in decided_results.items():
+            if game not in previous_results:
+                histogram = apply_game_result(histogram, game_options[int(game) - 1], result)
+    else:
+        histogram = match_histogram(game_options, results)
+
+    reached = [matches for matches, count in enumerate(histogram) if count]
+    matches_so_far = max(reached, default=0)
+    games_remaining = num_games - len(decided_results)
+
+    return {
+        "decided_results": dict(decided_results),
+        "histogram": histogram,
+        "games_decided": len(decided_results),
+        "matches_so_far": matches_so_far,
+        "worst_ticket_matches": min(reached, default=0),  # Current score of the worst ticket, not a floor
+        "best_achievable": matches_so_far + games_remaining,
+    }
+
+
+def live_state_for_specifications(
+    specifications: List[Dict[str, Any]],
+    num_games: int,
+    decided_results: Dict[str, str],
+    previous: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Live standing of a simulation from its bet specification rows (in portfolio order)."""
+    portfolio_options = [build_game_options(spec["game_selections"], num_games) for spec in specifications]
+    reduced_tickets = specifications[0].get("reduced_tickets")
+
+    if len(portfolio_options) > 1:
+        rebuild = lambda results: portfolio_match_histogram(portfolio_options, results)
+    elif reduced_tickets is not None:
+        rebuild = lambda results: ticket_match_histogram(reduced_tickets, results)
+    else:
+        rebuild = None
+    return build_live_state(portfolio_options[0], decided_results, previous, rebuild)
+
+
+class LiveStandingsTracker:
+    """
+    Keep per-simulation live standings for a jackpot while its games are played.
+
+    Each scrape applies newly recorded scores to the stored state of every
+    simulation of the jackpot instead of re-analyzing them, and writes the
+    states back with bulk upserts. Polling clients then read one row.
+    """
+
+    def __init__(self, jackpot_id: str):
+        self.jackpot_id = jackpot_id
+
+    def refresh(self) -> int:
+        """Apply the jackpot's current results to every simulation; returns the number of states written."""
+        num_games, decided_results = self.fetch_decided_results(self.jackpot_id)
+        if not decided_results:
+            return 0
+
+        simulations = self._fetch_simulations()
+        if not simulations:
+            return 0
+
+        simulation_ids = [sim["id"] for sim in simulations]
+        specifications = self._fetch_specifications(simulation_ids)
+        previous_states = {
+            simulation_id: rows[0]
+            for simulation_id, rows in fetch_grouped("simulation_live_standings", "simulation_id", simulation_ids).items()
+        }
+
+        rows = []
+        now = datetime.now(timezone.utc).isoformat()
+        for simulation_id in simulation_ids:
+            simulation_specifications = specifications.get(simulation_id)
+            if not simulation_specifications:
+                continue
+            previous = previous_states.get(simulation_id)
+            if previous and previous.get("decided_results") == decided_results:
+                continue  # Nothing new for this simulation
+
+            state = live_state_for_specifications(simulation_specifications, num_games, decided_results, previous)
+            rows.append({
+                "simulation_id": simulation_id,
+                "jackpot_id": self.jackpot_id,
+                **state,
+                "updated_at": now,
+            })
+
+        for chunk in chunked(rows, UPSERT_CHUNK):
+            supabase.table("simulation_live_standings").upsert(chunk, on_conflict="simulation_id").execute()
+
+        logger.info(f"[LiveStandingsTracker] Updated {len(rows)} live standings for jackpot {self.jackpot_id}")
+        return len(rows)
+
+    @staticmethod
+    def fetch_decided_results(jackpot_id: str) -> Tuple[int, Dict[str, str]]:
+        """Number of games and the results played so far, keyed by game number in game order."""
+        response = (
+            supabase.table("games")
+            .select("id, score_home, score_away")
+            .eq("jackpot_id", jackpot_id)
+            .order("game_order")
+            .execute()
+        )
+        decided = {}
+        for game_num, game in enumerate(response.data or [], start=1):
+            if game.get("score_home") is not None and game.get("score_away") is not None:
+                decided[str(game_num)] = SpecificationAnalyzer._determine_result(game)
+        return len(response.data or []), decided
+
+    def _fetch_simulations(self) -> List[Dict[str, Any]]:
+        """Simulations of the jackpot with a generated specification, paging through all rows."""
+        simulations = []
+        offset = 0
+        while True:
+            response = (
+                supabase.table("simulations")
+                .select("id")
+                .eq("jackpot_id", self.jackpot_id)
+                .eq("status", "completed")
+                .order("id")
+                .range(offset, offset + PAGE_SIZE - 1)
+                .execute()
+            )
+            rows = response.data or []
+            simulations.extend(rows)
+            if len(rows) < PAGE_SIZE:
+                return simulations
+            offset += PAGE_SIZE
+
+    def _fetch_specifications(self, simulation_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Bet specifications of many simulations, keyed by simulation id (in portfolio order)."""
+        return fetch_grouped(
+            "bet_specifications",
+            "simulation_id",
+            simulation_ids,
+            "simulation_id, game_selections, portfolio_position, reduced_tickets",
+            order=["portfolio_position"],
+        )
+
+
+def get_live_standing(simulation_id: str, jackpot_id: str) -> Dict[str, Any]:
+    """
+    Live standing of one simulation for the tracker endpoint.
+
+    Reads the stored state; if the tracker has not produced one yet, it is
+    computed on the fly from the specification and the results so far.
+    """
+    response = supabase.table("simulation_live_standings").select("*").eq("simulation_id", simulation_id).execute()
+    if response.data:
+        return response.data[0]
+
+    spec_response = (
+        supabase.table("bet_specifications")
+        .select("game_selections, reduced_tickets")
+        .eq("simulation_id", simulation_id)
+        .order("portfolio_position")
+        .execute()
+    )
+    if not spec_response.data:
+        raise ValueError(f"No bet specification found for simulation {simulation_id}")
+
+    num_games, decided_results = LiveStandingsTracker.fetch_decided_results(jackpot_id)
+
+    return {
+        "simulation_id": simulation_id,
+        "jackpot_id": jackpot_id,
+        **live_state_for_specifications(spec_response.data, num_games, decided_results),
+        "updated_at": None,
+    }
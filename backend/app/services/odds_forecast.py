@@ -0,0 +1,110 @@
+from typing import List, Dict, Any, Optional
+import logging
+from app.services.combination_math import build_game_options
+
+logger = logging.getLogger(__name__)
+
+OUTCOME_ODDS_FIELDS = {"1": "odds_home", "X": "odds_draw", "2": "odds_away"}
+
+
+def implied_probabilities(game: Dict[str, Any]) -> Optional[Dict[str, float]]:
+    """
+    Outcome probabilities implied by a game's 1/X/2 odds, with the bookmaker margin removed.
+
+    The inverse odds sum to more than 1 (the overround); they are scaled down
+    proportionally. Returns None when any of the three odds is missing or invalid.
+    """
+    inverse = {}
+    for outcome, field in OUTCOME_ODDS_FIELDS.items():
+        try:
+            odds = float(game.get(field))
+        except (TypeError, ValueError):
+            return None
+        if not odds > 1.0:
+            return None
+        inverse[outcome] = 1.0 / odds
+
+    overround = sum(inverse.values())
+    return {outcome: value / overround for outcome, value in inverse.items()}
+
+
+def match_count_distribution(hit_probabilities: List[float]) -> List[float]:
+    """
+    Exact distribution of the number of hits over independent games (Poisson binomial).
+
+    One DP step per game: distribution[k] is the probability of k hits among the
+    games processed so far.
+    """
+    distribution = [1.0]
+    for p in hit_probabilities:
+        next_distribution = [0.0] * (len(distribution) + 1)
+        for hits, probability in enumerate(distribution):
+            next_distribution[hits] += probability * (1.0 - p)
+            next_distribution[hits + 1] += probability * p
+        distribution = next_distribution
+    return distribution
+
+
+def forecast_specification(
+    game_selections: Dict[str, List[str]],
+    games: List[Dict[str, Any]],
+    prizes: Optional[Dict[str, Any]] = None,
+    total_cost: float = 0.0
+) -> Dict[str, Any]:
+    """
+    Forecast the best match count of a specification before any result is known.
+
+    A full system always contains the ticket that picks the actual result on every
+    game where it was selected, so the best match count is the number of games whose
+    result falls inside the selections. With odds-implied probabilities per game
+    this is a Poisson-binomial variable; the cost is O(games^2) whatever the
+    number of combinations. Games without usable odds count as 1/3 per outcome.
+
+    Args:
+        game_selections: Selections keyed by game number ("1".."N")
+        games: The jackpot's games in game order, with odds columns
+        prizes: Jackpot prizes keyed "13/13", "14/14", ... (optional)
+        total_cost: Stake of the specification, for the expected net result
+    """
+    game_options = build_game_options(game_selections, len(games))
+
+    hit_probabilities = []
+    games_without_odds = 0
+    for game, options in zip(games, game_options):
+        probabilities = implied_probabilities(game)
+        if probabilities is None:
+            games_without_odds += 1
+            hit_probabilities.append(len(options) / 3.0)
+        else:
+            hit_probabilities.append(min(1.0, sum(probabilities[outcome] for outcome in options)))
+
+    distribution = match_count_distribution(hit_probabilities)
+
+    # P(best >= k) for every k, accumulated from the top
+    at_least = [0.0] * (len(distribution) + 1)
+    for matches in range(len(distribution) - 1, -1, -1):
+        at_least[matches] = at_least[matches + 1] + distribution[matches]
+
+    prize_level_probabilities = {}
+    expected_payout = 0.0
+    for prize_key, amount in (prizes or {}).items():
+        level = int(prize_key.split("/")[0])
+        if level >= len(distribution):
+            continue
+        prize_level_probabilities[str(level)] = min(1.0, at_least[level])
+        try:
+            # Only the best match is paid, as in the analysis
+            expected_payout += distribution[level] * float(amount)
+        except (TypeError, ValueError):
+            pass
+
+    return {
+        "method": "odds_implied",
+        "game_hit_probabilities": hit_probabilities,
+        "best_match_distribution": distribution,
+        "expected_best_match": sum(hit_probabilities),
+        "prize_level_probabilities": prize_level_probabilities,
+        "expected_payout": expected_payout,
+        "expected_net": expected_payout - float(total_cost or 0.0),
+        "games_without_odds": games_without_odds,
+    }
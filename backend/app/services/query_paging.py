@@ -0,0 +1,71 @@
+from typing import List, Dict, Any, Sequence
+from app.config.database import supabase, async_supabase
+
+# Rows per PostgREST page (the server's max-rows) and ids per in_() filter (keeps request URLs short)
+PAGE_SIZE = 1000
+IN_FILTER_CHUNK = 200
+
+
+def chunked(items: List[Any], size: int) -> List[List[Any]]:
+    """Consecutive slices of at most size items."""
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _grouped_query(client: Any, table: str, key_column: str, chunk: List[Any], columns: str, order: Sequence[str]) -> Any:
+    if columns != "*" and key_column not in (column.strip() for column in columns.split(",")):
+        columns = f"{key_column}, {columns}"
+    query = client.table(table).select(columns).in_(key_column, chunk).order(key_column)
+    for column in order:
+        query = query.order(column)
+    return query
+
+
+def fetch_grouped(
+    table: str,
+    key_column: str,
+    keys: List[Any],
+    columns: str = "*",
+    order: Sequence[str] = ()
+) -> Dict[Any, List[Dict[str, Any]]]:
+    """
+    Rows whose key_column is one of keys, grouped by key.
+
+    One in_() query per chunk of keys, paged with range() until a short page, so
+    no result is cut off at PostgREST's max-rows. Rows are sorted by key_column
+    and then by order, which keeps each key's rows together and in that order;
+    key_column plus order should identify a row so that pages do not overlap.
+    """
+    rows_by_key: Dict[Any, List[Dict[str, Any]]] = {}
+    for chunk in chunked(keys, IN_FILTER_CHUNK):
+        offset = 0
+        while True:
+            query = _grouped_query(supabase, table, key_column, chunk, columns, order)
+            rows = query.range(offset, offset + PAGE_SIZE - 1).execute().data or []
+            for row in rows:
+                rows_by_key.setdefault(row[key_column], []).append(row)
+            if len(rows) < PAGE_SIZE:
+                break
+            offset += PAGE_SIZE
+    return rows_by_key
+
+
+async def fetch_grouped_async(
+    table: str,
+    key_column: str,
+    keys: List[Any],
+    columns: str = "*",
+    order: Sequence[str] = ()
+) -> Dict[Any, List[Dict[str, Any]]]:
+    """fetch_grouped with the async client, for the API routes."""
+    rows_by_key: Dict[Any, List[Dict[str, Any]]] = {}
+    for chunk in chunked(keys, IN_FILTER_CHUNK):
+        offset = 0
+        while True:
+            query = _grouped_query(async_supabase, table, key_column, chunk, columns, order)
+            rows = (await query.range(offset, offset + PAGE_SIZE - 1).execute()).data or []
+            for row in rows:
+                rows_by_key.setdefault(row[key_column], []).append(row)
+            if len(rows) < PAGE_SIZE:
+                break
+            offset += PAGE_SIZE
+    return rows_by_key
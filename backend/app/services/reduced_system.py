@@ -0,0 +1,186 @@
+from typing import List, Dict, Any, Optional
+from itertools import combinations, product
+from math import prod
+import time
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Wall-clock budget for the randomized restarts after the first greedy pass
+DEFAULT_TIME_BUDGET = 2.0
+MAX_RESTARTS = 16
+
+# Tickets scored for each greedy step
+CANDIDATES_PER_STEP = 32
+
+
+class CoveringDesign:
+    """
+    Covering code over the tickets of a full system (a reduced system).
+
+    The outcome space is every ticket of the game selections. Single games are
+    fixed, so a ticket has at least k correct against an outcome of the space
+    exactly when the two differ on at most radius = num_games - k of the
+    doubles/triples. The design is a set of tickets whose Hamming balls of that
+    radius cover the whole space.
+
+    Points are addressed by their mixed-radix index over the doubles/triples
+    (last game fastest, as in the full system), and coverage is tracked as
+    per-point counters in a NumPy array. Balls are the point's digits shifted by
+    a precomputed table of error patterns, so a ball is one vectorized step. A
+    greedy pass picks tickets that cover the most uncovered points, then redundant
+    tickets (whose every point is covered by another ticket) are pruned. Randomized point
+    orders are retried within a time budget and the smallest design is kept.
+    """
+
+    def __init__(self, game_options: List[List[str]], guarantee: int):
+        self.game_options = game_options
+        self.num_games = len(game_options)
+        if not 0 <= guarantee <= self.num_games:
+            raise ValueError(f"Guarantee must be between 0 and {self.num_games} correct")
+
+        self.guarantee = guarantee
+        self.free_games = [game for game, options in enumerate(game_options) if len(options) > 1]
+        self.radices = [len(game_options[game]) for game in self.free_games]
+        self.radius = self.num_games - guarantee
+        self.total_points = prod(self.radices)
+
+        # Index stride of each free game: the last one changes on every point
+        self.strides = [1] * len(self.radices)
+        for position in range(len(self.radices) - 2, -1, -1):
+            self.strides[position] = self.strides[position + 1] * self.radices[position + 1]
+
+    def ball_size(self) -> int:
+        """Number of points within the radius of any ticket (the same for every ticket)."""
+        # Polynomial product: each free game contributes 1 + (radix - 1) * x
+        coefficients = [1]
+        for radix in self.radices:
+            coefficients = [
+                (coefficients[j] if j < len(coefficients) else 0) + (radix - 1) * (coefficients[j - 1] if j else 0)
+                for j in range(len(coefficients) + 1)
+            ]
+        return sum(coefficients[:self.radius + 1])
+
+    def build(self, time_budget: float = DEFAULT_TIME_BUDGET, seed: Optional[int] = 0) -> List[int]:
+        """Point indices of the smallest design found, in increasing order."""
+        if self.radius >= len(self.radices):
+            return [0]  # One ticket is within the radius of every point
+        if self.radius == 0:
+            return list(range(self.total_points))  # No reduction: every ticket is needed
+
+        started = time.monotonic()
+        rng = np.random.default_rng(seed)
+        self._radices = np.array(self.radices, dtype=np.int64)
+        self._strides = np.array(self.strides, dtype=np.int64)
+        self._error_patterns = self._build_error_patterns()
+
+        best = self._greedy(np.arange(self.total_points), rng)
+        for _ in range(MAX_RESTARTS):
+            if time.monotonic() - started >= time_budget:
+                break
+            design = self._greedy(rng.permutation(self.total_points), rng)
+            if len(design) < len(best):
+                best = design
+
+        logger.info(
+            f"[CoveringDesign] {len(best)} tickets cover {self.total_points} combinations with >= {self.guarantee} correct "
+            f"(sphere bound {-(-self.total_points // self.ball_size())})"
+        )
+        return sorted(best)
+
+    def tickets(self, design: List[int]) -> List[List[str]]:
+        """Predictions of every ticket of a design."""
+        tickets = []
+        for point in design:
+            predictions = [options[0] for options in self.game_options]
+            for game, stride, radix in zip(self.free_games, self.strides, self.radices):
+                predictions[game] = self.game_options[game][(point // stride) % radix]
+            tickets.append(predictions)
+        return tickets
+
+    def _greedy(self, order: np.ndarray, rng: np.random.Generator) -> List[int]:
+        """
+        Greedy cover led by the first uncovered point in the given order.
+
+        Every ticket within the radius of that point covers it; a sample of them
+        is scored by how many uncovered points its ball adds and the best one is
+        taken. Redundant tickets are pruned afterwards.
+        """
+        coverage = np.zeros(self.total_points, dtype=np.int32)
+        design = []
+        balls = []
+        position = 0
+        while True:
+            while position < len(order) and coverage[order[position]]:
+                position += 1
+            if position == len(order):
+                break
+
+            neighbours = self._balls(np.array([order[position]]))[0]
+            if len(neighbours) > CANDIDATES_PER_STEP:
+                neighbours = np.concatenate(([neighbours[0]], rng.choice(neighbours[1:], CANDIDATES_PER_STEP - 1, replace=False)))
+            candidate_balls = self._balls(neighbours)
+            best = int(np.argmax((coverage[candidate_balls] == 0).sum(axis=1)))
+
+            ball = candidate_balls[best]
+            coverage[ball] += 1
+            design.append(int(neighbours[best]))
+            balls.append(ball)
+
+        # Latest tickets add the fewest new points, so try to drop them first
+        kept = []
+        for index in range(len(design) - 1, -1, -1):
+            ball = balls[index]
+            if coverage[ball].min() >= 2:
+                coverage[ball] -= 1
+            else:
+                kept.append(design[index])
+        return kept
+
+    def _balls(self, points: np.ndarray) -> np.ndarray:
+        """Indices of every point within the radius of each given point, one row per point (centre first)."""
+        digits = (points[:, None] // self._strides) % self._radices
+        shifted = (digits[:, None, :] + self._error_patterns[None, :, :]) % self._radices
+        return shifted @ self._strides
+
+    def _build_error_patterns(self) -> np.ndarray:
+        """Digit shifts (mod each radix) changing at most radius free games, the zero shift first."""
+        patterns = [[0] * len(self.radices)]
+        for distance in range(1, self.radius + 1):
+            for positions in combinations(range(len(self.radices)), distance):
+                for shifts in product(*(range(1, self.radices[p]) for p in positions)):
+                    pattern = [0] * len(self.radices)
+                    for p, shift in zip(positions, shifts):
+                        pattern[p] = shift
+                    patterns.append(pattern)
+        return np.array(patterns, dtype=np.int64)
+
+
+def build_reduced_system(
+    game_options: List[List[str]],
+    guarantee: int,
+    time_budget: float = DEFAULT_TIME_BUDGET
+) -> Dict[str, Any]:
+    """
+    Reduced system for the selections that guarantees `guarantee` correct.
+
+    Returns the tickets and how they compare with the full system.
+    """
+    design = CoveringDesign(game_options, guarantee)
+    tickets = design.tickets(design.build(time_budget))
+    return {
+        "guarantee": guarantee,
+        "tickets": tickets,
+        "full_combinations": design.total_points,
+        "sphere_bound": -(-design.total_points // design.ball_size()),
+    }
+
+
+def ticket_match_histogram(tickets: List[List[str]], actual_results: List[Optional[str]]) -> List[int]:
+    """Number of tickets at every match count 0..N for an explicit list of tickets."""
+    num_games = len(actual_results)
+    histogram = [0] * (num_games + 1)
+    for ticket in tickets:
+        histogram[sum(1 for prediction, result in zip(ticket, actual_results) if prediction == result)] += 1
+    return histogram
@@ -0,0 +1,91 @@
+from typing import List, Dict, Any
+import logging
+from app.config.database import supabase
+from app.services.specification_analyzer import SpecificationAnalyzer
+from app.services.query_paging import PAGE_SIZE, chunked, fetch_grouped
+
+logger = logging.getLogger(__name__)
+
+# Rows per bulk upsert
+UPSERT_CHUNK = 500
+
+
+class JackpotRepricer:
+    """
+    Recompute payouts of every analyzed simulation of a jackpot after its prizes change.
+
+    Results store the match histogram of each simulation, and payouts, net loss
+    and the prize breakdown depend only on that histogram, the prizes and the
+    cost. Repricing reads the stored results in bulk, recomputes those fields
+    and writes them back with bulk upserts. Nothing is enumerated and no
+    specification is fetched.
+    """
+
+    def __init__(self, jackpot_id: str):
+        self.jackpot_id = jackpot_id
+
+        jackpot_response = supabase.table("jackpots").select("metadata").eq("id", jackpot_id).single().execute()
+        if not jackpot_response.data or not jackpot_response.data.get("metadata"):
+            raise ValueError(f"No metadata found for jackpot {jackpot_id}")
+
+        self.jackpot_metadata = jackpot_response.data["metadata"]
+
+    def reprice(self) -> Dict[str, int]:
+        """Reprice the jackpot's stored results; returns counts of repriced, skipped and failed simulations."""
+        counts = {"repriced": 0, "skipped": 0, "failed": 0}
+
+        simulations = self._fetch_simulations()
+        results = self._fetch_results([sim["id"] for sim in simulations])
+
+        repriced = []
+        for sim in simulations:
+            stored_result = results.get(sim["id"])
+            if stored_result is None:
+                continue  # Not analyzed yet; the analysis will use the current prizes
+            try:
+                analyzer = SpecificationAnalyzer.for_repricing(sim, self.jackpot_metadata)
+                repriced.append(analyzer.reprice_result(stored_result))
+            except ValueError as e:
+                logger.warning(f"[JackpotRepricer] Skipping simulation {sim['id']}: {str(e)}")
+                counts["skipped"] += 1
+
+        for chunk in chunked(repriced, UPSERT_CHUNK):
+            try:
+                response = supabase.table("simulation_results").upsert(chunk, on_conflict="simulation_id").execute()
+                counts["repriced"] += len(response.data or [])
+                counts["failed"] += len(chunk) - len(response.data or [])
+            except Exception as e:
+                logger.error(f"[JackpotRepricer] Error storing repriced results batch: {str(e)}")
+                counts["failed"] += len(chunk)
+
+        logger.info(
+            f"[JackpotRepricer] Jackpot {self.jackpot_id}: repriced {counts['repriced']} simulations, "
+            f"{counts['skipped']} skipped, {counts['failed']} failed"
+        )
+        return counts
+
+    def _fetch_simulations(self) -> List[Dict[str, Any]]:
+        """Simulations of the jackpot with their cost, paging through all rows."""
+        simulations = []
+        offset = 0
+        while True:
+            response = (
+                supabase.table("simulations")
+                .select("id, jackpot_id, total_cost")
+                .eq("jackpot_id", self.jackpot_id)
+                .order("id")
+                .range(offset, offset + PAGE_SIZE - 1)
+                .execute()
+            )
+            rows = response.data or []
+            simulations.extend(rows)
+            if len(rows) < PAGE_SIZE:
+                return simulations
+            offset += PAGE_SIZE
+
+    def _fetch_results(self, simulation_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Stored results of many simulations, keyed by simulation id."""
+        return {
+            simulation_id: rows[0]
+            for simulation_id, rows in fetch_grouped("simulation_results", "simulation_id", simulation_ids).items()
+        }
@@ -0,0 +1,78 @@
+from typing import List, Tuple, Optional
+from concurrent.futures import Executor, ProcessPoolExecutor
+import multiprocessing
+import logging
+from app.services.combination_math import (
+    iter_packed_tickets,
+    pack_predictions,
+    count_packed_matches,
+    total_combinations,
+)
+
+logger = logging.getLogger(__name__)
+
+# Below this many tickets per worker, process start-up costs more than it saves
+MIN_SHARD_SIZE = 50000
+
+
+def shard_ranges(total: int, shards: int) -> List[Tuple[int, int]]:
+    """Split the ticket index space [0, total) into contiguous, near-equal ranges."""
+    shards = max(1, min(shards, total))
+    base, extra = divmod(total, shards)
+    ranges = []
+    start = 0
+    for shard in range(shards):
+        stop = start + base + (1 if shard < extra else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def shard_match_histogram(game_options: List[List[str]], actual_results: List[str], start: int, stop: int) -> List[int]:
+    """Match histogram of the tickets with index in [start, stop) (runs inside a worker)."""
+    histogram = [0] * (len(actual_results) + 1)
+    packed_results = pack_predictions(actual_results)
+    for packed_ticket in iter_packed_tickets(game_options, start, stop):
+        histogram[count_packed_matches(packed_ticket, packed_results)] += 1
+    return histogram
+
+
+def merge_histograms(histograms: List[List[int]]) -> List[int]:
+    """Sum per-shard histograms into the histogram of the whole specification."""
+    return [sum(counts) for counts in zip(*histograms)]
+
+
+def sharded_match_histogram(
+    game_options: List[List[str]],
+    actual_results: List[str],
+    workers: int,
+    executor: Optional[Executor] = None,
+    min_shard_size: int = MIN_SHARD_SIZE
+) -> List[int]:
+    """
+    Enumerate the specification in parallel, one contiguous index range per worker.
+
+    Each worker enumerates only its slice of the mixed-radix index space and the
+    per-shard histograms are summed (the best match is the highest non-empty
+    count of the merged histogram). Pass an executor to reuse an existing pool;
+    otherwise a short-lived process pool is created. Specifications too small to
+    benefit run in-process.
+    """
+    total = total_combinations(game_options)
+    shards = min(workers, total // max(1, min_shard_size))
+    if shards <= 1:
+        return shard_match_histogram(game_options, actual_results, 0, total)
+
+    ranges = shard_ranges(total, shards)
+    starts = [start for start, _ in ranges]
+    stops = [stop for _, stop in ranges]
+    count = len(ranges)
+    logger.info(f"[ShardedEnumeration] Enumerating {total} combinations in {count} shards")
+
+    if executor is not None:
+        histograms = list(executor.map(shard_match_histogram, [game_options] * count, [actual_results] * count, starts, stops))
+    else:
+        with ProcessPoolExecutor(max_workers=count, mp_context=multiprocessing.get_context("spawn")) as pool:
+            histograms = list(pool.map(shard_match_histogram, [game_options] * count, [actual_results] * count, starts, stops))
+
+    return merge_histograms(histograms)
@@ -1,9 +1,29 @@
-from typing import List, Dict, Any, Iterator, Tuple
+from typing import List, Dict, Any, Iterator, Tuple, Optional
+from itertools import islice
 import logging
-from itertools import product
 from app.config.database import supabase
 from app.services.email_service import EmailService
 from app.api.v1.notifications import create_simulation_completion_notification
+from app.services.combination_math import (
+    build_game_options,
+    match_histogram,
+    iter_packed_tickets,
+    pack_predictions,
+    unpack_predictions,
+    count_packed_matches,
+    unrank_ticket,
+    rank_ticket,
+    iter_winning_tickets,
+    portfolio_match_histogram,
+    single_result_histograms,
+)
+from app.services.combination_specification_generator import CombinationSpecificationGenerator
+from app.services.ticket_ranking import TicketRanker, MAX_RANKED_TICKETS
+from app.services.reduced_system import ticket_match_histogram
+from app.services.winner_index import encode_index_set, decode_index_set, MAX_STORED_WINNERS
+from app.services.vectorized_enumeration import ChunkedCombinationEnumerator
+from app.services.sharded_enumeration import sharded_match_histogram
+from app.config.settings import ANALYSIS_WORKERS
 import threading
 
 logger = logging.getLogger(__name__)
@@ -12,6 +32,8 @@ logger = logging.getLogger(__name__)
 _running_analyses = set()
 _analysis_lock = threading.Lock()
 
+ANALYSIS_METHODS = ("closed_form", "enumerate", "vectorized", "sharded")
+
 class SpecificationAnalyzer:
     """
     Analyze bet specifications against actual game results with prize level tracking.
@@ -27,40 +49,89 @@ class SpecificationAnalyzer:
         self.jackpot_id = jackpot_id
         
         # Fetch jackpot metadata for prize information
-        self.jackpot_metadata = self._fetch_jackpot_metadata()
-        self.prize_levels = self._extract_prize_levels()
+        jackpot_metadata = self._fetch_jackpot_metadata()
         
         # Fetch actual game results
-        self.games = self._fetch_games_with_results()
-        if not self.games:
+        games = self.fetch_games_with_results(jackpot_id)
+        if not games:
             raise ValueError(f"No games with results found for jackpot_id {jackpot_id}")
         
-        # Pre-compute actual results for quick comparison
-        self.actual_results = [self._determine_result(g) for g in self.games]
-        self.num_games = len(self.actual_results)
+        self._load_jackpot_context(jackpot_metadata, games)
         
         # Get simulation details
         sim_response = supabase.table("simulations").select("total_cost, effective_combinations").eq("id", simulation_id).single().execute()
         if not sim_response.data:
             raise ValueError(f"Simulation {simulation_id} not found")
         
-        self.total_cost = sim_response.data["total_cost"]
-        self.effective_combinations = sim_response.data["effective_combinations"]
-        
-        # Fetch bet specification
-        spec_response = supabase.table("bet_specifications").select("*").eq("simulation_id", simulation_id).single().execute()
+        # Fetch bet specification(s); a portfolio simulation has several
+        spec_response = (
+            supabase.table("bet_specifications")
+            .select("*")
+            .eq("simulation_id", simulation_id)
+            .order("portfolio_position")
+            .execute()
+        )
         if not spec_response.data:
             raise ValueError(f"No bet specification found for simulation {simulation_id}")
         
-        self.specification = spec_response.data
-        self.game_selections = self.specification["game_selections"]
+        self._load_specification(sim_response.data, spec_response.data)
         
         logger.info(f"[SpecificationAnalyzer] Loaded specification: {self.effective_combinations} total combinations")
         logger.info(f"[SpecificationAnalyzer] Prize levels: {self.prize_levels}")
 
-    def analyze(self) -> Dict[str, Any]:
-        """Analyze the bet specification against actual game results with prize level tracking."""
+    @classmethod
+    def from_rows(
+        cls,
+        simulation: Dict[str, Any],
+        specifications: List[Dict[str, Any]],
+        jackpot_metadata: Dict[str, Any],
+        games: List[Dict[str, Any]]
+    ) -> "SpecificationAnalyzer":
+        """
+        Build an analyzer from rows that were already loaded, without any queries.
+        
+        Used by batch analysis, where the jackpot context is shared by every simulation.
+        """
+        analyzer = cls.__new__(cls)
+        analyzer.simulation_id = simulation["id"]
+        analyzer.jackpot_id = simulation["jackpot_id"]
+        analyzer._load_jackpot_context(jackpot_metadata, games)
+        analyzer._load_specification(simulation, specifications)
+        return analyzer
+
+    def _load_jackpot_context(self, jackpot_metadata: Dict[str, Any], games: List[Dict[str, Any]]) -> None:
+        """Set prize levels and actual results from the jackpot metadata and games with results."""
+        self.jackpot_metadata = jackpot_metadata
+        self.prize_levels = self._extract_prize_levels()
+        self.games = games
+        
+        # Pre-compute actual results for quick comparison
+        self.actual_results = [self._determine_result(g) for g in self.games]
+        self.num_games = len(self.actual_results)
+
+    def _load_specification(self, simulation: Dict[str, Any], specifications: List[Dict[str, Any]]) -> None:
+        """Set cost and selections from the simulation and its bet specification rows (in portfolio order)."""
+        self.total_cost = simulation["total_cost"]
+        self.effective_combinations = simulation["effective_combinations"]
+        self.specifications = specifications
+        self.specification = specifications[0]
+        self.game_selections = self.specification["game_selections"]
+        self.is_portfolio = len(specifications) > 1
+        self.reduced_tickets = self.specification.get("reduced_tickets")
+
+    def analyze(self, method: str = "closed_form") -> Dict[str, Any]:
+        """
+        Analyze the bet specification against actual game results with prize level tracking.
+
+        The default "closed_form" method computes the match histogram per game without
+        enumerating tickets. The "enumerate" (packed integers), "vectorized" (NumPy
+        chunks) and "sharded" (index ranges across worker processes) methods walk every
+        combination and cross-check the histogram against the closed form, for verification.
+        """
         global _running_analyses, _analysis_lock
+
+        if method not in ANALYSIS_METHODS:
+            raise ValueError(f"Unknown analysis method '{method}'. Expected one of {ANALYSIS_METHODS}")
         
         # Check if analysis is already running for this simulation
         with _analysis_lock:
@@ -82,80 +153,14 @@ class SpecificationAnalyzer:
                 logger.info(f"Results already exist for simulation {self.simulation_id}, skipping analysis")
                 return {}
             
-            logger.info(f"[SpecificationAnalyzer] Starting analysis of {self.effective_combinations} combinations")
-            
-            # Initialize prize level tracking
-            prize_level_wins = {str(level): 0 for level in self.prize_levels}
-            prize_level_payouts = {str(level): 0.0 for level in self.prize_levels}
-            
-            total_combinations = 0
-            total_winners = 0
-            best_match_count = 0
-            
-            # Generate and analyze combinations on-demand
-            for combination in self._generate_combinations():
-                total_combinations += 1
-                
-                # Count matches for this combination
-                matches = self._count_matches(combination)
-                best_match_count = max(best_match_count, matches)
-                
-                # Check if this combination wins any prize levels
-                if matches in self.prize_levels:
-                    prize_level_wins[str(matches)] += 1
-                    payout = self._calculate_payout(matches)
-                    prize_level_payouts[str(matches)] += payout
-                    total_winners += 1
-                
-                # Log progress periodically for large combinations
-                if total_combinations % 1000 == 0:
-                    logger.info(f"[SpecificationAnalyzer] Processed {total_combinations}/{self.effective_combinations} combinations")
+            logger.info(f"[SpecificationAnalyzer] Starting {method} analysis of {self.effective_combinations} combinations")
             
-            # Calculate totals using jackpot betting logic (only highest match counts)
-            # In jackpot betting, you only get paid for your highest match, not for all combinations
-            if best_match_count > 0 and best_match_count in self.prize_levels and prize_level_wins[str(best_match_count)] > 0:
-                # Get the actual jackpot prize for the best match
-                total_payout = self._calculate_payout(best_match_count)
-            else:
-                total_payout = 0.0
-            
-            # Ensure total_cost is a valid number
-            try:
-                cost_value = float(self.total_cost)
-                if cost_value != cost_value or cost_value == float('inf') or cost_value == float('-inf'):  # Check for NaN and infinity
-                    cost_value = 0.0
-            except (ValueError, TypeError):
-                cost_value = 0.0
-            
-            net_profit_loss = total_payout - cost_value
-            
-            # Ensure all values are valid numbers
-            winning_percentage = round(total_winners / total_combinations * 100, 4) if total_combinations > 0 else 0.0
-            
-            summary = {
-                "simulation_id": self.simulation_id,
-                "prize_level_wins": prize_level_wins,
-                "prize_level_payouts": prize_level_payouts,
-                "total_payout": float(total_payout) if not (total_payout != total_payout) else 0.0,
-                "total_winners": total_winners,
-                "net_loss": -net_profit_loss if net_profit_loss < 0 else 0.0,
-                "best_match_count": best_match_count,
-                "analysis": {
-                    "total_combinations": total_combinations,
-                    "total_winners": total_winners,
-                    "winning_percentage": winning_percentage,
-                    "actual_results": self.actual_results,
-                    "combination_type": self.specification["combination_type"],
-                    "double_games": self.specification["double_games"],
-                    "triple_games": self.specification["triple_games"],
-                    "prize_breakdown": self._format_prize_breakdown(prize_level_wins, prize_level_payouts),
-                    "net_profit": net_profit_loss if net_profit_loss > 0 else 0.0
-                }
-            }
+            histogram = self._match_histogram(method)
+            summary = self._build_summary(histogram)
             
             logger.info(
-                f"[SpecificationAnalyzer] Analysis complete - {total_combinations} combinations processed, "
-                f"{total_winners} total winners, best match: {best_match_count}"
+                f"[SpecificationAnalyzer] Analysis complete - {summary['analysis']['total_combinations']} combinations processed, "
+                f"{summary['total_winners']} total winners, best match: {summary['best_match_count']}"
             )
             
             # Store results
@@ -179,6 +184,196 @@ class SpecificationAnalyzer:
             with _analysis_lock:
                 _running_analyses.discard(self.simulation_id)
 
+    def _match_histogram(self, method: str = "closed_form") -> List[int]:
+        """Number of combinations at every match count 0..N for the chosen method."""
+        if self.is_portfolio:
+            if method != "closed_form":
+                raise ValueError("Portfolio simulations only support closed_form analysis")
+            return portfolio_match_histogram(self._portfolio_options(), self.actual_results)
+        if self.reduced_tickets is not None:
+            if method != "closed_form":
+                raise ValueError("Reduced-system simulations only support closed_form analysis")
+            return ticket_match_histogram(self.reduced_tickets, self.actual_results)
+        
+        histogram = match_histogram(self._game_options(), self.actual_results)
+        if method == "closed_form":
+            return histogram
+        
+        if method == "vectorized":
+            enumerated = self.vectorized_enumerator().match_histogram()
+        elif method == "sharded":
+            enumerated = sharded_match_histogram(self._game_options(), self.actual_results, ANALYSIS_WORKERS)
+        else:
+            enumerated = self._enumerate_match_histogram()
+        if enumerated != histogram:
+            raise ValueError(
+                f"Enumerated match histogram {enumerated} does not match closed form {histogram} "
+                f"for simulation {self.simulation_id}"
+            )
+        return enumerated
+
+    def _enumerate_match_histogram(self) -> List[int]:
+        """Build the match histogram by walking every combination (verification path)."""
+        histogram = [0] * (self.num_games + 1)
+        packed_results = pack_predictions(self.actual_results)
+        total_combinations = 0
+        
+        for packed_ticket in self._generate_combinations():
+            total_combinations += 1
+            histogram[count_packed_matches(packed_ticket, packed_results)] += 1
+            
+            # Log progress periodically for large combinations
+            if total_combinations % 10000 == 0:
+                logger.info(f"[SpecificationAnalyzer] Processed {total_combinations}/{self.effective_combinations} combinations")
+        
+        return histogram
+
+    def vectorized_enumerator(self, chunk_size: Optional[int] = None) -> ChunkedCombinationEnumerator:
+        """NumPy enumerator over this specification, for per-ticket data (winner indices, payouts)."""
+        if chunk_size is None:
+            return ChunkedCombinationEnumerator(self._game_options(), self.actual_results)
+        return ChunkedCombinationEnumerator(self._game_options(), self.actual_results, chunk_size)
+
+    def _build_summary(self, histogram: List[int]) -> Dict[str, Any]:
+        """Turn a match histogram into the simulation_results row."""
+        payout_fields = self._payout_fields(histogram)
+        
+        return {
+            "simulation_id": self.simulation_id,
+            "winning_indices": self._encode_winning_indices(histogram),
+            **{key: value for key, value in payout_fields.items() if key != "analysis"},
+            "analysis": {
+                "total_combinations": sum(histogram),
+                **payout_fields["analysis"],
+                "actual_results": self.actual_results,
+                "match_histogram": histogram,
+                "combination_type": "portfolio" if self.is_portfolio else self.specification["combination_type"],
+                "double_games": [] if self.is_portfolio else self.specification["double_games"],
+                "triple_games": [] if self.is_portfolio else self.specification["triple_games"],
+                "portfolio": self._portfolio_summary(histogram) if self.is_portfolio else None,
+            }
+        }
+
+    def _payout_fields(self, histogram: List[int]) -> Dict[str, Any]:
+        """Fields of the simulation_results row that depend on the prizes, from the match histogram."""
+        prize_level_wins, best_match_count, total_payout = self._histogram_payout(histogram)
+        prize_level_payouts = {
+            str(level): prize_level_wins[str(level)] * self._calculate_payout(level)
+            for level in self.prize_levels
+        }
+        
+        total_combinations = sum(histogram)
+        total_winners = sum(prize_level_wins.values())
+        
+        # Ensure total_cost is a valid number
+        try:
+            cost_value = float(self.total_cost)
+            if cost_value != cost_value or cost_value == float('inf') or cost_value == float('-inf'):  # Check for NaN and infinity
+                cost_value = 0.0
+        except (ValueError, TypeError):
+            cost_value = 0.0
+        
+        net_profit_loss = total_payout - cost_value
+        
+        # Ensure all values are valid numbers
+        winning_percentage = round(total_winners / total_combinations * 100, 4) if total_combinations > 0 else 0.0
+        
+        return {
+            "prize_level_wins": prize_level_wins,
+            "prize_level_payouts": prize_level_payouts,
+            "total_payout": float(total_payout) if not (total_payout != total_payout) else 0.0,
+            "total_winners": total_winners,
+            "net_loss": -net_profit_loss if net_profit_loss < 0 else 0.0,
+            "best_match_count": best_match_count,
+            "analysis": {
+                "total_winners": total_winners,
+                "winning_percentage": winning_percentage,
+                "prize_breakdown": self._format_prize_breakdown(prize_level_wins, prize_level_payouts),
+                "net_profit": net_profit_loss if net_profit_loss > 0 else 0.0
+            }
+        }
+
+    @classmethod
+    def for_repricing(cls, simulation: Dict[str, Any], jackpot_metadata: Dict[str, Any]) -> "SpecificationAnalyzer":
+        """
+        Build an analyzer that only reprices stored results, without any queries.
+        
+        Only the jackpot prizes and the simulation's cost are loaded: the match
+        histogram stored with the results already holds everything else.
+        """
+        analyzer = cls.__new__(cls)
+        analyzer.simulation_id = simulation["id"]
+        analyzer.jackpot_id = simulation.get("jackpot_id")
+        analyzer.jackpot_metadata = jackpot_metadata
+        analyzer.prize_levels = analyzer._extract_prize_levels()
+        analyzer.total_cost = simulation["total_cost"]
+        return analyzer
+
+    def reprice_result(self, stored_result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Recompute the prize-dependent fields of a stored simulation_results row.
+        
+        Raises ValueError if the row has no stored match histogram. The stored
+        winner index is dropped when the lowest prize level changed, since it
+        lists the tickets at or above that level.
+        """
+        analysis = stored_result.get("analysis") or {}
+        histogram = analysis.get("match_histogram")
+        if not histogram:
+            raise ValueError(f"No stored match histogram for simulation {self.simulation_id}")
+        
+        self.num_games = len(histogram) - 1
+        payout_fields = self._payout_fields(histogram)
+        
+        repriced = {
+            **stored_result,
+            **{key: value for key, value in payout_fields.items() if key != "analysis"},
+            "analysis": {**analysis, **payout_fields["analysis"]},
+        }
+        previous_levels = sorted(int(level) for level in (stored_result.get("prize_level_wins") or {}))
+        if previous_levels[:1] != self.prize_levels[:1]:
+            repriced["winning_indices"] = None
+        return repriced
+
+    def _histogram_payout(self, histogram: List[int]) -> Tuple[Dict[str, int], int, float]:
+        """Wins per prize level, best match count and payout of a match histogram."""
+        prize_level_wins = {
+            str(level): histogram[level] if level < len(histogram) else 0
+            for level in self.prize_levels
+        }
+        best_match_count = max((matches for matches, count in enumerate(histogram) if count), default=0)
+        
+        # Calculate totals using jackpot betting logic (only highest match counts)
+        # In jackpot betting, you only get paid for your highest match, not for all combinations
+        if best_match_count > 0 and best_match_count in self.prize_levels and prize_level_wins[str(best_match_count)] > 0:
+            # Get the actual jackpot prize for the best match
+            total_payout = self._calculate_payout(best_match_count)
+        else:
+            total_payout = 0.0
+        
+        return prize_level_wins, best_match_count, total_payout
+
+    def _encode_winning_indices(self, histogram: List[int]) -> Optional[str]:
+        """Compressed index set of the winning tickets, or None when there are too many to store."""
+        if self.is_portfolio:
+            return None  # Indices are positions within a single specification
+        if not self.prize_levels:
+            return encode_index_set([])
+        
+        min_level = self.prize_levels[0]
+        winner_count = sum(histogram[min_level:])
+        if winner_count > MAX_STORED_WINNERS:
+            logger.info(f"[SpecificationAnalyzer] {winner_count} winning tickets for simulation {self.simulation_id}, not storing index")
+            return None
+        
+        if self.reduced_tickets is not None:
+            # Positions in the stored ticket list
+            return encode_index_set(self._reduced_winner_positions(min_level))
+        
+        return encode_index_set(
+            index for index, _ in iter_winning_tickets(self._game_options(), self.actual_results, min_level)
+        )
+
     def _fetch_jackpot_metadata(self) -> Dict[str, Any]:
         """Fetch jackpot metadata containing prize information."""
         response = supabase.table("jackpots").select("metadata").eq("id", self.jackpot_id).single().execute()
@@ -229,37 +424,54 @@ class SpecificationAnalyzer:
                 })
         return breakdown
 
-    def _generate_combinations(self) -> Iterator[List[str]]:
+    def _game_options(self) -> List[List[str]]:
+        """Selections for each game in order."""
+        if self.is_portfolio:
+            raise ValueError("Not available for portfolio simulations, which span several specifications")
+        if self.reduced_tickets is not None:
+            raise ValueError("Not available for reduced-system simulations, whose tickets are not every combination of the selections")
+        return build_game_options(self.game_selections, self.num_games)
+
+    def _portfolio_options(self) -> List[List[List[str]]]:
+        """Selections for each game in order, for every specification of the portfolio."""
+        return [build_game_options(spec["game_selections"], self.num_games) for spec in self.specifications]
+
+    def _portfolio_summary(self, histogram: List[int]) -> Dict[str, Any]:
+        """Raw versus deduplicated size and cost of a portfolio."""
+        cost_per_bet = CombinationSpecificationGenerator.SPORTPESA_RULES["costPerBet"]
+        raw_histogram = [0] * (self.num_games + 1)
+        for game_options in self._portfolio_options():
+            for matches, count in enumerate(match_histogram(game_options, self.actual_results)):
+                raw_histogram[matches] += count
+        
+        raw_combinations = sum(raw_histogram)
+        distinct_combinations = sum(histogram)
+        return {
+            "specifications": len(self.specifications),
+            "raw_combinations": raw_combinations,
+            "distinct_combinations": distinct_combinations,
+            "raw_cost": raw_combinations * cost_per_bet,
+            "deduplicated_cost": distinct_combinations * cost_per_bet,
+            "raw_match_histogram": raw_histogram,
+        }
+
+    def _generate_combinations(self) -> Iterator[int]:
         """
         Generate all possible combinations from the game selections.
         
-        This uses itertools.product to generate combinations on-demand,
-        which is much more memory efficient than storing them all.
+        Combinations are produced on-demand in itertools.product order, each one
+        packed into a single integer (3 one-hot bits per game) so that matching
+        against the actual results is a mask-and-popcount.
         """
-        # Create list of selections for each game in order
-        game_options = []
-        for game_num in range(1, self.num_games + 1):
-            game_key = str(game_num)
-            if game_key in self.game_selections:
-                game_options.append(self.game_selections[game_key])
-            else:
-                # Default to single random prediction if not specified
-                game_options.append(["1"])  # Fallback
-        
-        # Generate all combinations using cartesian product
-        for combination in product(*game_options):
-            yield list(combination)
-
-    def _count_matches(self, predictions: List[str]) -> int:
-        """Count how many predictions match the actual results."""
-        return sum(pred == actual for pred, actual in zip(predictions, self.actual_results))
+        return iter_packed_tickets(self._game_options())
 
-    def _fetch_games_with_results(self) -> List[Dict[str, Any]]:
+    @staticmethod
+    def fetch_games_with_results(jackpot_id: str) -> List[Dict[str, Any]]:
         """Fetch games with results for the jackpot."""
         response = (
             supabase.table("games")
             .select("id, score_home, score_away")
-            .eq("jackpot_id", self.jackpot_id)
+            .eq("jackpot_id", jackpot_id)
             .order("game_order")
             .execute()
         )
@@ -305,20 +517,26 @@ class SpecificationAnalyzer:
         except Exception as e:
             logger.error(f"[SpecificationAnalyzer] Error updating simulation status: {str(e)}")
 
-    def _send_completion_notifications(self, summary: Dict[str, Any]) -> None:
+    def _send_completion_notifications(
+        self,
+        summary: Dict[str, Any],
+        user_id: Optional[str] = None,
+        simulation_name: Optional[str] = None
+    ) -> None:
         """Send completion notifications via email and in-app."""
         try:
-            # Get simulation details for notifications
-            sim_response = supabase.table("simulations").select(
-                "user_id, name"
-            ).eq("id", self.simulation_id).single().execute()
-            
-            if not sim_response.data:
-                logger.error(f"[SpecificationAnalyzer] Could not find simulation {self.simulation_id} for notifications")
-                return
-            
-            user_id = sim_response.data["user_id"]
-            simulation_name = sim_response.data["name"]
+            if user_id is None or simulation_name is None:
+                # Get simulation details for notifications
+                sim_response = supabase.table("simulations").select(
+                    "user_id, name"
+                ).eq("id", self.simulation_id).single().execute()
+                
+                if not sim_response.data:
+                    logger.error(f"[SpecificationAnalyzer] Could not find simulation {self.simulation_id} for notifications")
+                    return
+                
+                user_id = sim_response.data["user_id"]
+                simulation_name = sim_response.data["name"]
             
             # Extract notification data
             total_combinations = summary["analysis"]["total_combinations"]
@@ -368,30 +586,177 @@ class SpecificationAnalyzer:
         except Exception as e:
             logger.error(f"[SpecificationAnalyzer] Error in notification sending: {e}")
 
-    def get_combination_preview(self, limit: int = 10) -> List[Dict[str, Any]]:
+    def get_combination_preview(
+        self,
+        limit: int = 10,
+        offset: int = 0,
+        combination_numbers: Optional[List[int]] = None,
+        order: str = "index"
+    ) -> List[Dict[str, Any]]:
         """
-        Get a preview of the first few combinations for debugging/display.
+        Get a page of combinations for debugging/display.
+        
+        Combinations are unranked straight from their index, so any page costs
+        the same as the first one. Explicit combination numbers (1-based, as in
+        the preview) take precedence over offset/limit. With order="probability"
+        the page follows the odds-implied likelihood of each ticket instead.
         """
-        preview = []
-        count = 0
+        game_options = self._game_options()
+        packed_results = pack_predictions(self.actual_results)
         
-        for combination in self._generate_combinations():
-            if count >= limit:
-                break
-                
-            matches = self._count_matches(combination)
-            is_winner = matches in self.prize_levels
-            prize_level = matches if is_winner else None
-            payout = self._calculate_payout(matches) if is_winner else 0.0
-            
-            preview.append({
-                "combination_number": count + 1,
-                "predictions": combination,
-                "matches": matches,
-                "is_winner": is_winner,
-                "prize_level": f"{prize_level}/{self.num_games}" if prize_level else None,
-                "payout": payout
+        if combination_numbers is not None:
+            tickets = [
+                (number - 1, pack_predictions(unrank_ticket(number - 1, game_options)))
+                for number in combination_numbers
+            ]
+        elif order == "probability":
+            if offset + limit > MAX_RANKED_TICKETS:
+                raise ValueError(f"Probability-ordered previews cover the first {MAX_RANKED_TICKETS} combinations")
+            ranked = islice(TicketRanker(self.jackpot_id).iter_tickets(game_options), offset, offset + limit)
+            return [
+                {**self._preview_entry(index, pack_predictions(predictions), packed_results), "probability": probability}
+                for probability, index, predictions in ranked
+            ]
+        else:
+            tickets = enumerate(iter_packed_tickets(game_options, offset, offset + limit), start=offset)
+        
+        return [self._preview_entry(index, packed_ticket, packed_results) for index, packed_ticket in tickets]
+
+    def get_combination_rank(self, predictions: List[str]) -> Dict[str, Any]:
+        """Look up a ticket by its predictions; raises ValueError if it is not in the specification."""
+        index = rank_ticket(predictions, self._game_options())
+        return self._preview_entry(index, pack_predictions(predictions), pack_predictions(self.actual_results))
+
+    def get_result_sensitivity(self) -> Dict[str, Any]:
+        """
+        Match histogram and payout if any single game had ended differently.
+        
+        Covers every game and both alternative results. Full systems reuse the
+        closed form's per-game factors through prefix/suffix products, so all
+        what-ifs together cost about one analysis; portfolios and reduced
+        systems rescore each what-if with their own histogram.
+        """
+        if self.is_portfolio or self.reduced_tickets is not None:
+            what_ifs = []
+            for game_index, actual in enumerate(self.actual_results):
+                for alternative in ("1", "X", "2"):
+                    if alternative != actual:
+                        results = self.actual_results[:game_index] + [alternative] + self.actual_results[game_index + 1:]
+                        what_ifs.append((game_index, alternative, self._results_histogram(results)))
+        else:
+            what_ifs = single_result_histograms(self._game_options(), self.actual_results)
+        
+        _, best_match_count, total_payout = self._histogram_payout(self._match_histogram())
+        cost = float(self.total_cost or 0.0)
+        
+        changes = []
+        for game_index, alternative, histogram in what_ifs:
+            prize_level_wins, what_if_best, what_if_payout = self._histogram_payout(histogram)
+            changes.append({
+                "game": game_index + 1,
+                "actual_result": self.actual_results[game_index],
+                "alternative_result": alternative,
+                "match_histogram": histogram,
+                "best_match_count": what_if_best,
+                "prize_level_wins": prize_level_wins,
+                "total_payout": what_if_payout,
+                "payout_change": what_if_payout - total_payout,
+                "net_profit_loss": what_if_payout - cost,
             })
-            count += 1
         
-        return preview 
\ No newline at end of file
+        return {
+            "simulation_id": self.simulation_id,
+            "actual_results": self.actual_results,
+            "best_match_count": best_match_count,
+            "total_payout": total_payout,
+            "what_ifs": changes,
+        }
+
+    def _results_histogram(self, results: List[str]) -> List[int]:
+        """Match histogram of a portfolio or reduced system against other results."""
+        if self.reduced_tickets is not None:
+            return ticket_match_histogram(self.reduced_tickets, results)
+        return portfolio_match_histogram(self._portfolio_options(), results)
+
+    def get_winning_combinations(
+        self,
+        offset: int = 0,
+        limit: int = 50,
+        winning_indices: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Get a page of the winning combinations.
+        
+        Uses the stored winner index set when one is passed; otherwise the
+        winners are found with the branch-and-bound enumerator, which skips
+        every subtree of tickets that cannot reach the lowest prize level.
+        Reduced systems page through their stored ticket list instead.
+        """
+        if self.reduced_tickets is not None:
+            return self._reduced_winning_combinations(offset, limit, winning_indices)
+        
+        game_options = self._game_options()
+        packed_results = pack_predictions(self.actual_results)
+        
+        if winning_indices is not None:
+            indices = decode_index_set(winning_indices)
+            total_winners = len(indices)
+            page = indices[offset:offset + limit]
+        elif self.prize_levels:
+            min_level = self.prize_levels[0]
+            total_winners = sum(match_histogram(game_options, self.actual_results)[min_level:])
+            winners = iter_winning_tickets(game_options, self.actual_results, min_level)
+            page = [index for index, _ in islice(winners, offset, offset + limit)]
+        else:
+            total_winners, page = 0, []
+        
+        return {
+            "total_winners": total_winners,
+            "offset": offset,
+            "combinations": [
+                self._preview_entry(index, pack_predictions(unrank_ticket(index, game_options)), packed_results)
+                for index in page
+            ]
+        }
+
+    def _reduced_winning_combinations(self, offset: int, limit: int, winning_indices: Optional[str]) -> Dict[str, Any]:
+        """Page of the winning tickets of a reduced system, numbered by position in its ticket list."""
+        if winning_indices is not None:
+            indices = decode_index_set(winning_indices)
+        elif self.prize_levels:
+            indices = self._reduced_winner_positions(self.prize_levels[0])
+        else:
+            indices = []
+        
+        packed_results = pack_predictions(self.actual_results)
+        return {
+            "total_winners": len(indices),
+            "offset": offset,
+            "combinations": [
+                self._preview_entry(index, pack_predictions(self.reduced_tickets[index]), packed_results)
+                for index in indices[offset:offset + limit]
+            ]
+        }
+
+    def _reduced_winner_positions(self, min_level: int) -> List[int]:
+        """Positions of the reduced-system tickets with at least min_level matches."""
+        return [
+            index for index, ticket in enumerate(self.reduced_tickets)
+            if sum(1 for prediction, result in zip(ticket, self.actual_results) if prediction == result) >= min_level
+        ]
+
+    def _preview_entry(self, index: int, packed_ticket: int, packed_results: int) -> Dict[str, Any]:
+        """Preview row of the ticket at a given (0-based) index."""
+        matches = count_packed_matches(packed_ticket, packed_results)
+        is_winner = matches in self.prize_levels
+        prize_level = matches if is_winner else None
+        payout = self._calculate_payout(matches) if is_winner else 0.0
+        
+        return {
+            "combination_number": index + 1,
+            "predictions": unpack_predictions(packed_ticket, self.num_games),
+            "matches": matches,
+            "is_winner": is_winner,
+            "prize_level": f"{prize_level}/{self.num_games}" if prize_level else None,
+            "payout": payout
+        }
@@ -0,0 +1,106 @@
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+from math import log, exp
+import heapq
+import logging
+from app.config.database import supabase
+from app.services.combination_math import rank_digits
+from app.services.odds_forecast import implied_probabilities
+
+logger = logging.getLogger(__name__)
+
+OUTCOMES = ["1", "X", "2"]
+
+# Largest K served by the ranking endpoints
+MAX_RANKED_TICKETS = 5000
+
+
+def iter_most_probable_tickets(
+    game_options: List[List[str]],
+    game_probabilities: List[Dict[str, float]]
+) -> Iterator[Tuple[float, int, List[str]]]:
+    """
+    Yield (probability, index, predictions) for tickets from most to least likely.
+
+    Best-first search over per-game log-probabilities: each game's selections are
+    sorted by probability, the search starts from the ticket of every game's
+    favourite and a heap expands one digit at a time. A ticket's children only
+    bump digits at or after the last one bumped to reach it, so every ticket is
+    generated exactly once and only about K * games heap entries are touched for
+    the first K tickets. The index is the ticket's position in the specification.
+    """
+    num_games = len(game_options)
+    radices = [len(options) for options in game_options]
+
+    # Per game: (log-probability, digit in game_options) sorted best first
+    ranked = []
+    for options, probabilities in zip(game_options, game_probabilities):
+        ranked.append(sorted(
+            ((log(max(probabilities.get(outcome, 0.0), 1e-300)), digit) for digit, outcome in enumerate(options)),
+            key=lambda entry: -entry[0]
+        ))
+
+    # A ticket is its selection rank per game, packed 2 bits per game
+    heap = [(-sum(game[0][0] for game in ranked), 0, 0, 0)]
+    counter = 1
+    while heap:
+        negative_log_p, _, positions, last = heapq.heappop(heap)
+        digits = [ranked[game][(positions >> (2 * game)) & 0b11][1] for game in range(num_games)]
+        yield exp(-negative_log_p), rank_digits(digits, radices), [options[digit] for options, digit in zip(game_options, digits)]
+
+        for game in range(last, num_games):
+            position = (positions >> (2 * game)) & 0b11
+            if position + 1 < len(ranked[game]):
+                delta = ranked[game][position][0] - ranked[game][position + 1][0]
+                heapq.heappush(heap, (negative_log_p + delta, counter, positions + (1 << (2 * game)), game))
+                counter += 1
+
+
+class TicketRanker:
+    """
+    Rank tickets of a jackpot by their odds-implied probability.
+
+    Games without usable odds count as 1/3 per outcome.
+    """
+
+    def __init__(self, jackpot_id: str):
+        self.jackpot_id = jackpot_id
+
+        response = (
+            supabase.table("games")
+            .select("game_order, odds_home, odds_draw, odds_away")
+            .eq("jackpot_id", jackpot_id)
+            .order("game_order")
+            .execute()
+        )
+        games = response.data or []
+        if not games:
+            raise ValueError(f"No games found for jackpot_id {jackpot_id}")
+
+        self.num_games = len(games)
+        self.game_probabilities = [
+            implied_probabilities(game) or {outcome: 1.0 / 3.0 for outcome in OUTCOMES}
+            for game in games
+        ]
+
+    def iter_tickets(self, game_options: Optional[List[List[str]]] = None) -> Iterator[Tuple[float, int, List[str]]]:
+        """Tickets of a specification (default: every possible ticket) from most to least likely."""
+        if game_options is None:
+            game_options = [OUTCOMES] * self.num_games
+        return iter_most_probable_tickets(game_options, self.game_probabilities)
+
+    def top_tickets(self, k: int, game_options: Optional[List[List[str]]] = None) -> List[Dict[str, Any]]:
+        """The k most likely tickets, with combination numbers when a specification is given."""
+        if not 1 <= k <= MAX_RANKED_TICKETS:
+            raise ValueError(f"k must be between 1 and {MAX_RANKED_TICKETS}")
+
+        tickets = []
+        for rank, (probability, index, predictions) in enumerate(self.iter_tickets(game_options), start=1):
+            tickets.append({
+                "rank": rank,
+                "predictions": predictions,
+                "probability": probability,
+                "combination_number": index + 1 if game_options is not None else None,
+            })
+            if rank >= k:
+                break
+        return tickets
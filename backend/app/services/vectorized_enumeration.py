@@ -0,0 +1,82 @@
+from typing import List, Iterator, Tuple, Optional
+from math import prod
+import numpy as np
+
+# Outcome codes used in the int8 ticket matrices
+OUTCOME_CODES = {"1": 0, "X": 1, "2": 2}
+
+# 64k tickets x 17 games keeps a chunk around 1 MB as int8
+DEFAULT_CHUNK_SIZE = 65536
+
+
+class ChunkedCombinationEnumerator:
+    """
+    Enumerate a specification as fixed-size int8 ticket matrices with NumPy.
+
+    Tickets are addressed by their index in itertools.product order over the
+    game selections (a mixed-radix number with the last game varying fastest).
+    Each chunk is built straight from a range of indices, so peak memory depends
+    on chunk_size only, never on the number of combinations.
+    """
+
+    def __init__(self, game_options: List[List[str]], actual_results: List[str], chunk_size: int = DEFAULT_CHUNK_SIZE):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be positive")
+
+        self.num_games = len(game_options)
+        self.chunk_size = chunk_size
+        self.total_combinations = prod(len(options) for options in game_options)
+
+        # int32 index arithmetic is about twice as fast and covers every real specification
+        self.index_dtype = np.int32 if self.total_combinations < 2 ** 31 else np.int64
+        self.radices = np.array([len(options) for options in game_options], dtype=self.index_dtype)
+
+        # Index stride of each game: the last game changes on every ticket
+        self.strides = np.ones(self.num_games, dtype=self.index_dtype)
+        for game_index in range(self.num_games - 2, -1, -1):
+            self.strides[game_index] = self.strides[game_index + 1] * self.radices[game_index + 1]
+
+        # Selection digit -> outcome code lookup, one row per game
+        self.option_codes = np.zeros((self.num_games, 3), dtype=np.int8)
+        for game_index, options in enumerate(game_options):
+            for digit, outcome in enumerate(options):
+                self.option_codes[game_index, digit] = OUTCOME_CODES[outcome]
+
+        self.actual_codes = np.array([OUTCOME_CODES[result] for result in actual_results], dtype=np.int8)
+
+    def iter_chunks(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Tuple[int, np.ndarray]]:
+        """Yield (first_index, tickets) where tickets is an int8 matrix of shape (n, num_games)."""
+        stop = self.total_combinations if stop is None else min(stop, self.total_combinations)
+        game_positions = np.arange(self.num_games)
+
+        for chunk_start in range(start, stop, self.chunk_size):
+            chunk_stop = min(chunk_start + self.chunk_size, stop)
+            indices = np.arange(chunk_start, chunk_stop, dtype=self.index_dtype)
+            digits = (indices[:, None] // self.strides) % self.radices
+            yield chunk_start, self.option_codes[game_positions, digits]
+
+    def iter_match_counts(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Tuple[int, np.ndarray]]:
+        """Yield (first_index, matches) with the match count of every ticket in the chunk."""
+        for chunk_start, tickets in self.iter_chunks(start, stop):
+            yield chunk_start, np.count_nonzero(tickets == self.actual_codes, axis=1)
+
+    def match_histogram(self, start: int = 0, stop: Optional[int] = None) -> List[int]:
+        """Number of tickets at every match count 0..N."""
+        histogram = np.zeros(self.num_games + 1, dtype=np.int64)
+        for _, matches in self.iter_match_counts(start, stop):
+            histogram += np.bincount(matches, minlength=self.num_games + 1)
+        return histogram.tolist()
+
+    def winning_indices(self, min_matches: int) -> np.ndarray:
+        """Indices of every ticket with at least min_matches correct predictions."""
+        winners = [
+            chunk_start + np.flatnonzero(matches >= min_matches)
+            for chunk_start, matches in self.iter_match_counts()
+        ]
+        return np.concatenate(winners) if winners else np.zeros(0, dtype=np.int64)
+
+    def ticket_payouts(self, payouts_by_matches: List[float]) -> Iterator[Tuple[int, np.ndarray]]:
+        """Yield (first_index, payouts) using a payout lookup indexed by match count."""
+        payout_table = np.asarray(payouts_by_matches, dtype=np.float64)
+        for chunk_start, matches in self.iter_match_counts():
+            yield chunk_start, payout_table[matches]
@@ -0,0 +1,49 @@
+from typing import List, Iterable
+import base64
+
+# Above this many winning tickets the index is not stored; lookups fall back to
+# the branch-and-bound enumerator
+MAX_STORED_WINNERS = 200000
+
+
+def encode_index_set(indices: Iterable[int]) -> str:
+    """
+    Encode a sorted set of ticket indices as base64 text.
+
+    Gaps between consecutive indices are written as LEB128 varints, so winners
+    that sit close together in the index space cost a byte or two each.
+    """
+    encoded = bytearray()
+    previous = -1
+    for index in indices:
+        if index <= previous:
+            raise ValueError("Ticket indices must be strictly increasing")
+        gap = index - previous - 1
+        previous = index
+        while True:
+            byte = gap & 0x7F
+            gap >>= 7
+            if gap:
+                encoded.append(byte | 0x80)
+            else:
+                encoded.append(byte)
+                break
+    return base64.b64encode(bytes(encoded)).decode("ascii")
+
+
+def decode_index_set(encoded: str) -> List[int]:
+    """Decode ticket indices written by encode_index_set."""
+    indices = []
+    previous = -1
+    gap = 0
+    shift = 0
+    for byte in base64.b64decode(encoded):
+        gap |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        previous += gap + 1
+        indices.append(previous)
+        gap = 0
+        shift = 0
+    return indices
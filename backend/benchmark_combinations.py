@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Combination Enumeration Benchmark
+
+Measures tickets/sec for the per-ticket analysis paths on a synthetic
+specification. Nothing is read from or written to the database.
+
+Usage:
+    python benchmark_combinations.py [--doubles N] [--triples N] [--games N] [--seed N] [--workers N]
+"""
+
+import sys
+import time
+import random
+import argparse
+import logging
+from itertools import product
+from typing import List, Callable
+
+# Add the app directory to Python path
+sys.path.append('app')
+
+from app.services.combination_math import (
+    iter_packed_tickets,
+    pack_predictions,
+    count_packed_matches,
+)
+from app.services.vectorized_enumeration import ChunkedCombinationEnumerator
+from app.services.sharded_enumeration import sharded_match_histogram
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+OUTCOMES = ["1", "X", "2"]
+
+
+def build_specification(num_games: int, doubles: int, triples: int, rng: random.Random) -> List[List[str]]:
+    """Random game options with the requested number of doubles and triples."""
+    games = list(range(num_games))
+    rng.shuffle(games)
+    double_games = set(games[:doubles])
+    triple_games = set(games[doubles:doubles + triples])
+
+    game_options = []
+    for game in range(num_games):
+        if game in triple_games:
+            game_options.append(OUTCOMES.copy())
+        elif game in double_games:
+            game_options.append(rng.sample(OUTCOMES, 2))
+        else:
+            game_options.append([rng.choice(OUTCOMES)])
+    return game_options
+
+
+def string_histogram(game_options: List[List[str]], actual_results: List[str]) -> List[int]:
+    """Previous path: a list of strings per ticket and a zip comparison."""
+    histogram = [0] * (len(actual_results) + 1)
+    for combination in product(*game_options):
+        predictions = list(combination)
+        histogram[sum(pred == actual for pred, actual in zip(predictions, actual_results))] += 1
+    return histogram
+
+
+def packed_histogram(game_options: List[List[str]], actual_results: List[str]) -> List[int]:
+    """Packed path: one integer per ticket and a mask-and-popcount."""
+    histogram = [0] * (len(actual_results) + 1)
+    packed_results = pack_predictions(actual_results)
+    for packed_ticket in iter_packed_tickets(game_options):
+        histogram[count_packed_matches(packed_ticket, packed_results)] += 1
+    return histogram
+
+
+def vectorized_histogram(game_options: List[List[str]], actual_results: List[str]) -> List[int]:
+    """NumPy path: int8 ticket chunks compared in one broadcast."""
+    return ChunkedCombinationEnumerator(game_options, actual_results).match_histogram()
+
+
+def run_benchmark(name: str, fn: Callable, game_options: List[List[str]], actual_results: List[str]) -> List[int]:
+    """Time one enumeration path and log its throughput."""
+    start = time.perf_counter()
+    histogram = fn(game_options, actual_results)
+    elapsed = time.perf_counter() - start
+    tickets = sum(histogram)
+    logger.info(f"{name:>8}: {tickets:,} tickets in {elapsed:.3f}s ({tickets / elapsed:,.0f} tickets/sec)")
+    return histogram
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-ticket combination analysis")
+    parser.add_argument("--games", type=int, default=17, help="Number of games in the jackpot")
+    parser.add_argument("--doubles", type=int, default=9, help="Number of double selections")
+    parser.add_argument("--triples", type=int, default=5, help="Number of triple selections")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for the synthetic specification")
+    parser.add_argument("--workers", type=int, default=4, help="Worker processes for the sharded path")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    game_options = build_specification(args.games, args.doubles, args.triples, rng)
+    actual_results = [rng.choice(OUTCOMES) for _ in range(args.games)]
+
+    logger.info(f"Specification: {args.games} games, {args.doubles} doubles, {args.triples} triples")
+
+    baseline = run_benchmark("strings", string_histogram, game_options, actual_results)
+    packed = run_benchmark("packed", packed_histogram, game_options, actual_results)
+    vectorized = run_benchmark("numpy", vectorized_histogram, game_options, actual_results)
+    sharded = run_benchmark(
+        "sharded",
+        lambda options, results: sharded_match_histogram(options, results, args.workers, min_shard_size=1),
+        game_options,
+        actual_results
+    )
+
+    if packed != baseline or vectorized != baseline or sharded != baseline:
+        logger.error("Histograms do not match the string baseline")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Budget Strategy Backtest Runner
+
+Draws seeded random specifications for each budget, as the budget strategy
+does without odds, and scores every one against all completed jackpots in the
+database. Reports the mean, variance and tail ROI per budget.
+
+Usage:
+    python budget_backtest_runner.py --budgets 990 9900 99000 [--samples N] [--seed N] [--workers N] [--games N] [--json]
+"""
+
+import sys
+import json
+import argparse
+import logging
+
+# Add the app directory to Python path
+sys.path.append('app')
+
+from app.services.budget_backtest import BudgetBacktest
+from app.services.historical_replay import historical_outcomes
+from app.config.settings import ANALYSIS_WORKERS
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo backtest of the budget strategy against historical jackpots")
+    parser.add_argument("--budgets", type=float, nargs="+", required=True, help="Budgets in KSh")
+    parser.add_argument("--samples", type=int, default=1000, help="Seeded specifications per budget")
+    parser.add_argument("--seed", type=int, default=0, help="Base seed for the specifications")
+    parser.add_argument("--workers", type=int, default=ANALYSIS_WORKERS, help="Worker processes")
+    parser.add_argument("--games", type=int, default=17, help="Replay against jackpots with this many games")
+    parser.add_argument("--json", action="store_true", help="Print the full report as JSON")
+    args = parser.parse_args()
+
+    history = historical_outcomes.get()
+    logger.info(f"Loaded {history.jackpot_count()} completed jackpots")
+
+    report = BudgetBacktest(args.budgets, args.samples, args.seed).run(history, args.games, args.workers)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    logger.info(f"Backtest over {report['jackpots']} jackpots, {report['samples_per_budget']} specifications per budget")
+    for row in report["budgets"]:
+        logger.info(
+            f"{row['budget_ksh']:>10,.0f} KSh ({row['doubles']}D/{row['triples']}T, {row['total_combinations']} bets): "
+            f"mean ROI {row['mean_roi']:+.4f}, std {row['roi_std']:.4f}, "
+            f"p05 {row['roi_p05']:+.4f}, tail mean {row['tail_mean_roi']:+.4f}, "
+            f"P(profit) {row['probability_of_profit']:.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Jackpot Result Repricing Runner
+
+Recomputes payouts, net loss and prize breakdowns of every analyzed simulation
+of a jackpot from the stored match histograms, after the jackpot's prize
+amounts were updated. No combination is re-analyzed.
+
+Usage:
+    python reprice_jackpot_runner.py JACKPOT_ID [JACKPOT_ID ...]
+"""
+
+import sys
+import argparse
+import logging
+
+# Add the app directory to Python path
+sys.path.append('app')
+
+from app.services.result_repricing import JackpotRepricer
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reprice stored simulation results after jackpot prizes change")
+    parser.add_argument("jackpot_ids", nargs="+", help="Jackpot ids (database ids) to reprice")
+    args = parser.parse_args()
+
+    failed = False
+    for jackpot_id in args.jackpot_ids:
+        try:
+            counts = JackpotRepricer(jackpot_id).reprice()
+            logger.info(f"Jackpot {jackpot_id}: {counts}")
+            failed = failed or counts["failed"] > 0
+        except Exception as e:
+            logger.error(f"Failed to reprice jackpot {jackpot_id}: {e}")
+            failed = True
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Brute-force checks of the closed-form combination math
+
+Each test builds small specifications, enumerates every ticket with
+itertools.product and compares the result with the closed-form or
+branch-and-bound path used by the analysis. No database is needed.
+
+Usage:
+    python -m pytest test_combination_math.py
+"""
+
+import random
+import sys
+from itertools import product
+
+import pytest
+
+from app.services.combination_math import (
+    match_histogram,
+    rank_ticket,
+    unrank_ticket,
+    iter_packed_tickets,
+    unpack_predictions,
+    iter_winning_tickets,
+    portfolio_match_histogram,
+    total_combinations,
+)
+from app.services.reduced_system import CoveringDesign, ticket_match_histogram
+from app.services.odds_forecast import match_count_distribution
+from app.services.winner_index import encode_index_set, decode_index_set
+
+OUTCOMES = ["1", "X", "2"]
+
+
+def random_game_options(rng: random.Random, num_games: int):
+    """Selections of a random specification: one, two or three outcomes per game."""
+    return [rng.sample(OUTCOMES, rng.randint(1, 3)) for _ in range(num_games)]
+
+
+def brute_force_histogram(tickets, actual_results):
+    histogram = [0] * (len(actual_results) + 1)
+    for ticket in tickets:
+        histogram[sum(1 for prediction, result in zip(ticket, actual_results) if prediction == result)] += 1
+    return histogram
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_match_histogram_matches_enumeration(seed):
+    rng = random.Random(seed)
+    game_options = random_game_options(rng, 7)
+    actual_results = [rng.choice(OUTCOMES) for _ in game_options]
+
+    assert match_histogram(game_options, actual_results) == brute_force_histogram(product(*game_options), actual_results)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_rank_and_unrank_round_trip_in_enumeration_order(seed):
+    rng = random.Random(seed)
+    game_options = random_game_options(rng, 6)
+    tickets = [list(ticket) for ticket in product(*game_options)]
+
+    assert total_combinations(game_options) == len(tickets)
+    for index, ticket in enumerate(tickets):
+        assert unrank_ticket(index, game_options) == ticket
+        assert rank_ticket(ticket, game_options) == index
+
+    # Packed enumeration (including a slice) follows the same order
+    num_games = len(game_options)
+    assert [unpack_predictions(packed, num_games) for packed in iter_packed_tickets(game_options, block_size=4)] == tickets
+    start, stop = len(tickets) // 3, 2 * len(tickets) // 3
+    assert [unpack_predictions(packed, num_games) for packed in iter_packed_tickets(game_options, start, stop, block_size=4)] == tickets[start:stop]
+
+
+def test_rank_rejects_tickets_outside_the_specification():
+    game_options = [["1"], ["1", "X"], OUTCOMES]
+    with pytest.raises(ValueError):
+        rank_ticket(["2", "1", "1"], game_options)
+    with pytest.raises(ValueError):
+        unrank_ticket(total_combinations(game_options), game_options)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_iter_winning_tickets_matches_enumeration(seed):
+    rng = random.Random(seed)
+    game_options = random_game_options(rng, 7)
+    # Undecided games (None) never match
+    actual_results = [rng.choice(OUTCOMES + [None]) for _ in game_options]
+    min_matches = rng.randint(0, len(game_options))
+
+    expected = []
+    for index, ticket in enumerate(product(*game_options)):
+        matches = sum(1 for prediction, result in zip(ticket, actual_results) if prediction == result)
+        if matches >= min_matches:
+            expected.append((index, matches))
+
+    assert list(iter_winning_tickets(game_options, actual_results, min_matches)) == expected
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_portfolio_match_histogram_counts_each_distinct_ticket_once(seed):
+    rng = random.Random(seed)
+    num_games = 6
+    portfolio_options = [random_game_options(rng, num_games) for _ in range(rng.randint(1, 4))]
+    actual_results = [rng.choice(OUTCOMES + [None]) for _ in range(num_games)]
+
+    distinct_tickets = set()
+    for game_options in portfolio_options:
+        distinct_tickets.update(product(*game_options))
+
+    assert portfolio_match_histogram(portfolio_options, actual_results) == brute_force_histogram(distinct_tickets, actual_results)
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_covering_design_guarantees_its_matches(seed):
+    rng = random.Random(seed)
+    game_options = random_game_options(rng, 6)
+    full_system = [list(ticket) for ticket in product(*game_options)]
+
+    for guarantee in range(len(game_options) + 1):
+        design = CoveringDesign(game_options, guarantee)
+        tickets = design.tickets(design.build(time_budget=0))
+
+        assert all(ticket in full_system for ticket in tickets)
+        # Every possible outcome inside the selections has a ticket with >= guarantee correct
+        for outcome in full_system:
+            assert max(sum(1 for prediction, result in zip(ticket, outcome) if prediction == result) for ticket in tickets) >= guarantee
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_ticket_match_histogram_matches_full_system(seed):
+    rng = random.Random(seed)
+    game_options = random_game_options(rng, 6)
+    actual_results = [rng.choice(OUTCOMES) for _ in game_options]
+
+    # A reduced system holding every ticket scores like the full system
+    assert ticket_match_histogram([list(ticket) for ticket in product(*game_options)], actual_results) == match_histogram(game_options, actual_results)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_match_count_distribution_matches_enumeration(seed):
+    rng = random.Random(seed)
+    hit_probabilities = [rng.random() for _ in range(8)]
+
+    expected = [0.0] * (len(hit_probabilities) + 1)
+    for hits in product([False, True], repeat=len(hit_probabilities)):
+        probability = 1.0
+        for hit, p in zip(hits, hit_probabilities):
+            probability *= p if hit else 1.0 - p
+        expected[sum(hits)] += probability
+
+    assert match_count_distribution(hit_probabilities) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_winner_index_round_trip(seed):
+    rng = random.Random(seed)
+    indices = sorted(rng.sample(range(100000), rng.randint(0, 500)))
+
+    assert decode_index_set(encode_index_set(indices)) == indices
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,35 @@
+-- Migration: Add live standings for simulations of jackpots in play
+-- Created: 2024-03-25
+
+-- One row per simulation, updated incrementally as game results come in
+CREATE TABLE IF NOT EXISTS simulation_live_standings (
+    simulation_id UUID PRIMARY KEY REFERENCES simulations(id) ON DELETE CASCADE,
+    jackpot_id UUID NOT NULL REFERENCES jackpots(id) ON DELETE CASCADE,
+    decided_results JSONB NOT NULL DEFAULT '{}'::jsonb,
+    histogram JSONB NOT NULL,
+    games_decided INTEGER NOT NULL DEFAULT 0,
+    matches_so_far INTEGER NOT NULL DEFAULT 0,
+    worst_guaranteed INTEGER NOT NULL DEFAULT 0,
+    best_achievable INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Add index for better performance
+CREATE INDEX IF NOT EXISTS idx_simulation_live_standings_jackpot_id ON simulation_live_standings(jackpot_id);
+
+-- Enable RLS (Row Level Security)
+ALTER TABLE simulation_live_standings ENABLE ROW LEVEL SECURITY;
+
+-- Users can only see standings of their own simulations
+CREATE POLICY "Users can view own live standings" ON simulation_live_standings
+    FOR SELECT USING (
+        EXISTS (
+            SELECT 1 FROM simulations
+            WHERE simulations.id = simulation_live_standings.simulation_id
+            AND simulations.user_id = auth.uid()
+        )
+    );
+
+-- Add comments for documentation
+COMMENT ON TABLE simulation_live_standings IS 'Per-simulation match histogram over the results decided so far';
+COMMENT ON COLUMN simulation_live_standings.histogram IS 'histogram[k] = number of combinations with k matches among decided games';
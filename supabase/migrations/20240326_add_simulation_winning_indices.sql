@@ -0,0 +1,10 @@
+-- Migration: Store the winning ticket indices of each analyzed simulation
+-- Created: 2024-03-26
+
+-- Sorted combination indices (0-based) of winning tickets, delta + varint encoded, base64 text.
+-- NULL when the simulation has too many winners to store or was analyzed before this column existed.
+ALTER TABLE public.simulation_results
+ADD COLUMN IF NOT EXISTS winning_indices TEXT DEFAULT NULL;
+
+-- Add comment for documentation
+COMMENT ON COLUMN public.simulation_results.winning_indices IS 'Base64 delta-varint encoded sorted indices of winning combinations';
@@ -0,0 +1,9 @@
+-- Migration: Store the odds-implied forecast with each bet specification
+-- Created: 2024-03-27
+
+-- Best match count distribution, prize level probabilities and expected payout computed at creation time
+ALTER TABLE public.bet_specifications
+ADD COLUMN IF NOT EXISTS forecast JSONB DEFAULT NULL;
+
+-- Add comment for documentation
+COMMENT ON COLUMN public.bet_specifications.forecast IS 'Odds-implied forecast of the best match count (computed when the simulation is created)';
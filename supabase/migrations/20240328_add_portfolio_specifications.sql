@@ -0,0 +1,13 @@
+-- Migration: Allow portfolio simulations made of several bet specifications
+-- Created: 2024-03-28
+
+-- Position of a specification within its simulation (0 for single-specification simulations)
+ALTER TABLE public.bet_specifications
+ADD COLUMN IF NOT EXISTS portfolio_position INTEGER NOT NULL DEFAULT 0;
+
+-- One specification per position
+ALTER TABLE public.bet_specifications
+ADD CONSTRAINT bet_specifications_simulation_position_key UNIQUE (simulation_id, portfolio_position);
+
+-- Add comment for documentation
+COMMENT ON COLUMN public.bet_specifications.portfolio_position IS 'Order of the specification within a portfolio simulation (combination_type = portfolio)';
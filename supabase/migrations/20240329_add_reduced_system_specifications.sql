@@ -0,0 +1,18 @@
+-- Migration: Allow reduced-system bet specifications (covering designs)
+-- Created: 2024-03-29
+
+-- Reduced systems store their tickets explicitly instead of every combination
+ALTER TABLE public.bet_specifications
+DROP CONSTRAINT IF EXISTS bet_specifications_combination_type_check;
+
+ALTER TABLE public.bet_specifications
+ADD CONSTRAINT bet_specifications_combination_type_check
+CHECK (combination_type IN ('single', 'double', 'triple', 'mixed', 'reduced'));
+
+ALTER TABLE public.bet_specifications
+ADD COLUMN IF NOT EXISTS reduced_guarantee INTEGER,
+ADD COLUMN IF NOT EXISTS reduced_tickets JSONB;
+
+-- Add comments for documentation
+COMMENT ON COLUMN public.bet_specifications.reduced_guarantee IS 'Correct predictions guaranteed by a reduced system when every result falls inside the game selections';
+COMMENT ON COLUMN public.bet_specifications.reduced_tickets IS 'Tickets of a reduced system (combination_type = reduced), one list of 1/X/2 predictions per ticket';
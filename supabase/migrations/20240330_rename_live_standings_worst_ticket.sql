@@ -0,0 +1,9 @@
+-- Migration: Rename the live standings column that reads as a guarantee
+-- Created: 2024-03-30
+
+-- The column holds the current score of the worst ticket, not a floor on how the simulation finishes
+ALTER TABLE simulation_live_standings RENAME COLUMN worst_guaranteed TO worst_ticket_matches;
+
+-- Add comments for documentation
+COMMENT ON COLUMN simulation_live_standings.worst_ticket_matches IS 'Matches of the worst-performing ticket among decided games (its current score, not a guaranteed floor)';
+COMMENT ON COLUMN simulation_live_standings.matches_so_far IS 'Matches of the best ticket among decided games (a floor on the best ticket''s final matches)';